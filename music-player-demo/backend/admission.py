@@ -0,0 +1,98 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - ADMISSION CONTROL
+# Purpose: Bound how many requests of each route class run at once in a
+#          worker, and shed load early - 503 with Retry-After - once a class
+#          is full or the connection pool already has callers queued, instead
+#          of letting requests pile up until gunicorn times them out
+# Config:  ADMISSION_LIMITS, ADMISSION_QUEUE_TIMEOUT, ADMISSION_RETRY_AFTER,
+#          ADMISSION_MAX_POOL_WAITERS (see app.py)
+# ============================================================================
+
+import threading
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed; `retry_after` is in seconds"""
+
+    def __init__(self, route_class, reason, retry_after):
+        super().__init__(f"{route_class}: {reason}")
+        self.route_class = route_class
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def parse_limits(spec):
+    """'playlists=32,catalog=32,default=64' -> {'playlists': 32, ...}"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in (spec or '').split(','))):
+        name, _, value = item.partition('=')
+        limits[name.strip()] = int(value)
+    return limits
+
+
+class AdmissionControl:
+    """
+    One bounded semaphore per route class.
+
+    A request waits at most `queue_timeout` seconds for a slot in its class;
+    classes not listed share the 'default' limit (no limit if that is unset).
+    `pool_waiters()` reports how many callers are blocked on the connection
+    pool: at `max_pool_waiters` or more, new requests are shed immediately,
+    since they would only queue behind them.
+    """
+
+    def __init__(self, limits, queue_timeout=0.5, retry_after=1, pool_waiters=None, max_pool_waiters=0):
+        self.limits = dict(limits)
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.pool_waiters = pool_waiters
+        self.max_pool_waiters = max_pool_waiters
+        self._slots = {name: threading.BoundedSemaphore(limit) for name, limit in self.limits.items()}
+        self._lock = threading.Lock()
+        self._active = dict.fromkeys(self.limits, 0)
+        self._stats = {'admitted': 0, 'shed_full': 0, 'shed_pool': 0}
+
+    @property
+    def enabled(self):
+        return bool(self._slots)
+
+    def _class(self, route_class):
+        return route_class if route_class in self._slots else 'default'
+
+    def admit(self, route_class):
+        """
+        Take a slot for `route_class` (released with `release`), or raise
+        Overloaded. Returns the class the slot was taken from, or None when
+        the class is unlimited.
+        """
+        name = self._class(route_class)
+        if (self.max_pool_waiters > 0 and self.pool_waiters is not None
+                and self.pool_waiters() >= self.max_pool_waiters):
+            with self._lock:
+                self._stats['shed_pool'] += 1
+            raise Overloaded(route_class, 'database pool saturated', self.retry_after)
+
+        slots = self._slots.get(name)
+        if slots is None:
+            return None
+        if not slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self._stats['shed_full'] += 1
+            raise Overloaded(route_class, f'more than {self.limits[name]} concurrent requests', self.retry_after)
+        with self._lock:
+            self._active[name] += 1
+            self._stats['admitted'] += 1
+        return name
+
+    def release(self, name):
+        with self._lock:
+            self._active[name] -= 1
+        self._slots[name].release()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            for name, limit in self.limits.items():
+                stats[f'{name}_active'] = self._active[name]
+                stats[f'{name}_limit'] = limit
+            return stats
@@ -1,19 +1,120 @@
 import os
-from flask import Flask, request, jsonify, g
+from flask import Flask, Response, request, jsonify, g, has_request_context, stream_with_context
 from flask_cors import CORS
 import pymysql
-from datetime import datetime
-import re
+from datetime import date, datetime, timedelta, timezone
+import atexit
+import click
+from contextlib import contextmanager
+import logging
+import math
+import threading
+import time
+from db_pool import ConnectionPool
+from replicas import ReplicaRouter, parse_hosts
+from cache import ResponseCache, cached
+from single_flight import SingleFlight, coalesced
+from admission import AdmissionControl, Overloaded, parse_limits
+from catalog_ingest import CatalogIngester, IngestError, feed_format, read_records, text_stream
+from catalog_snapshot import SnapshotStore, build_from_db as build_catalog_snapshot
+from conditional import conditional
+from middleware import CORS_HEADERS, CORS_METHODS, CompressionMiddleware, OriginPolicy, PreflightMiddleware
+from search_index import SearchIndex
+from typeahead import PrefixIndex
+import playlist_order
+import profile_stats
+from recommender import AVAILABLE as RECOMMENDER_AVAILABLE, Recommender
+from plays import MAX_INT, MIN_TIMESTAMP, WINDOWS as PLAY_WINDOWS, PlayBuffer, PlayCounts
+from favorites_buffer import FavoritesBuffer, is_favorite, set_favorite, toggle_favorite
+from charts import ChartStore
+from json_provider import FastJSONProvider, rows_as_columns
+from projections import SONG_ROW, ARTIST_SONG_ROW, FAVORITE_SONG_ROW, ARTIST_ROW, PLAYLIST_ROW
+from prepared import AVAILABLE as PREPARED_AVAILABLE, PreparedStatements
+import instrumentation
+from instrumentation import log, InstrumentedConnection, RequestProfiler
 
 app = Flask(__name__)
 
-# Allow all Vercel preview and production domains
+# Level-gated logging (DEBUG shows per-request detail); each worker moves it
+# off-thread when its background jobs start
+instrumentation.configure_logging(os.getenv('LOG_LEVEL', 'INFO'))
+instrumentation.SLOW_QUERY_SECONDS = float(os.getenv('SLOW_QUERY_MS', 200)) / 1000
+
+# Development guard against query-per-row handlers (QUERY_BUDGET=0 disables)
+instrumentation.configure_query_budget(
+    int(os.getenv('QUERY_BUDGET', 0)),
+    repeat_limit=int(os.getenv('QUERY_REPEAT_LIMIT', 5)),
+    mode=os.getenv('QUERY_BUDGET_MODE', 'warn')
+)
+
+# Opt-in cProfile of sampled requests (PROFILE_SAMPLE_RATE=0.01 profiles 1%)
+request_profiler = RequestProfiler(
+    sample_rate=float(os.getenv('PROFILE_SAMPLE_RATE', 0)),
+    output_dir=os.getenv('PROFILE_DIR', 'profiles'),
+    allow_header=os.getenv('PROFILE_ALLOW_HEADER', '0').lower() in ('1', 'true', 'yes')
+)
+
+# orjson-backed JSON encoding (stdlib fallback when orjson is not installed)
+app.json = FastJSONProvider(app, datetime_format=os.getenv('JSON_DATETIME_FORMAT', 'http'))
+
+# Allow all Vercel preview and production domains (compiled once, verdicts
+# memoized per origin)
+origin_policy = OriginPolicy([
+    r'https://music-player-demo.*\.vercel\.app$',
+    r'http://localhost:\d+$'
+])
+
 def is_allowed_origin(origin):
-    allowed_patterns = [
-        r'https://music-player-demo.*\.vercel\.app$',
-        r'http://localhost:\d+$'
-    ]
-    return any(re.match(pattern, origin) for pattern in allowed_patterns)
+    return origin_policy.allows(origin)
+
+@app.before_request
+def start_request_timer():
+    """Start the latency clock, per-request query counters and profiler"""
+    g.request_started = time.perf_counter()
+    instrumentation.begin_request()
+    if request_profiler.enabled:
+        g.profiler = request_profiler.start(request.headers.get('X-Profile') == '1')
+
+@app.after_request
+def record_request_metrics(response):
+    """Observe route latency and log one structured line per request"""
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    instrumentation.http_request_seconds.observe(elapsed, request.method, route)
+    instrumentation.http_requests_total.inc(request.method, route, str(response.status_code))
+
+    queries, db_seconds = instrumentation.request_stats()
+    if queries:
+        instrumentation.http_request_queries_total.inc(request.method, route, amount=queries)
+    if instrumentation.QUERY_BUDGET:
+        response.headers['X-Query-Count'] = str(queries)
+        problems = instrumentation.budget_violations()
+        if problems:
+            log.warning("🚨 Query budget exceeded by %s %s: %s", request.method, route, '; '.join(problems))
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        path = request_profiler.finish(profiler, f"{request.method} {route}")
+        log.info("🔬 Profiled %s %s -> %s", request.method, request.path, path)
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("request", extra={'fields': {
+            'method': request.method,
+            'route': route,
+            'status': response.status_code,
+            'ms': round(elapsed * 1000, 2),
+            'queries': queries,
+            'db_ms': round(db_seconds * 1000, 2),
+        }})
+    return response
+
+@app.teardown_request
+def stop_request_profiler(error):
+    """Never leave the profiler running if the response was not finalized"""
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        request_profiler.finish(profiler, f"{request.method} {request.path}")
 
 @app.after_request
 def after_request(response):
@@ -21,10 +122,30 @@ def after_request(response):
     if origin and is_allowed_origin(origin):
         response.headers['Access-Control-Allow-Origin'] = origin
         response.headers['Access-Control-Allow-Credentials'] = 'true'
-        response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-        response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+        response.headers['Access-Control-Allow-Methods'] = CORS_METHODS
+        response.headers['Access-Control-Allow-Headers'] = CORS_HEADERS
+    if origin:
+        response.vary.add('Origin')
     return response
 
+# CORS preflights are answered in front of Flask from cached headers; browsers
+# reuse one for CORS_MAX_AGE seconds (Chrome caps this at 7200)
+CORS_MAX_AGE = int(os.getenv('CORS_MAX_AGE', 600))
+
+# gzip / brotli response compression (COMPRESSION_ENABLED=0 when a proxy in
+# front already compresses); bodies under COMPRESSION_MIN_SIZE bytes are sent
+# as they are, streamed bodies are compressed chunk by chunk
+COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', '1').lower() in ('1', 'true', 'yes')
+
+response_compression = CompressionMiddleware(
+    app.wsgi_app,
+    min_size=int(os.getenv('COMPRESSION_MIN_SIZE', 1024)),
+    gzip_level=int(os.getenv('COMPRESSION_GZIP_LEVEL', 6)),
+    brotli_quality=int(os.getenv('COMPRESSION_BROTLI_QUALITY', 4))
+) if COMPRESSION_ENABLED else None
+
+app.wsgi_app = PreflightMiddleware(response_compression or app.wsgi_app, origin_policy, max_age=CORS_MAX_AGE)
+
 # Database configuration
 DB_CONFIG = {
     'host': os.getenv('MYSQLHOST', 'localhost'),
@@ -36,18 +157,240 @@ DB_CONFIG = {
     'autocommit': False
 }
 
+# Connection pool shared by all requests handled by this worker
+db_pool = ConnectionPool(
+    lambda: InstrumentedConnection(**DB_CONFIG),
+    size=int(os.getenv('MYSQL_POOL_SIZE', 5)),
+    max_overflow=int(os.getenv('MYSQL_POOL_MAX_OVERFLOW', 10)),
+    timeout=float(os.getenv('MYSQL_POOL_TIMEOUT', 30)),
+    idle_timeout=float(os.getenv('MYSQL_POOL_IDLE_TIMEOUT', 300)),
+    recycle=float(os.getenv('MYSQL_POOL_RECYCLE', 3600))
+)
+
+# Read replicas (MYSQL_REPLICA_HOSTS=host[:port],...); same credentials and
+# database as the primary unless MYSQL_REPLICA_USER / _PASSWORD are set
+def replica_pool(host, port):
+    config = dict(
+        DB_CONFIG,
+        host=host,
+        port=port,
+        user=os.getenv('MYSQL_REPLICA_USER', DB_CONFIG['user']),
+        password=os.getenv('MYSQL_REPLICA_PASSWORD', DB_CONFIG['password'])
+    )
+    return ConnectionPool(
+        lambda: InstrumentedConnection(**config),
+        size=int(os.getenv('MYSQL_REPLICA_POOL_SIZE', os.getenv('MYSQL_POOL_SIZE', 5))),
+        max_overflow=int(os.getenv('MYSQL_POOL_MAX_OVERFLOW', 10)),
+        timeout=float(os.getenv('MYSQL_POOL_TIMEOUT', 30)),
+        idle_timeout=float(os.getenv('MYSQL_POOL_IDLE_TIMEOUT', 300)),
+        recycle=float(os.getenv('MYSQL_POOL_RECYCLE', 3600))
+    )
+
+db_router = ReplicaRouter(
+    db_pool,
+    [(f"{host}:{port}", replica_pool(host, port))
+     for host, port in parse_hosts(os.getenv('MYSQL_REPLICA_HOSTS'), DB_CONFIG['port'])],
+    max_lag=float(os.getenv('REPLICA_MAX_LAG', 5)),
+    check_interval=float(os.getenv('REPLICA_LAG_CHECK_INTERVAL', 5)),
+    log=log.warning
+)
+
+# After a write, the same client reads from the primary for this many seconds
+# so it sees its own change even while the replicas catch up
+PRIMARY_STICKY_SECONDS = float(os.getenv('PRIMARY_STICKY_SECONDS', 5))
+PRIMARY_STICKY_COOKIE = 'db_primary_until'
+READ_METHODS = ('GET', 'HEAD')
+
+def reads_from_replica():
+    """True when the current request may be served by a replica"""
+    if not db_router.enabled or not has_request_context():
+        return False
+    if request.method not in READ_METHODS or g.get('use_primary'):
+        return False
+    try:
+        sticky_until = float(request.cookies.get(PRIMARY_STICKY_COOKIE, 0))
+    except ValueError:
+        sticky_until = 0
+    return sticky_until <= time.time()
+
+def use_primary():
+    """Serve the rest of this request from the primary (call before get_db)"""
+    g.use_primary = True
+
 def get_db():
-    """Get database connection for current request"""
+    """Get database connection for current request (borrowed from the pool)"""
     if 'db' not in g:
-        g.db = pymysql.connect(**DB_CONFIG)
+        pool = db_router.read_pool() if reads_from_replica() else db_pool
+        g.db = pool.acquire()
+        g.db_pool = pool
     return g.db
 
 @app.teardown_appcontext
 def close_db(error):
-    """Close database connection after request"""
+    """Return database connection to the pool after request"""
     db = g.pop('db', None)
     if db is not None:
-        db.close()
+        g.pop('db_pool', db_pool).release(db)
+
+# Server-side prepared statements (mysql-connector-python) for the single-row
+# lookups issued on nearly every GET: ETag version checks and song details.
+# They run on their own small autocommit pool against the primary; requests
+# served by a replica, or workers without the driver, use get_db() instead
+MYSQL_PREPARED_STATEMENTS = os.getenv('MYSQL_PREPARED_STATEMENTS', '1').lower() in ('1', 'true', 'yes')
+
+if MYSQL_PREPARED_STATEMENTS and not PREPARED_AVAILABLE:
+    log.warning("⚠️ MYSQL_PREPARED_STATEMENTS is set but mysql-connector-python is not installed; "
+                "hot lookups use the text protocol")
+
+prepared_statements = PreparedStatements(
+    DB_CONFIG,
+    size=int(os.getenv('MYSQL_PREPARED_POOL_SIZE', 3)),
+    max_overflow=int(os.getenv('MYSQL_POOL_MAX_OVERFLOW', 10)),
+    timeout=float(os.getenv('MYSQL_POOL_TIMEOUT', 30)),
+    idle_timeout=float(os.getenv('MYSQL_POOL_IDLE_TIMEOUT', 300)),
+    recycle=float(os.getenv('MYSQL_POOL_RECYCLE', 3600))
+) if MYSQL_PREPARED_STATEMENTS and PREPARED_AVAILABLE else None
+
+def fetch_hot_row(sql, args):
+    """One row of a hot read-only lookup, as a prepared statement when possible"""
+    if prepared_statements is not None and 'db' not in g and not reads_from_replica():
+        return prepared_statements.fetchone(sql, args)
+    # Requests already holding a connection keep reading through it, so the
+    # lookup sees that request's own transaction
+    cursor = get_db().cursor()
+    cursor.execute(sql, args)
+    row = cursor.fetchone()
+    cursor.close()
+    return row
+
+@app.after_request
+def stick_to_primary_after_write(response):
+    """Pin this client's reads to the primary for a moment after a write"""
+    if (db_router.enabled and PRIMARY_STICKY_SECONDS > 0
+            and request.method not in READ_METHODS + ('OPTIONS',) and response.status_code < 400):
+        # The frontend is on another site and sends credentials, so over HTTPS
+        # (including behind a TLS-terminating proxy) the cookie must be
+        # SameSite=None for the browser to send it back on the next read
+        secure = (request.is_secure
+                  or request.headers.get('X-Forwarded-Proto', '').split(',')[0].strip() == 'https')
+        response.set_cookie(
+            PRIMARY_STICKY_COOKIE,
+            str(round(time.time() + PRIMARY_STICKY_SECONDS, 3)),
+            max_age=int(PRIMARY_STICKY_SECONDS) + 1,
+            httponly=True,
+            secure=secure,
+            samesite='None' if secure else 'Lax'
+        )
+    return response
+
+# Admission control: concurrent requests per route class in this worker
+# (ADMISSION_LIMITS="class=n,..."; empty disables), and how many callers may
+# queue on the connection pool before new requests are shed with a 503
+admission = AdmissionControl(
+    parse_limits(os.getenv('ADMISSION_LIMITS', 'playlists=16,catalog=16,search=8,writes=16,default=32')),
+    queue_timeout=float(os.getenv('ADMISSION_QUEUE_TIMEOUT', 0.5)),
+    retry_after=int(os.getenv('ADMISSION_RETRY_AFTER', 1)),
+    pool_waiters=lambda: db_pool.waiting,
+    max_pool_waiters=int(os.getenv('ADMISSION_MAX_POOL_WAITERS', 10))
+)
+
+# Route class per endpoint; other reads are 'default', other writes 'writes'
+ROUTE_CLASSES = {
+    'get_playlist_details': 'playlists',
+    'get_playlists': 'playlists',
+    'get_user_playlists_public': 'playlists',
+    'get_artists': 'catalog',
+    'get_artist_details': 'catalog',
+    'get_songs': 'catalog',
+    'get_song_details': 'catalog',
+    'search_music': 'search',
+    'typeahead': 'search',
+    'search_users': 'search',
+}
+# Monitoring stays reachable when the worker is shedding load
+ADMISSION_EXEMPT = {'index', 'metrics', 'static'}
+
+@app.before_request
+def admit_request():
+    """Take a concurrency slot for this request's route class, or shed it"""
+    if (not admission.enabled or request.method == 'OPTIONS' or request.endpoint in ADMISSION_EXEMPT
+            or request.path.startswith('/api/health/')):
+        return None
+    route_class = ROUTE_CLASSES.get(request.endpoint) or (
+        'default' if request.method in READ_METHODS else 'writes')
+    try:
+        g.admission_slot = admission.admit(route_class)
+    except Overloaded as e:
+        log.warning("🚦 Shedding %s %s: %s", request.method, request.path, e)
+        response = jsonify({'error': 'Server busy, please retry', 'retry_after': e.retry_after})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+    return None
+
+@app.teardown_request
+def release_admission_slot(error):
+    """Free the slot once the response (including a streamed one) is done"""
+    slot = g.pop('admission_slot', None)
+    if slot is not None:
+        admission.release(slot)
+
+# Read-through cache for catalog routes (Artists / Songs change rarely)
+catalog_cache = ResponseCache(
+    max_entries=int(os.getenv('CATALOG_CACHE_MAX_ENTRIES', 1024)),
+    max_bytes=int(os.getenv('CATALOG_CACHE_MAX_BYTES', 32 * 1024 * 1024)),
+    ttl=float(os.getenv('CATALOG_CACHE_TTL', 300))
+)
+
+# Identical concurrent reads of hot routes (a shared playlist or artist page)
+# run once and share the response; followers wait at most this many seconds
+request_flights = SingleFlight(timeout=float(os.getenv('SINGLE_FLIGHT_TIMEOUT', 10)))
+
+# Read-only catalog snapshot mapped by every worker (catalog_snapshot.py).
+# /api/songs and /api/artists are served from it while it is fresh; a worker
+# rebuilds it in the background once it is older than CATALOG_SNAPSHOT_MAX_AGE
+# (0 leaves rebuilding to `flask build-catalog-snapshot`). An empty path
+# disables it
+CATALOG_SNAPSHOT_PATH = os.getenv('CATALOG_SNAPSHOT_PATH', 'catalog.snapshot')
+CATALOG_SNAPSHOT_MAX_AGE = float(os.getenv('CATALOG_SNAPSHOT_MAX_AGE', 300))
+
+catalog_snapshots = SnapshotStore(
+    CATALOG_SNAPSHOT_PATH,
+    check_interval=float(os.getenv('CATALOG_SNAPSHOT_CHECK_INTERVAL', 5))
+) if CATALOG_SNAPSHOT_PATH else None
+
+def catalog_snapshot():
+    """The mapped catalog snapshot, or None to read from MySQL"""
+    if catalog_snapshots is None:
+        return None
+    snapshot = catalog_snapshots.current()
+    if CATALOG_SNAPSHOT_MAX_AGE > 0:
+        age = catalog_snapshots.age()
+        if snapshot is None or age is None or age > CATALOG_SNAPSHOT_MAX_AGE:
+            catalog_snapshots.rebuild_async(db_pool, log=log.error)
+    return snapshot
+
+def invalidate_song(song_id, artist_id=None):
+    """Evict cached catalog responses affected by a change to a song"""
+    tags = ['songs', f'song:{song_id}']
+    if artist_id is not None:
+        tags.append(f'artist:{artist_id}')
+    catalog_cache.invalidate(*tags)
+    request_flights.forget(*tags)
+    invalidate_catalog_snapshot()
+
+def invalidate_artist(artist_id):
+    """Evict cached catalog responses affected by a change to an artist"""
+    # Artist names are denormalised into song listings and song details
+    catalog_cache.invalidate('artists', f'artist:{artist_id}')
+    request_flights.forget('artists', f'artist:{artist_id}')
+    invalidate_catalog_snapshot()
+
+def invalidate_catalog_snapshot():
+    """Read the catalog from MySQL until a snapshot with the change is mapped"""
+    if catalog_snapshots is not None:
+        catalog_snapshots.mark_stale()
+        catalog_snapshots.rebuild_async(db_pool, log=log.error)
 
 # ============================================================================
 # MUSIC PLAYER APPLICATION - BACKEND ROUTES
@@ -62,78 +405,254 @@ def index():
         "endpoints": ["/api/songs", "/api/users", "/api/playlists"]
     })
 
+# Connection pool statistics for monitoring
+@app.route('/api/health/db', methods=['GET'])
+def db_pool_stats():
+    return jsonify({
+        'pool': db_pool.stats(),
+        'prepared_pool': prepared_statements.stats() if prepared_statements is not None else None
+    })
+
+# Prometheus metrics: route latency, SQL statement timing, pool and cache gauges
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    lines = instrumentation.registry.render()
+    lines += instrumentation.render_gauges('music_db_pool', db_pool.stats())
+    if prepared_statements is not None:
+        lines += instrumentation.render_gauges('music_db_prepared_pool', prepared_statements.stats())
+    lines += instrumentation.render_gauges('music_catalog_cache', catalog_cache.stats())
+    if favorites_buffer is not None:
+        lines += instrumentation.render_gauges('music_favorites_buffer', favorites_buffer.stats())
+    if db_router.enabled:
+        lines += instrumentation.render_gauges('music_db_router', db_router.stats())
+    if catalog_snapshots is not None:
+        lines += instrumentation.render_gauges('music_catalog_snapshot', catalog_snapshots.stats())
+    lines += instrumentation.render_gauges('music_cors_origins', origin_policy.stats())
+    if response_compression is not None:
+        lines += instrumentation.render_gauges('music_compression', response_compression.stats())
+    lines += instrumentation.render_gauges('music_single_flight', request_flights.stats())
+    if admission.enabled:
+        lines += instrumentation.render_gauges('music_admission', admission.stats())
+    lines += instrumentation.render_gauges('music_play_buffer', play_buffer.stats())
+    lines += instrumentation.render_gauges('music_play_counts', play_counts.stats())
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+# Replica routing and lag for monitoring
+@app.route('/api/health/replicas', methods=['GET'])
+def replica_stats():
+    return jsonify({'replicas': db_router.stats() if db_router.enabled else None})
+
+# Request coalescing and admission control statistics for monitoring
+@app.route('/api/health/admission', methods=['GET'])
+def admission_stats():
+    return jsonify({
+        'admission': admission.stats() if admission.enabled else None,
+        'single_flight': request_flights.stats()
+    })
+
+# Catalog cache statistics for monitoring
+@app.route('/api/health/cache', methods=['GET'])
+def catalog_cache_stats():
+    return jsonify({'cache': catalog_cache.stats()})
+
+# Catalog snapshot statistics for monitoring
+@app.route('/api/health/catalog-snapshot', methods=['GET'])
+def catalog_snapshot_stats():
+    return jsonify({'catalog_snapshot': catalog_snapshots.stats() if catalog_snapshots else None})
+
+# Favorites write-behind buffer statistics for monitoring
+@app.route('/api/health/favorites', methods=['GET'])
+def favorites_buffer_stats():
+    if favorites_buffer is None:
+        return jsonify({'write_behind': False})
+    return jsonify({'write_behind': True, 'buffer': favorites_buffer.stats()})
+
+# ============================================================================
+# BACKGROUND JOBS
+# ============================================================================
+
+# Seconds between in-worker profile counter reconcile runs. Off by default:
+# schedule `flask reconcile-profile-stats` (cron) instead. Either way a MySQL
+# named lock keeps two reconciles from ever running at once
+PROFILE_STATS_RECONCILE_INTERVAL = float(os.getenv('PROFILE_STATS_RECONCILE_INTERVAL', 0))
+
+background_jobs_lock = threading.Lock()
+background_jobs_pid = None
+
+@app.before_request
+def start_background_jobs():
+    """Start per-process background threads on the first request of a worker"""
+    global background_jobs_pid
+    if background_jobs_pid == os.getpid():
+        return
+    with background_jobs_lock:
+        if background_jobs_pid == os.getpid():
+            return
+        background_jobs_pid = os.getpid()
+        instrumentation.start_log_listener()
+        if PROFILE_STATS_RECONCILE_INTERVAL > 0:
+            profile_stats.start_reconciler(db_pool, PROFILE_STATS_RECONCILE_INTERVAL, log=log.warning)
+        if favorites_buffer is not None:
+            favorites_buffer.start()
+            atexit.register(favorites_buffer.close)
+        if db_router.enabled:
+            db_router.start()
+        if catalog_snapshots is not None:
+            catalog_snapshot()
+        if RECOMMENDER_AVAILABLE and RECOMMENDER_RELOAD_INTERVAL > 0:
+            start_recommender_reloader()
+        play_buffer.start()
+        atexit.register(play_buffer.close)
+        if PLAY_COUNTS_POLL_INTERVAL > 0:
+            play_counts.start()
+
+@app.cli.command('reconcile-profile-stats')
+def reconcile_profile_stats_command():
+    """Repair maintained profile counters that drifted from the source tables"""
+    with db_pool.connection() as conn:
+        fixed = profile_stats.reconcile(conn)
+    if fixed is None:
+        raise click.ClickException('Another reconcile is already running')
+    print(f"✅ Profile stats reconciled: {fixed}")
+
+@app.cli.command('rebalance-playlists')
+@click.option('--min-gap', default=2, show_default=True,
+              help='Respace playlists with neighbouring keys closer than this')
+def rebalance_playlists_command(min_gap):
+    """Respace crowded playlist order keys ahead of time (off-peak)"""
+    with db_pool.connection() as conn:
+        written = playlist_order.rebalance_crowded(conn, min_gap)
+    print(f"✅ Rebalanced {len(written)} playlists ({sum(written.values())} rows)")
+
+@app.cli.command('build-catalog-snapshot')
+def build_catalog_snapshot_command():
+    """Write the catalog snapshot the workers map (replaces it atomically)"""
+    if not CATALOG_SNAPSHOT_PATH:
+        raise click.ClickException('CATALOG_SNAPSHOT_PATH is empty')
+    with db_pool.connection() as conn:
+        written = build_catalog_snapshot(conn, CATALOG_SNAPSHOT_PATH)
+    print(f"✅ Catalog snapshot written to {CATALOG_SNAPSHOT_PATH}: {written}")
+
+@app.cli.command('build-recommendations')
+def build_recommendations_command():
+    """Rebuild the song recommendation model (run off-peak, e.g. nightly)"""
+    if not RECOMMENDER_AVAILABLE:
+        raise click.ClickException('numpy and scipy are required (pip install numpy scipy)')
+    started = time.perf_counter()
+    with db_pool.connection() as conn:
+        model = recommender.build(conn)
+    print(f"✅ Recommendations built in {time.perf_counter() - started:.1f}s: {model.stats()}")
+
 # ============================================================================
 # FAVORITES ROUTES
 # ============================================================================
 
+# Favorite taps are the highest-volume write; FAVORITES_WRITE_BEHIND=1 buffers
+# them in memory and writes them to Favorite_Songs in batches. The buffer is
+# per worker: with several workers a tap can take up to
+# FAVORITES_FLUSH_INTERVAL to show in a read another worker serves, so keep
+# it off (or the interval short) where that matters
+FAVORITES_WRITE_BEHIND = os.getenv('FAVORITES_WRITE_BEHIND', '0').lower() in ('1', 'true', 'yes')
+
+favorites_buffer = FavoritesBuffer(
+    db_pool,
+    flush_interval=float(os.getenv('FAVORITES_FLUSH_INTERVAL', 1.0)),
+    flush_size=int(os.getenv('FAVORITES_FLUSH_SIZE', 500)),
+    log=log.error
+) if FAVORITES_WRITE_BEHIND else None
+
 # Toggle favorite song
+# Optional: "favorite": true|false sets the state instead of flipping it
 @app.route('/api/favorites/song/toggle', methods=['POST'])
 def toggle_favorite_song():
     try:
         data = request.json
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
         user_id = data.get('user_id')
         song_id = data.get('song_id')
         
-        print(f"🌟 Toggle favorite - User: {user_id}, Song: {song_id}")
-        
-        cursor = get_db().cursor()
-        
-        # Check if already favorited
-        cursor.execute("""
-            SELECT COUNT(*) as count
-            FROM Favorite_Songs
-            WHERE user_id = %s AND song_id = %s
-        """, (user_id, song_id))
-        
-        result = cursor.fetchone()
-        is_favorited = result['count'] > 0
+        log.info("🌟 Toggle favorite - User: %s, Song: %s", user_id, song_id)
+        
+        for name, value in (('user_id', user_id), ('song_id', song_id)):
+            if not isinstance(value, int) or isinstance(value, bool) or not 0 < value <= MAX_INT:
+                return jsonify({'error': f'{name} must be a positive integer'}), 400
+        favorite = data.get('favorite')
+        if favorite is not None and not isinstance(favorite, bool):
+            return jsonify({'error': 'favorite must be true or false'}), 400
+        
+        if favorites_buffer is not None:
+            # Write-behind: recorded in memory, flushed in batches
+            def load_state():
+                cursor = get_db().cursor()
+                try:
+                    return is_favorite(cursor, user_id, song_id)
+                finally:
+                    cursor.close()
+            if favorite is not None:
+                changed = favorites_buffer.set(user_id, song_id, favorite, load_state)
+                is_favorited = favorite
+            else:
+                changed = True
+                is_favorited = favorites_buffer.toggle(user_id, song_id, load_state)
+            if changed and RECOMMENDER_AVAILABLE:
+                recommender.record_favorite(user_id, song_id, is_favorited)
+        else:
+            cursor = get_db().cursor()
+            
+            # Keyed writes only (no SELECT first), so double taps cannot race
+            try:
+                if favorite is not None:
+                    changed = set_favorite(cursor, user_id, song_id, favorite)
+                    is_favorited = favorite
+                else:
+                    changed = True
+                    is_favorited = toggle_favorite(cursor, user_id, song_id)
+            except pymysql.err.IntegrityError:
+                # Foreign key: no such user or song
+                cursor.close()
+                get_db().rollback()
+                return jsonify({'error': 'User or song not found'}), 404
+            
+            get_db().commit()
+            cursor.close()
+            
+            if changed and RECOMMENDER_AVAILABLE:
+                recommender.record_favorite(user_id, song_id, is_favorited)
         
         if is_favorited:
-            # Remove from favorites
-            cursor.execute("""
-                DELETE FROM Favorite_Songs
-                WHERE user_id = %s AND song_id = %s
-            """, (user_id, song_id))
-            action = 'removed'
-            print(f"❌ Removed song {song_id} from favorites")
-        else:
-            # Add to favorites
-            cursor.execute("""
-                INSERT INTO Favorite_Songs (user_id, song_id, favorited_at)
-                VALUES (%s, %s, NOW())
-            """, (user_id, song_id))
             action = 'added'
-            print(f"✅ Added song {song_id} to favorites")
-        
-        get_db().commit()
-        cursor.close()
+            log.info("✅ Added song %s to favorites", song_id)
+        else:
+            action = 'removed'
+            log.info("❌ Removed song %s from favorites", song_id)
         
         return jsonify({
             'success': True,
             'action': action,
-            'is_favorited': not is_favorited
+            'is_favorited': is_favorited
         })
         
     except Exception as e:
-        print(f"❌ Error toggling favorite: {e}")
+        log.exception("❌ Error toggling favorite: %s", e)
         return jsonify({'error': str(e)}), 500
 
 # Get favorite songs for user
 @app.route('/api/favorites/songs/<int:user_id>', methods=['GET'])
 def get_favorite_songs(user_id):
     try:
-        print(f"📋 Fetching favorite songs for user {user_id}")
+        log.debug("📋 Fetching favorite songs for user %s", user_id)
+        if favorites_buffer is not None:
+            # Land this user's taps buffered in this worker first, and read
+            # them back from the primary the replicas may not have yet. Taps
+            # buffered by other workers show after their next flush
+            if favorites_buffer.flush(user_id):
+                use_primary()
         cursor = get_db().cursor()
         
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT 
-                S.song_id,
-                S.title,
-                A.name as artist,
-                
-                CONCAT(FLOOR(S.duration / 60), ':', LPAD(S.duration % 60, 2, '0')) as duration,
-                
-                FS.favorited_at
+                {FAVORITE_SONG_ROW.sql}
             FROM Favorite_Songs FS
             INNER JOIN Songs S ON FS.song_id = S.song_id
             INNER JOIN Artists A ON S.artist_id = A.artist_id
@@ -141,130 +660,432 @@ def get_favorite_songs(user_id):
             ORDER BY FS.favorited_at DESC
         """, (user_id,))
         
-        favorites = cursor.fetchall()
+        favorites = FAVORITE_SONG_ROW.shape(cursor.fetchall())
         cursor.close()
         
-        print(f"✅ Found {len(favorites)} favorite songs")
+        log.debug("✅ Found %s favorite songs", len(favorites))
         
         return jsonify({'favorites': favorites})
         
     except Exception as e:
-        print(f"❌ Error fetching favorites: {e}")
+        log.exception("❌ Error fetching favorites: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+# ============================================================================
+# PLAY EVENT ROUTES
+# ============================================================================
+
+# Plays are buffered in a bounded ring and written to Plays in batches
+# (plays.py); every worker tails Plays into rolling per-song counters that
+# serve play counts and trending without querying the events
+PLAYS_MAX_BATCH = int(os.getenv('PLAYS_MAX_BATCH', 500))
+PLAY_COUNTS_POLL_INTERVAL = float(os.getenv('PLAY_COUNTS_POLL_INTERVAL', 2.0))
+TRENDING_MAX_RESULTS = 100
+
+play_buffer = PlayBuffer(
+    db_pool,
+    capacity=int(os.getenv('PLAYS_BUFFER_CAPACITY', 100000)),
+    flush_interval=float(os.getenv('PLAYS_FLUSH_INTERVAL', 1.0)),
+    flush_size=int(os.getenv('PLAYS_FLUSH_SIZE', 1000)),
+    log=log.error
+)
+play_counts = PlayCounts(
+    db_pool,
+    poll_interval=PLAY_COUNTS_POLL_INTERVAL,
+    trending_ttl=float(os.getenv('TRENDING_CACHE_SECONDS', 5)),
+    log=log.error
+)
+
+def parse_play(event, now):
+    """(user_id, song_id, played_at, seconds_played) from one event object"""
+    song_id = event.get('song_id')
+    user_id = event.get('user_id')
+    seconds_played = event.get('seconds_played')
+    # Anything outside the INT columns would fail the whole batch insert
+    if not isinstance(song_id, int) or isinstance(song_id, bool) or not 0 < song_id <= MAX_INT:
+        raise ValueError(f'Invalid song_id {song_id!r}')
+    if user_id is not None and (not isinstance(user_id, int) or isinstance(user_id, bool)
+                                or not 0 < user_id <= MAX_INT):
+        raise ValueError(f'Invalid user_id {user_id!r}')
+    if seconds_played is not None and (not isinstance(seconds_played, (int, float))
+                                       or isinstance(seconds_played, bool)
+                                       or not 0 <= seconds_played <= MAX_INT):
+        raise ValueError(f'Invalid seconds_played {seconds_played!r}')
+    
+    played_at = event.get('played_at')
+    if played_at is None:
+        played_at = now
+    elif isinstance(played_at, (int, float)) and not isinstance(played_at, bool):
+        if not math.isfinite(played_at):
+            raise ValueError(f'Invalid played_at {played_at!r}')
+        # Epoch seconds, or milliseconds as sent by Date.now()
+        played_at = played_at / 1000 if played_at > 1e11 else float(played_at)
+    elif isinstance(played_at, str):
+        try:
+            parsed = datetime.fromisoformat(played_at.replace('Z', '+00:00'))
+        except ValueError:
+            raise ValueError(f'Invalid played_at {played_at!r}')
+        played_at = (parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)).timestamp()
+    else:
+        raise ValueError(f'Invalid played_at {played_at!r}')
+    # Client clocks run ahead; a play cannot start in the future (nor before
+    # the TIMESTAMP range, which FROM_UNIXTIME would turn into NULL)
+    played_at = max(min(played_at, now), MIN_TIMESTAMP)
+    
+    return user_id, song_id, played_at, round(seconds_played) if seconds_played is not None else None
+
+# Record one or more song plays
+# Body: {"user_id", "song_id", "played_at"?, "seconds_played"?} or
+#       {"plays": [{...}, ...]} for a batch (played_at: epoch seconds/ms or ISO 8601)
+@app.route('/api/plays', methods=['POST'])
+def record_plays():
+    try:
+        data = request.json or {}
+        events = data.get('plays') if isinstance(data, dict) and 'plays' in data else [data]
+        
+        if not isinstance(events, list) or not events:
+            return jsonify({'error': 'Expected a play or a non-empty "plays" list'}), 400
+        if len(events) > PLAYS_MAX_BATCH:
+            return jsonify({'error': f'At most {PLAYS_MAX_BATCH} plays per request'}), 400
+        
+        now = time.time()
+        try:
+            plays = [parse_play(event, now) for event in events]
+        except (AttributeError, ValueError) as e:
+            return jsonify({'error': str(e) if isinstance(e, ValueError) else 'Each play must be an object'}), 400
+        
+        play_buffer.append(plays)
+        log.debug("🎧 Queued %s plays", len(plays))
+        
+        return jsonify({'success': True, 'accepted': len(plays)}), 202
+        
+    except Exception as e:
+        log.exception("❌ Error recording plays: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+def ensure_play_counts():
+    """Load the counters on first use (the background poller keeps them current)"""
+    if not play_counts.loaded:
+        play_counts.poll()
+
+# Most played songs in the last hour, day or week
+# Optional: ?window=hour|day|week (default day)&limit=<n>
+@app.route('/api/trending', methods=['GET'])
+def get_trending():
+    try:
+        window = request.args.get('window', 'day')
+        limit = min(request.args.get('limit', 20, type=int), TRENDING_MAX_RESULTS)
+        
+        if window not in PLAY_WINDOWS:
+            return jsonify({'error': f"window must be one of {', '.join(PLAY_WINDOWS)}"}), 400
+        
+        ensure_play_counts()
+        top = play_counts.trending(window, limit)
+        if not top:
+            return jsonify({'window': window, 'songs': []})
+        
+        song_ids = [song_id for song_id, _ in top]
+        placeholders = ', '.join(['%s'] * len(song_ids))
+        cursor = get_db().cursor()
+        cursor.execute(f"""
+            SELECT 
+                {SONG_ROW.sql}
+            FROM Songs S
+            INNER JOIN Artists A ON S.artist_id = A.artist_id
+            WHERE S.song_id IN ({placeholders})
+        """, song_ids)
+        songs = {row['song_id']: row for row in SONG_ROW.shape(cursor.fetchall())}
+        cursor.close()
+        
+        return jsonify({
+            'window': window,
+            'songs': [dict(songs[song_id], plays=plays) for song_id, plays in top if song_id in songs]
+        })
+        
+    except Exception as e:
+        log.exception("❌ Error fetching trending songs: %s", e)
         return jsonify({'error': str(e)}), 500
 
+# Live play counts of one song over the last hour, day and week
+@app.route('/api/song/<int:song_id>/plays', methods=['GET'])
+def get_song_plays(song_id):
+    try:
+        ensure_play_counts()
+        return jsonify({'song_id': song_id, 'plays': play_counts.counts(song_id)})
+        
+    except Exception as e:
+        log.exception("❌ Error fetching play counts: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+# Play buffer and counter statistics for monitoring
+@app.route('/api/health/plays', methods=['GET'])
+def play_stats():
+    return jsonify({'buffer': play_buffer.stats(), 'counts': play_counts.stats()})
+
 # ============================================================================
 # ARTISTS ROUTES
 # ============================================================================
 
 # Get all artists
 @app.route('/api/artists', methods=['GET'])
+@cached(catalog_cache, 'artists')
 def get_artists():
     try:
-        print("📋 Fetching all artists")
-        cursor = get_db().cursor()
-        
-        cursor.execute("""
-            SELECT * FROM Artists
-            ORDER BY name ASC
-        """)
-        
-        artists = cursor.fetchall()
-        cursor.close()
+        log.debug("📋 Fetching all artists")
+        snapshot = catalog_snapshot()
+        if snapshot is not None:
+            artists = snapshot.artists()
+        else:
+            cursor = get_db().cursor()
+            
+            cursor.execute(f"""
+                SELECT 
+                    {ARTIST_ROW.sql}
+                FROM Artists
+                ORDER BY name ASC
+            """)
+            
+            artists = cursor.fetchall()
+            cursor.close()
         
-        print(f"✅ Found {len(artists)} artists")
+        log.debug("✅ Found %s artists", len(artists))
         
         return jsonify({'artists': artists})
         
     except Exception as e:
-        print(f"❌ Error fetching artists: {e}")
+        log.exception("❌ Error fetching artists: %s", e)
         return jsonify({'error': str(e)}), 500
 
 # Get artist details and their songs
 @app.route('/api/artist/<int:artist_id>', methods=['GET'])
+@cached(catalog_cache, 'artists', 'artist:{artist_id}')
+@coalesced(request_flights, 'artists', 'artist:{artist_id}', vary=reads_from_replica)
 def get_artist_details(artist_id):
     try:
-        print(f"📋 Fetching details for artist {artist_id}")
+        log.debug("📋 Fetching details for artist %s", artist_id)
         cursor = get_db().cursor()
         
         # Get artist info
-        cursor.execute("""
-            SELECT * FROM Artists
+        cursor.execute(f"""
+            SELECT 
+                {ARTIST_ROW.sql}
+            FROM Artists
             WHERE artist_id = %s
         """, (artist_id,))
         
         artist = cursor.fetchone()
         
         # Get artist's songs
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT 
-                S.song_id,
-                S.title,
-                
-                CONCAT(FLOOR(S.duration / 60), ':', LPAD(S.duration % 60, 2, '0')) as duration,
-                S.release_year
+                {ARTIST_SONG_ROW.sql}
             FROM Songs S
             WHERE S.artist_id = %s
             ORDER BY S.title ASC
         """, (artist_id,))
         
-        songs = cursor.fetchall()
+        songs = ARTIST_SONG_ROW.shape(cursor.fetchall())
         cursor.close()
         
         if artist:
             artist['songs'] = songs
-            print(f"✅ Found artist: {artist['name']} with {len(songs)} songs")
+            log.debug("✅ Found artist: %s with %s songs", artist['name'], len(songs))
             return jsonify({'artist': artist})
         else:
-            print("❌ Artist not found")
+            log.debug("❌ Artist not found")
             return jsonify({'error': 'Artist not found'}), 404
         
     except Exception as e:
-        print(f"❌ Error fetching artist details: {e}")
+        log.exception("❌ Error fetching artist details: %s", e)
         return jsonify({'error': str(e)}), 500
 
 # ============================================================================
 # SONGS ROUTES
 # ============================================================================
 
+# Page size limits for keyset-paginated song listing
+SONGS_PAGE_MAX = 500
+SONGS_STREAM_BATCH = 200
+
+def songs_query(after=None, limit=None):
+    """
+    Build the song listing query.
+    Rows are ordered by (title, song_id) so the listing can be resumed from a
+    keyset cursor; idx_title_listing leads with (title, song_id) and then holds
+    every other selected Songs column, so the WHERE + ORDER BY walk the index
+    in order and the select list needs no row lookups.
+    """
+    sql = f"""
+            SELECT 
+                {SONG_ROW.sql}
+            FROM Songs S
+            INNER JOIN Artists A ON S.artist_id = A.artist_id
+    """
+    params = []
+    if after is not None:
+        sql += """
+            WHERE (S.title > %s OR (S.title = %s AND S.song_id > %s))
+        """
+        params += [after[0], after[0], after[1]]
+    sql += """
+            ORDER BY S.title ASC, S.song_id ASC
+    """
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
+    return sql, params
+
+def parse_songs_cursor(value):
+    """Parse an `after=<title>,<song_id>` cursor (the title may contain commas)"""
+    title, sep, song_id = value.rpartition(',')
+    if not sep or not song_id.isdigit():
+        raise ValueError('Invalid cursor, expected after=<title>,<song_id>')
+    return title, int(song_id)
+
+def stream_songs(fmt, after):
+    """Stream the song listing straight off an unbuffered server-side cursor"""
+    cursor = get_db().cursor(pymysql.cursors.SSDictCursor)
+    sql, params = songs_query(after)
+    cursor.execute(sql, params)
+
+    def generate():
+        count = 0
+        try:
+            if fmt == 'json':
+                yield '{"songs": ['
+            while True:
+                rows = SONG_ROW.shape(cursor.fetchmany(SONGS_STREAM_BATCH))
+                if not rows:
+                    break
+                if fmt == 'ndjson':
+                    yield ''.join(app.json.dumps(row) + '\n' for row in rows)
+                else:
+                    chunk = ', '.join(app.json.dumps(row) for row in rows)
+                    yield (', ' if count else '') + chunk
+                count += len(rows)
+            if fmt == 'json':
+                yield ']}'
+            log.debug("✅ Streamed %s songs", count)
+        finally:
+            cursor.close()
+
+    mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'application/json'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+SNAPSHOT_SONG_COLUMNS = ['song_id', 'title', 'artist', 'duration', 'release_year']
+
+def snapshot_songs(after=None, limit=None):
+    """
+    (columns, tuple rows) of the song listing from the catalog snapshot, or
+    None when the snapshot cannot answer (none mapped, or the cursor's song
+    is missing or retitled in it)
+    """
+    snapshot = catalog_snapshot()
+    if snapshot is None:
+        return None
+    start = 0
+    if after is not None:
+        row = snapshot.song_row(after[1])
+        if row is None or snapshot.title_at(row) != after[0]:
+            return None
+        start = row + 1
+    stop = start + limit if limit is not None else None
+    return SNAPSHOT_SONG_COLUMNS, snapshot.songs(start, stop)
+
 # Get all songs
+# Optional: ?after=<title>,<song_id>&limit=<n> for keyset pagination,
+#           ?stream=json|ndjson to stream the full catalog without buffering it,
+#           ?shape=columns to return rows as arrays alongside a 'columns' list
 @app.route('/api/songs', methods=['GET'])
+@cached(catalog_cache, 'songs', 'artists')
 def get_songs():
     try:
-        print("📋 Fetching all songs")
-        cursor = get_db().cursor()
-        
-        cursor.execute("""
-            SELECT 
-                S.song_id,
-                S.title,
-                A.name as artist,
-                
-                CONCAT(FLOOR(S.duration / 60), ':', LPAD(S.duration % 60, 2, '0')) as duration,
-                S.release_year
-            FROM Songs S
-            INNER JOIN Artists A ON S.artist_id = A.artist_id
-            ORDER BY S.title ASC
-        """)
-        
-        songs = cursor.fetchall()
-        cursor.close()
+        after = request.args.get('after')
+        limit = request.args.get('limit', type=int)
+        stream = request.args.get('stream')
+        shape = request.args.get('shape', 'objects')
+
+        if after is not None:
+            try:
+                after = parse_songs_cursor(after)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+
+        if stream is not None:
+            if stream not in ('json', 'ndjson'):
+                return jsonify({'error': 'stream must be json or ndjson'}), 400
+            log.debug("📋 Streaming songs")
+            return stream_songs(stream, after)
+
+        if limit is not None and not 1 <= limit <= SONGS_PAGE_MAX:
+            return jsonify({'error': f'limit must be between 1 and {SONGS_PAGE_MAX}'}), 400
+
+        if shape not in ('objects', 'columns'):
+            return jsonify({'error': 'shape must be objects or columns'}), 400
+
+        log.debug("📋 Fetching all songs")
+        # Fetch one extra row to know whether another page follows
+        page = snapshot_songs(after, limit + 1 if limit else None)
+        if page is not None:
+            columns, songs = page
+            if shape == 'objects':
+                songs = [dict(zip(columns, row)) for row in songs]
+        else:
+            # shape=columns fetches plain tuples: no per-row dict is ever built
+            cursor = get_db().cursor(pymysql.cursors.Cursor if shape == 'columns' else None)
+            sql, params = songs_query(after, limit + 1 if limit else None)
+            cursor.execute(sql, params)
+            columns, songs = rows_as_columns(cursor)
+            cursor.close()
+        if shape == 'columns':
+            songs = SONG_ROW.shape_tuples(columns, songs)
+        else:
+            songs = SONG_ROW.shape(songs)
         
-        print(f"✅ Found {len(songs)} songs")
+        log.debug("✅ Found %s songs", len(songs))
         
-        return jsonify({'songs': songs})
+        payload = {'songs': songs}
+        if shape == 'columns':
+            payload['columns'] = columns
+
+        if limit is None and after is None:
+            return jsonify(payload)
+
+        next_after = None
+        if limit is not None and len(songs) > limit:
+            songs = payload['songs'] = songs[:limit]
+            last = songs[-1]
+            if shape == 'columns':
+                last = dict(zip(columns, last))
+            next_after = f"{last['title']},{last['song_id']}"
+
+        payload['next_after'] = next_after
+        return jsonify(payload)
         
     except Exception as e:
-        print(f"❌ Error fetching songs: {e}")
+        log.exception("❌ Error fetching songs: %s", e)
         return jsonify({'error': str(e)}), 500
 
+def song_version(song_id):
+    """Row versions of a song and its artist (whose name it shows) for ETag / Last-Modified"""
+    row = fetch_hot_row("""
+        SELECT S.artist_id, S.version, S.updated_at, A.version AS artist_version
+        FROM Songs S
+        INNER JOIN Artists A ON S.artist_id = A.artist_id
+        WHERE S.song_id = %s
+    """, (song_id,))
+    if not row:
+        return None
+    return (song_id, row['version'], row['artist_id'], row['artist_version']), row['updated_at']
+
 # Get song details
 @app.route('/api/song/<int:song_id>', methods=['GET'])
+@conditional(song_version)
+@cached(catalog_cache, 'artists', 'song:{song_id}')
 def get_song_details(song_id):
     try:
-        print(f"📋 Fetching details for song {song_id}")
-        cursor = get_db().cursor()
-        
-        cursor.execute("""
+        log.debug("📋 Fetching details for song %s", song_id)
+        song = fetch_hot_row("""
             SELECT 
                 S.song_id,
                 S.title,
@@ -278,18 +1099,131 @@ def get_song_details(song_id):
             WHERE S.song_id = %s
         """, (song_id,))
         
-        song = cursor.fetchone()
-        cursor.close()
-        
         if song:
-            print(f"✅ Found song: {song['title']}")
+            log.debug("✅ Found song: %s", song['title'])
             return jsonify({'song': song})
         else:
-            print("❌ Song not found")
+            log.debug("❌ Song not found")
             return jsonify({'error': 'Song not found'}), 404
         
     except Exception as e:
-        print(f"❌ Error fetching song details: {e}")
+        log.exception("❌ Error fetching song details: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+# ============================================================================
+# CATALOG INGEST ROUTES
+# ============================================================================
+
+# Bulk CSV / JSONL catalog feeds (catalog_ingest.py): records committed per
+# transaction, and the largest feed POST /api/catalog/ingest accepts (larger
+# feeds go through `flask ingest-catalog`)
+CATALOG_INGEST_CHUNK_SIZE = int(os.getenv('CATALOG_INGEST_CHUNK_SIZE', 10000))
+CATALOG_INGEST_MAX_BYTES = int(os.getenv('CATALOG_INGEST_MAX_BYTES', 256 * 1024 * 1024))
+
+@contextmanager
+def ingest_connection(method):
+    """Pooled connection, or a dedicated one with local_infile for LOAD DATA"""
+    if method != 'load-data':
+        with db_pool.connection() as conn:
+            yield conn
+        return
+    conn = InstrumentedConnection(**DB_CONFIG, local_infile=True)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+def ingest_catalog(conn, records, chunk_size=None, restart=False, **options):
+    """Load feed records, then drop everything that cached the old catalog"""
+    ingester = CatalogIngester(conn, chunk_size=chunk_size or CATALOG_INGEST_CHUNK_SIZE, **options)
+    if restart and ingester.source:
+        ingester.reset_checkpoint()
+    try:
+        return ingester.run(records)
+    finally:
+        # Chunks committed before a failure are in the catalog too
+        if ingester.stats['songs']:
+            catalog_cache.invalidate('songs', 'artists')
+            request_flights.forget('songs', 'artists')
+            invalidate_catalog_snapshot()
+            expire_search_indexes()
+
+@app.cli.command('ingest-catalog')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']),
+              help='Feed format (default: from the file extension)')
+@click.option('--source', help='Checkpoint name; rerunning the same source resumes (default: file name)')
+@click.option('--method', type=click.Choice(['insert', 'load-data']), default='insert', show_default=True,
+              help='Multi-row INSERTs, or LOAD DATA LOCAL INFILE (needs local_infile on the server)')
+@click.option('--chunk-size', type=int, help='Records per transaction [CATALOG_INGEST_CHUNK_SIZE]')
+@click.option('--restart', is_flag=True, help='Ignore the saved checkpoint and load the feed from the start')
+@click.option('--strict', is_flag=True, help='Stop at the first invalid record instead of skipping it')
+def ingest_catalog_command(path, fmt, source, method, chunk_size, restart, strict):
+    """Stream a CSV or JSONL catalog feed into Artists and Songs"""
+    def progress(stats):
+        rate = stats['records'] / max(time.monotonic() - started, 1e-9)
+        print(f"\r📥 {stats['skipped'] + stats['records']:,} records, {stats['songs']:,} songs, "
+              f"{stats['artists_created']:,} new artists, {stats['rejected']:,} rejected "
+              f"({rate * 60:,.0f} records/min)", end='', flush=True)
+
+    started = time.monotonic()
+    with open(path, encoding='utf-8-sig', newline='') as f, ingest_connection(method) as conn:
+        try:
+            stats = ingest_catalog(conn, read_records(f, fmt or feed_format(path)),
+                                   chunk_size=chunk_size, restart=restart,
+                                   source=source or os.path.basename(path),
+                                   method=method, skip_invalid=not strict, progress=progress)
+        except IngestError as e:
+            raise click.ClickException(f"{e} (earlier chunks are committed; rerun to resume)")
+    print()
+    for error in stats['errors']:
+        print(f"⚠️ {error}")
+    if stats['skipped']:
+        print(f"⏩ Resumed after {stats['skipped']:,} records already loaded")
+    if stats['songs'] and catalog_snapshots is not None:
+        catalog_snapshots.rebuild(db_pool)
+    print(f"✅ Ingested {stats['songs']:,} songs in {stats['seconds']:.1f}s")
+
+# Stream a catalog feed into Artists and Songs
+# Body: CSV (text/csv) or JSON lines (application/x-ndjson), one song per
+# record: title, artist, duration (seconds or m:ss), genre, release_year, bio
+# Optional: ?source=<name> to checkpoint progress (resending the same source
+# resumes after the last committed chunk), ?restart=1, ?strict=1, ?method=load-data
+@app.route('/api/catalog/ingest', methods=['POST'])
+def ingest_catalog_feed():
+    try:
+        fmt = request.args.get('format') or (
+            'jsonl' if 'json' in (request.mimetype or '') else 'csv')
+        method = request.args.get('method', 'insert')
+        if fmt not in ('csv', 'jsonl'):
+            return jsonify({'error': 'format must be csv or jsonl'}), 400
+        if method not in ('insert', 'load-data'):
+            return jsonify({'error': 'method must be insert or load-data'}), 400
+        if request.content_length and request.content_length > CATALOG_INGEST_MAX_BYTES:
+            return jsonify({'error': f'Feed larger than {CATALOG_INGEST_MAX_BYTES} bytes; '
+                                     'use flask ingest-catalog'}), 413
+
+        source = request.args.get('source') or None
+        log.info("📥 Ingesting %s catalog feed (source %s)", fmt, source)
+
+        # Records are parsed as the body arrives; only one chunk is held in memory
+        with ingest_connection(method) as conn:
+            try:
+                stats = ingest_catalog(
+                    conn, read_records(text_stream(request.stream), fmt),
+                    restart=request.args.get('restart') in ('1', 'true', 'yes'),
+                    source=source,
+                    method=method,
+                    skip_invalid=request.args.get('strict') not in ('1', 'true', 'yes'))
+            except IngestError as e:
+                return jsonify({'error': str(e)}), 400
+
+        log.info("✅ Ingested %s songs (%s rejected) in %ss", stats['songs'], stats['rejected'], stats['seconds'])
+
+        return jsonify({'success': True, **stats})
+
+    except Exception as e:
+        log.exception("❌ Error ingesting catalog feed: %s", e)
         return jsonify({'error': str(e)}), 500
 
 # ============================================================================
@@ -300,11 +1234,13 @@ def get_song_details(song_id):
 @app.route('/api/playlists/<int:user_id>', methods=['GET'])
 def get_playlists(user_id):
     try:
-        print(f"📋 Fetching playlists for user {user_id}")
+        log.debug("📋 Fetching playlists for user %s", user_id)
         cursor = get_db().cursor()
         
-        cursor.execute("""
-            SELECT * FROM Playlists
+        cursor.execute(f"""
+            SELECT 
+                {PLAYLIST_ROW.sql}
+            FROM Playlists
             WHERE user_id = %s
             ORDER BY created_at DESC
         """, (user_id,))
@@ -312,58 +1248,104 @@ def get_playlists(user_id):
         playlists = cursor.fetchall()
         cursor.close()
         
-        print(f"✅ Found {len(playlists)} playlists")
+        log.debug("✅ Found %s playlists", len(playlists))
         
         return jsonify({'playlists': playlists})
         
     except Exception as e:
-        print(f"❌ Error fetching playlists: {e}")
+        log.exception("❌ Error fetching playlists: %s", e)
         return jsonify({'error': str(e)}), 500
 
+def playlist_changed(playlist_id):
+    """After a write commits, make new reads of the playlist start afresh"""
+    request_flights.forget(f'playlist:{playlist_id}')
+
+def touch_playlist(cursor, playlist_id):
+    """Bump Playlists.version / updated_at so validators change when its songs change"""
+    cursor.execute("""
+        UPDATE Playlists
+        SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+        WHERE playlist_id = %s
+    """, (playlist_id,))
+
+def lock_playlist(cursor, playlist_id):
+    """
+    user_id owning a playlist, or None, holding the playlist row lock until
+    the transaction ends. Take it before reading or writing track_order keys
+    so concurrent writers to one playlist apply one after another.
+    """
+    cursor.execute("""
+        SELECT user_id FROM Playlists
+        WHERE playlist_id = %s
+        FOR UPDATE
+    """, (playlist_id,))
+    row = cursor.fetchone()
+    return row['user_id'] if row else None
+
+def playlist_version(playlist_id):
+    """Row version of a playlist and its song list for ETag / Last-Modified"""
+    # Concurrent requests for one playlist share a single version lookup
+    version, _ = request_flights.do(
+        ('playlist_version', playlist_id, reads_from_replica()),
+        lambda: load_playlist_version(playlist_id),
+        [f'playlist:{playlist_id}'])
+    return version
+
+def load_playlist_version(playlist_id):
+    # Every playlist write bumps version (see touch_playlist); updated_at has
+    # one-second resolution, so it only serves Last-Modified
+    row = fetch_hot_row("""
+        SELECT version, updated_at
+        FROM Playlists
+        WHERE playlist_id = %s
+    """, (playlist_id,))
+    if not row:
+        return None
+    return (playlist_id, row['version']), row['updated_at']
+
 # Get playlist details
 @app.route('/api/playlist/<int:playlist_id>', methods=['GET'])
+@conditional(playlist_version)
+@coalesced(request_flights, 'playlist:{playlist_id}', vary=reads_from_replica)
 def get_playlist_details(playlist_id):
     try:
-        print(f"📋 Fetching details for playlist {playlist_id}")
+        log.debug("📋 Fetching details for playlist %s", playlist_id)
         cursor = get_db().cursor()
         
         # Get playlist info
-        cursor.execute("""
-            SELECT * FROM Playlists
+        cursor.execute(f"""
+            SELECT 
+                {PLAYLIST_ROW.sql}
+            FROM Playlists
             WHERE playlist_id = %s
         """, (playlist_id,))
         
         playlist = cursor.fetchone()
         
         # Get playlist's songs
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT 
-                S.song_id,
-                S.title,
-                A.name as artist,
-                
-                CONCAT(FLOOR(S.duration / 60), ':', LPAD(S.duration % 60, 2, '0')) as duration,
-                S.release_year
+                {SONG_ROW.sql}
             FROM Playlist_Songs PS
             INNER JOIN Songs S ON PS.song_id = S.song_id
             INNER JOIN Artists A ON S.artist_id = A.artist_id
             WHERE PS.playlist_id = %s
-            ORDER BY S.title ASC
+            ORDER BY PS.track_order ASC, PS.playlist_song_id ASC
         """, (playlist_id,))
         
-        songs = cursor.fetchall()
+        songs = SONG_ROW.shape(cursor.fetchall())
         cursor.close()
         
         if playlist:
             playlist['songs'] = songs
-            print(f"✅ Found playlist: {playlist['name']} with {len(songs)} songs")
+            log.debug("✅ Found playlist: %s with %s songs", playlist['name'], len(songs))
             return jsonify({'playlist': playlist})
         else:
-            print("❌ Playlist not found")
+            log.debug("❌ Playlist not found")
             return jsonify({'error': 'Playlist not found'}), 404
         
     except Exception as e:
-        print(f"❌ Error fetching playlist details: {e}")
+        log.exception("❌ Error fetching playlist details: %s", e)
         return jsonify({'error': str(e)}), 500
 
 # Create new playlist
@@ -374,24 +1356,29 @@ def create_playlist():
         user_id = data.get('user_id')
         name = data.get('name')
         
-        print(f"🎵 Creating playlist - User: {user_id}, Name: {name}")
+        log.info("🎵 Creating playlist - User: %s, Name: %s", user_id, name)
         
         cursor = get_db().cursor()
         
+        # The insert's foreign key check share-locks the Users row that the
+        # counter update then needs exclusively; two creates holding S would
+        # deadlock, so take X up front
+        profile_stats.lock_user(cursor, user_id)
         cursor.execute("""
             INSERT INTO Playlists (user_id, name, created_at)
             VALUES (%s, %s, NOW())
         """, (user_id, name))
+        profile_stats.playlist_created(cursor, user_id)
         
         get_db().commit()
         cursor.close()
         
-        print("✅ Playlist created successfully")
+        log.info("✅ Playlist created successfully")
         
         return jsonify({'success': True})
         
     except Exception as e:
-        print(f"❌ Error creating playlist: {e}")
+        log.exception("❌ Error creating playlist: %s", e)
         return jsonify({'error': str(e)}), 500
 
 # Add song to playlist
@@ -402,24 +1389,39 @@ def add_song_to_playlist():
         playlist_id = data.get('playlist_id')
         song_id = data.get('song_id')
         
-        print(f"🎶 Adding song to playlist - Playlist: {playlist_id}, Song: {song_id}")
+        log.info("🎶 Adding song to playlist - Playlist: %s, Song: %s", playlist_id, song_id)
         
-        cursor = get_db().cursor()
+        db = get_db()
+        cursor = db.cursor()
+        
+        # Two appends must not both read the same last key, and an inline
+        # respace must not run under a concurrent move. Locking up front also
+        # avoids a deadlock: the insert's foreign key check share-locks this
+        # row, which song_count and version then update
+        user_id = lock_playlist(cursor, playlist_id)
+        if user_id is None:
+            cursor.close()
+            db.rollback()
+            return jsonify({'error': 'Playlist not found'}), 404
         
+        # Append at the end of the playlist, GAP past the last key
         cursor.execute("""
-            INSERT INTO Playlist_Songs (playlist_id, song_id)
-            VALUES (%s, %s)
-        """, (playlist_id, song_id))
+            INSERT INTO Playlist_Songs (playlist_id, song_id, track_order)
+            VALUES (%s, %s, %s)
+        """, (playlist_id, song_id, playlist_order.append_key(cursor, playlist_id)))
+        profile_stats.songs_added(cursor, user_id, playlist_id, [song_id])
+        touch_playlist(cursor, playlist_id)
         
-        get_db().commit()
+        db.commit()
         cursor.close()
+        playlist_changed(playlist_id)
         
-        print("✅ Song added to playlist successfully")
+        log.info("✅ Song added to playlist successfully")
         
         return jsonify({'success': True})
         
     except Exception as e:
-        print(f"❌ Error adding song to playlist: {e}")
+        log.exception("❌ Error adding song to playlist: %s", e)
         return jsonify({'error': str(e)}), 500
 
 # Remove song from playlist
@@ -430,24 +1432,248 @@ def remove_song_from_playlist():
         playlist_id = data.get('playlist_id')
         song_id = data.get('song_id')
         
-        print(f"🗑️ Removing song from playlist - Playlist: {playlist_id}, Song: {song_id}")
+        log.info("🗑️ Removing song from playlist - Playlist: %s, Song: %s", playlist_id, song_id)
         
-        cursor = get_db().cursor()
+        db = get_db()
+        cursor = db.cursor()
         
+        # Lock the playlist before touching its songs, like every playlist
+        # write, so concurrent changes to it queue instead of deadlocking
+        user_id = lock_playlist(cursor, playlist_id)
+        if user_id is None:
+            cursor.close()
+            db.rollback()
+            return jsonify({'error': 'Playlist not found'}), 404
+        
+        # Keys are sparse, so the songs after it keep theirs
         cursor.execute("""
             DELETE FROM Playlist_Songs
             WHERE playlist_id = %s AND song_id = %s
         """, (playlist_id, song_id))
         
-        get_db().commit()
+        if cursor.rowcount:
+            profile_stats.songs_removed(cursor, user_id, playlist_id, [song_id])
+            touch_playlist(cursor, playlist_id)
+        
+        db.commit()
         cursor.close()
+        playlist_changed(playlist_id)
         
-        print("✅ Song removed from playlist successfully")
+        log.info("✅ Song removed from playlist successfully")
         
         return jsonify({'success': True})
         
     except Exception as e:
-        print(f"❌ Error removing song from playlist: {e}")
+        log.exception("❌ Error removing song from playlist: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+# Move one song (drag and drop): after another song, or to a 0-based position
+@app.route('/api/playlist/song/move', methods=['POST'])
+def move_song_in_playlist():
+    try:
+        data = request.json or {}
+        playlist_id = data.get('playlist_id')
+        song_id = data.get('song_id')
+        position = data.get('position')
+        after_song_id = data.get('after_song_id')
+        
+        if not isinstance(song_id, int):
+            return jsonify({'error': 'song_id must be an integer'}), 400
+        if position is not None and not isinstance(position, int):
+            return jsonify({'error': 'position must be an integer'}), 400
+        if after_song_id is not None and not isinstance(after_song_id, int):
+            return jsonify({'error': 'after_song_id must be an integer'}), 400
+        
+        log.info("↕️ Moving song in playlist - Playlist: %s, Song: %s", playlist_id, song_id)
+        
+        db = get_db()
+        cursor = db.cursor()
+        
+        # Serialise moves on this playlist; a move may respace its keys
+        cursor.execute("""
+            SELECT playlist_id FROM Playlists
+            WHERE playlist_id = %s
+            FOR UPDATE
+        """, (playlist_id,))
+        if not cursor.fetchone():
+            cursor.close()
+            db.rollback()
+            return jsonify({'error': 'Playlist not found'}), 404
+        
+        cursor.execute("""
+            SELECT 1 FROM Playlist_Songs
+            WHERE playlist_id = %s AND song_id = %s
+        """, (playlist_id, song_id))
+        if not cursor.fetchone():
+            cursor.close()
+            db.rollback()
+            return jsonify({'error': f'Song {song_id} is not in the playlist'}), 404
+        
+        try:
+            key = playlist_order.move_key(cursor, playlist_id, song_id, position, after_song_id)
+        except ValueError as e:
+            cursor.close()
+            db.rollback()
+            return jsonify({'error': str(e)}), 400
+        
+        cursor.execute("""
+            UPDATE Playlist_Songs
+            SET track_order = %s
+            WHERE playlist_id = %s AND song_id = %s
+        """, (key, playlist_id, song_id))
+        touch_playlist(cursor, playlist_id)
+        db.commit()
+        cursor.close()
+        playlist_changed(playlist_id)
+        
+        log.info("✅ Song moved (track_order=%s)", key)
+        
+        return jsonify({'success': True, 'track_order': key})
+        
+    except Exception as e:
+        log.exception("❌ Error moving song in playlist: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+# Maximum number of operations accepted by one bulk request
+PLAYLIST_BULK_MAX_OPS = int(os.getenv('PLAYLIST_BULK_MAX_OPS', 1000))
+
+def parse_playlist_operation(op):
+    """(kind, song_id, position) of one bulk operation; ValueError if malformed"""
+    if not isinstance(op, dict):
+        raise ValueError(f'Operation {op!r} must be an object')
+    kind = op.get('op')
+    song_id = op.get('song_id')
+    position = op.get('position')
+    if kind not in ('add', 'remove', 'move'):
+        raise ValueError(f'Unknown operation {kind!r}')
+    if not isinstance(song_id, int) or isinstance(song_id, bool) or not 0 < song_id <= MAX_INT:
+        raise ValueError(f'Operation {op!r} needs a positive integer song_id')
+    if position is not None and (not isinstance(position, int) or isinstance(position, bool)):
+        raise ValueError(f'Operation {op!r} has a non-integer position')
+    return kind, song_id, position
+
+def apply_playlist_operations(order, operations):
+    """
+    Apply add / remove / move operations to a list of song ids.
+    Positions are 0-based; a missing position means the end of the playlist.
+    Raises ValueError for malformed operations.
+    """
+    order = list(order)
+    for op in operations:
+        kind, song_id, position = parse_playlist_operation(op)
+        if kind == 'add':
+            if song_id in order:
+                continue
+        elif kind == 'remove':
+            if song_id in order:
+                order.remove(song_id)
+            continue
+        else:
+            if song_id not in order:
+                raise ValueError(f'Song {song_id} is not in the playlist')
+            order.remove(song_id)
+
+        if position is None:
+            order.append(song_id)
+        else:
+            order.insert(max(0, position), song_id)
+    return order
+
+# Add, remove and reorder many songs in one transaction
+@app.route('/api/playlist/<int:playlist_id>/songs/bulk', methods=['POST'])
+def bulk_update_playlist_songs(playlist_id):
+    try:
+        data = request.json or {}
+        operations = data.get('operations') if isinstance(data, dict) else None
+        
+        if not isinstance(operations, list) or not operations:
+            return jsonify({'error': 'operations must be a non-empty list'}), 400
+        if len(operations) > PLAYLIST_BULK_MAX_OPS:
+            return jsonify({'error': f'At most {PLAYLIST_BULK_MAX_OPS} operations per request'}), 400
+        # Reject malformed operations before taking any locks
+        try:
+            for op in operations:
+                parse_playlist_operation(op)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        log.info("🎶 Bulk update of playlist %s - %s operations", playlist_id, len(operations))
+        
+        db = get_db()
+        cursor = db.cursor()
+        
+        # Lock the playlist row so concurrent bulk updates apply one after another
+        cursor.execute("""
+            SELECT user_id FROM Playlists
+            WHERE playlist_id = %s
+            FOR UPDATE
+        """, (playlist_id,))
+        
+        playlist = cursor.fetchone()
+        if not playlist:
+            cursor.close()
+            db.rollback()
+            return jsonify({'error': 'Playlist not found'}), 404
+        
+        current = playlist_order.ordered_keys(cursor, playlist_id)
+        
+        try:
+            order = apply_playlist_operations(current, operations)
+        except ValueError as e:
+            # Release the playlist lock now rather than when the pool takes
+            # the connection back
+            cursor.close()
+            db.rollback()
+            return jsonify({'error': str(e)}), 400
+        
+        added = [song_id for song_id in order if song_id not in current]
+        if added:
+            # Unknown songs would fail the foreign key halfway through the writes
+            placeholders = ', '.join(['%s'] * len(added))
+            cursor.execute(f"""
+                SELECT song_id FROM Songs
+                WHERE song_id IN ({placeholders})
+            """, added)
+            found = {row['song_id'] for row in cursor.fetchall()}
+            missing = [song_id for song_id in added if song_id not in found]
+            if missing:
+                cursor.close()
+                db.rollback()
+                return jsonify({'error': f'Songs not found: {missing}'}), 404
+        
+        kept = set(order)
+        removed = [song_id for song_id in current if song_id not in kept]
+        if removed:
+            placeholders = ', '.join(['%s'] * len(removed))
+            cursor.execute(f"""
+                DELETE FROM Playlist_Songs
+                WHERE playlist_id = %s AND song_id IN ({placeholders})
+            """, [playlist_id] + removed)
+        
+        # Songs still in the same relative order keep their key; only new and
+        # moved rows are written, in multi-row upserts
+        keys, changed = playlist_order.plan_keys(current, order)
+        playlist_order.write_keys(cursor, playlist_id, changed)
+        
+        profile_stats.songs_added(cursor, playlist['user_id'], playlist_id, added)
+        profile_stats.songs_removed(cursor, playlist['user_id'], playlist_id, removed)
+        touch_playlist(cursor, playlist_id)
+        db.commit()
+        cursor.close()
+        playlist_changed(playlist_id)
+        
+        log.info("✅ Playlist %s now has %s songs", playlist_id, len(order))
+        
+        return jsonify({
+            'success': True,
+            'songs': [
+                {'song_id': song_id, 'position': position, 'track_order': keys[song_id]}
+                for position, song_id in enumerate(order)
+            ]
+        })
+        
+    except Exception as e:
+        log.exception("❌ Error in bulk playlist update: %s", e)
         return jsonify({'error': str(e)}), 500
 
 # Delete playlist
@@ -457,10 +1683,18 @@ def delete_playlist():
         data = request.json
         playlist_id = data.get('playlist_id')
         
-        print(f"🗑️ Deleting playlist - Playlist: {playlist_id}")
+        log.info("🗑️ Deleting playlist - Playlist: %s", playlist_id)
         
         cursor = get_db().cursor()
         
+        # Hold the row so no add lands between reading the songs and deleting
+        user_id = lock_playlist(cursor, playlist_id)
+        cursor.execute("""
+            SELECT song_id FROM Playlist_Songs
+            WHERE playlist_id = %s
+        """, (playlist_id,))
+        song_ids = [row['song_id'] for row in cursor.fetchall()]
+        
         # Remove all songs from the playlist
         cursor.execute("""
             DELETE FROM Playlist_Songs
@@ -472,23 +1706,598 @@ def delete_playlist():
             DELETE FROM Playlists
             WHERE playlist_id = %s
         """, (playlist_id,))
+        if user_id is not None:
+            profile_stats.playlist_deleted(cursor, user_id, playlist_id, song_ids)
         
         get_db().commit()
         cursor.close()
+        playlist_changed(playlist_id)
         
-        print("✅ Playlist deleted successfully")
+        log.info("✅ Playlist deleted successfully")
         
         return jsonify({'success': True})
         
     except Exception as e:
-        print(f"❌ Error deleting playlist: {e}")
+        log.exception("❌ Error deleting playlist: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+# ============================================================================
+# BILLBOARD CHART ROUTES
+# ============================================================================
+
+# Weekly chart snapshots held in memory; new weeks written by other workers
+# are picked up incrementally every CHART_REFRESH_INTERVAL seconds
+CHART_REFRESH_INTERVAL = float(os.getenv('CHART_REFRESH_INTERVAL', 300))
+
+# Ingests from every worker serialise on this MySQL named lock, and each
+# re-reads the latest stored week under it before deriving anything from it
+CHART_INGEST_LOCK = 'music_player.chart_ingest'
+CHART_INGEST_LOCK_TIMEOUT = 10
+
+# Most entries per list a movers request may ask for (a chart week is a top 10)
+CHART_MOVERS_MAX_RESULTS = 10
+
+chart_store = ChartStore()
+chart_lock = threading.Lock()
+chart_checked_at = 0.0
+
+def load_chart_weeks(after=None):
+    """Load stored chart weeks (optionally only those after a date) into the store"""
+    cursor = get_db().cursor()
+    cursor.execute("""
+        SELECT 
+            B.song_id,
+            B.`rank`,
+            B.last_week,
+            B.weeks_on_chart,
+            B.chart_date,
+            S.title,
+            A.name as artist
+        FROM Billboard_Top_Songs B
+        INNER JOIN Songs S ON B.song_id = S.song_id
+        INNER JOIN Artists A ON S.artist_id = A.artist_id
+        WHERE B.chart_date > %s
+        ORDER BY B.chart_date ASC, B.`rank` ASC
+    """, (after or date.min,))
+    chart_store.load(cursor.fetchall())
+    cursor.close()
+
+def ensure_charts():
+    """Load the chart store on first use, then fold in newer weeks periodically"""
+    global chart_checked_at
+    if chart_store.loaded and time.monotonic() - chart_checked_at < CHART_REFRESH_INTERVAL:
+        return
+    if not chart_lock.acquire(blocking=not chart_store.loaded):
+        return
+    try:
+        if not chart_store.loaded:
+            log.info("📈 Loading chart weeks")
+            load_chart_weeks()
+        elif time.monotonic() - chart_checked_at >= CHART_REFRESH_INTERVAL:
+            cursor = get_db().cursor()
+            cursor.execute("""
+                SELECT MAX(chart_date) as latest FROM Billboard_Top_Songs
+            """)
+            latest = cursor.fetchone()['latest']
+            cursor.close()
+            if latest and (chart_store.latest_date() is None or latest > chart_store.latest_date()):
+                load_chart_weeks(chart_store.latest_date())
+        chart_checked_at = time.monotonic()
+    finally:
+        chart_lock.release()
+
+def parse_chart_date(value):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'Invalid chart date {value!r}, expected YYYY-MM-DD')
+
+# Ingest one or more chart weeks in bulk
+# Body: {"weeks": [{"chart_date": "YYYY-MM-DD", "song_ids": [rank 1, rank 2, ...]}]}
+@app.route('/api/charts/ingest', methods=['POST'])
+def ingest_chart_weeks():
+    try:
+        data = request.json or {}
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
+        weeks = data.get('weeks') or [data]
+        if not isinstance(weeks, list):
+            return jsonify({'error': 'weeks must be a list'}), 400
+        
+        parsed = []
+        for week in weeks:
+            if not isinstance(week, dict):
+                return jsonify({'error': 'Each chart week must be an object'}), 400
+            song_ids = week.get('song_ids') or []
+            if not isinstance(song_ids, list) or not all(
+                    isinstance(song_id, int) and not isinstance(song_id, bool) for song_id in song_ids):
+                return jsonify({'error': 'song_ids must be a list of integers'}), 400
+            try:
+                parsed.append((parse_chart_date(week.get('chart_date')), song_ids))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        weeks = parsed
+        
+        ensure_charts()
+        
+        db = get_db()
+        cursor = db.cursor()
+        cursor.execute("SELECT GET_LOCK(%s, %s) AS acquired", (CHART_INGEST_LOCK, CHART_INGEST_LOCK_TIMEOUT))
+        if not cursor.fetchone()['acquired']:
+            cursor.close()
+            return jsonify({'error': 'Another chart ingest is running, please retry'}), 503
+        
+        try:
+            # End the current read view so the re-read below sees every week
+            # committed by other workers, which this store may not have yet
+            db.commit()
+            with chart_lock:
+                latest = chart_store.latest_date()
+                # Re-read from the latest week on: it may have been replaced
+                load_chart_weeks(latest - timedelta(days=1) if latest else None)
+                
+                try:
+                    planned = chart_store.plan(weeks)
+                except ValueError as e:
+                    return jsonify({'error': str(e)}), 400
+                
+                song_ids = sorted({song_id for snapshot in planned for song_id in snapshot.song_ids})
+                placeholders = ', '.join(['%s'] * len(song_ids))
+                cursor.execute(f"""
+                    SELECT S.song_id, S.title, A.name as artist
+                    FROM Songs S
+                    INNER JOIN Artists A ON S.artist_id = A.artist_id
+                    WHERE S.song_id IN ({placeholders})
+                """, song_ids)
+                songs = {row['song_id']: (row['title'], row['artist']) for row in cursor.fetchall()}
+                
+                missing = [song_id for song_id in song_ids if song_id not in songs]
+                if missing:
+                    return jsonify({'error': f'Unknown song ids: {missing}'}), 400
+                
+                log.info("📈 Ingesting %s chart weeks", len(planned))
+                
+                # Replacing the latest week drops its previous rows first
+                cursor.executemany("""
+                    DELETE FROM Billboard_Top_Songs
+                    WHERE chart_date = %s
+                """, [(date.fromordinal(snapshot.chart_date),) for snapshot in planned])
+                cursor.executemany("""
+                    INSERT INTO Billboard_Top_Songs (song_id, `rank`, last_week, weeks_on_chart, chart_date)
+                    VALUES (%s, %s, %s, %s, %s)
+                """, [
+                    (song_id, i + 1, snapshot.last_week[i] or None, snapshot.weeks_on_chart[i],
+                     date.fromordinal(snapshot.chart_date))
+                    for snapshot in planned
+                    for i, song_id in enumerate(snapshot.song_ids)
+                ])
+                db.commit()
+                
+                chart_store.commit(planned, songs)
+        finally:
+            # Nothing uncommitted outlives the lock
+            db.rollback()
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (CHART_INGEST_LOCK,))
+            cursor.close()
+        
+        log.info("✅ Chart now runs to %s", chart_store.latest_date())
+        
+        return jsonify({
+            'success': True,
+            'weeks': [date.fromordinal(snapshot.chart_date).isoformat() for snapshot in planned]
+        })
+        
+    except Exception as e:
+        log.exception("❌ Error ingesting chart weeks: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+# Latest chart week
+@app.route('/api/charts/latest', methods=['GET'])
+def get_latest_chart():
+    return get_chart(None)
+
+# Chart in effect on a date (latest week on or before it)
+@app.route('/api/charts/<chart_date>', methods=['GET'])
+def get_chart(chart_date):
+    try:
+        on_date = parse_chart_date(chart_date) if chart_date else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        ensure_charts()
+        chart = chart_store.chart(on_date)
+        
+        if chart is None:
+            return jsonify({'error': 'No chart for that date'}), 404
+        return jsonify({'chart': chart})
+        
+    except Exception as e:
+        log.exception("❌ Error fetching chart: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+# Biggest climbers, fallers and new entries for a chart week
+@app.route('/api/charts/<chart_date>/movers', methods=['GET'])
+def get_chart_movers(chart_date):
+    try:
+        on_date = None if chart_date == 'latest' else parse_chart_date(chart_date)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        ensure_charts()
+        limit = max(1, min(request.args.get('limit', 5, type=int), CHART_MOVERS_MAX_RESULTS))
+        movers = chart_store.movers(on_date, limit=limit)
+        
+        if movers is None:
+            return jsonify({'error': 'No chart for that date'}), 404
+        return jsonify({'movers': movers})
+        
+    except Exception as e:
+        log.exception("❌ Error fetching chart movers: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+# Chart history of a single song
+@app.route('/api/song/<int:song_id>/chart-history', methods=['GET'])
+def get_song_chart_history(song_id):
+    try:
+        ensure_charts()
+        return jsonify(chart_store.history(song_id))
+        
+    except Exception as e:
+        log.exception("❌ Error fetching chart history: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+# ============================================================================
+# SEARCH ROUTES
+# ============================================================================
+
+# In-process inverted indexes, built on first use and rebuilt in the background
+# once older than SEARCH_INDEX_TTL, to pick up writes made by other workers or
+# directly in MySQL. The catalog (songs, artists) and users are separate
+# groups, each rebuilt on its own; searches keep using the old index until
+# the new one is swapped in
+SEARCH_INDEX_TTL = float(os.getenv('SEARCH_INDEX_TTL', 600))
+SEARCH_INDEX_RETRY_SECONDS = 30
+SEARCH_LATENCY_BUDGET_MS = float(os.getenv('SEARCH_LATENCY_BUDGET_MS', 50))
+SEARCH_MAX_RESULTS = 50
+
+song_index = SearchIndex({'title': 3.0, 'artist': 2.0, 'genre': 1.0, 'lyrics': 0.5})
+artist_index = SearchIndex({'name': 1.0})
+user_index = SearchIndex({'username': 2.0, 'email': 1.0})
+
+# Prefix completion over usernames and artist names (built with the indexes)
+user_typeahead = PrefixIndex()
+artist_typeahead = PrefixIndex()
+TYPEAHEAD_MAX_RESULTS = 25
+
+def song_search_rows(conn):
+    """Songs with their search fields; without lyrics on a database lacking the column"""
+    for with_lyrics in (True, False):
+        cursor = conn.cursor(pymysql.cursors.SSDictCursor)
+        try:
+            cursor.execute(f"""
+                SELECT 
+                    {SONG_ROW.sql},
+                    S.genre{', S.lyrics' if with_lyrics else ''}
+                FROM Songs S
+                INNER JOIN Artists A ON S.artist_id = A.artist_id
+            """)
+        except pymysql.err.OperationalError as e:
+            cursor.close()
+            if not with_lyrics or e.args[:1] != (pymysql.constants.ER.BAD_FIELD_ERROR,):
+                raise
+            log.warning("⚠️ Songs.lyrics is missing (apply sql/12_song_lyrics.sql); indexing songs without it")
+            continue
+        try:
+            yield from cursor
+        finally:
+            cursor.close()
+        return
+
+def build_catalog_indexes(conn):
+    """Load songs and artists into the search and typeahead indexes"""
+    song_index.load(
+        (row['song_id'],
+         {'title': row['title'], 'artist': row['artist'], 'genre': row['genre'], 'lyrics': row.pop('lyrics', None)},
+         SONG_ROW.shape_one(row))
+        for row in song_search_rows(conn)
+    )
+    
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT artist_id, name FROM Artists
+    """)
+    artists = cursor.fetchall()
+    cursor.close()
+    artist_index.load((row['artist_id'], {'name': row['name']}, row) for row in artists)
+    artist_typeahead.build((row['artist_id'], row['name']) for row in artists)
+
+def build_user_indexes(conn):
+    """Load users into the search and typeahead indexes"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT 
+            user_id,
+            username,
+            email,
+            created_at
+        FROM Users
+    """)
+    users = cursor.fetchall()
+    cursor.close()
+    user_index.load(
+        (row['user_id'], {'username': row['username'], 'email': row['email']}, row)
+        for row in users
+    )
+    user_typeahead.build((row['user_id'], row['username']) for row in users)
+
+# Index group -> (index whose built_at dates the group, builder, build lock)
+SEARCH_INDEXES = {
+    'catalog': (song_index, build_catalog_indexes, threading.Lock()),
+    'users': (user_index, build_user_indexes, threading.Lock()),
+}
+
+def ensure_search_indexes(group):
+    """
+    Build an index group on first use (the request waits, there is nothing
+    to serve yet). Once it is older than SEARCH_INDEX_TTL, start one
+    background rebuild and keep answering from the current index.
+    """
+    index, build, lock = SEARCH_INDEXES[group]
+    built_at = index.built_at
+    if built_at is not None and time.monotonic() - built_at < SEARCH_INDEX_TTL:
+        return
+    
+    if built_at is None:
+        with lock:
+            if index.built_at is None:
+                log.info("🔎 Building %s search indexes", group)
+                with db_pool.connection() as conn:
+                    build(conn)
+        return
+    
+    # Held until the rebuild thread finishes: at most one rebuild per group
+    if not lock.acquire(blocking=False):
+        return
+    
+    def rebuild():
+        try:
+            log.info("🔎 Rebuilding %s search indexes", group)
+            with db_pool.connection() as conn:
+                build(conn)
+        except Exception as e:
+            log.error("❌ Rebuilding %s search indexes failed: %s", group, e)
+            # Keep serving the old index; try again in a little while
+            index.built_at = time.monotonic() - SEARCH_INDEX_TTL + SEARCH_INDEX_RETRY_SECONDS
+        finally:
+            lock.release()
+    
+    threading.Thread(target=rebuild, name=f'search-index-{group}', daemon=True).start()
+
+def expire_search_indexes():
+    """Have the next search rebuild the catalog indexes (serving the old ones meanwhile)"""
+    if song_index.built_at is not None:
+        song_index.built_at = time.monotonic() - SEARCH_INDEX_TTL
+
+def run_search(index, query, limit):
+    """Query an index and return (payloads, elapsed ms)"""
+    started = time.perf_counter()
+    results = [payload for _, _, payload in index.search(query, limit=limit)]
+    took_ms = (time.perf_counter() - started) * 1000
+    if took_ms > SEARCH_LATENCY_BUDGET_MS:
+        log.warning("⚠️ Search for %r took %.1fms (budget %sms)", query, took_ms, SEARCH_LATENCY_BUDGET_MS)
+    return results, took_ms
+
+# Search songs (title, artist, genre, lyrics) and artists
+# The last word of the query matches as a prefix for search-as-you-type
+@app.route('/api/search', methods=['GET'])
+def search_music():
+    try:
+        query = request.args.get('q', '').strip()
+        limit = min(request.args.get('limit', 10, type=int), SEARCH_MAX_RESULTS)
+        
+        if not query:
+            return jsonify({'songs': [], 'artists': []})
+        
+        ensure_search_indexes('catalog')
+        songs, songs_ms = run_search(song_index, query, limit)
+        artists, artists_ms = run_search(artist_index, query, limit)
+        
+        return jsonify({
+            'songs': songs,
+            'artists': artists,
+            'took_ms': round(songs_ms + artists_ms, 3)
+        })
+        
+    except Exception as e:
+        log.exception("❌ Error searching music: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+# Prefix completions for usernames or artist names
+@app.route('/api/typeahead', methods=['GET'])
+def typeahead():
+    try:
+        query = request.args.get('q', '').strip()
+        kind = request.args.get('type', 'users')
+        limit = min(request.args.get('limit', 10, type=int), TYPEAHEAD_MAX_RESULTS)
+        
+        if kind not in ('users', 'artists'):
+            return jsonify({'error': 'type must be users or artists'}), 400
+        if not query:
+            return jsonify({'results': []})
+        
+        ensure_search_indexes(kind if kind == 'users' else 'catalog')
+        index = user_typeahead if kind == 'users' else artist_typeahead
+        results = [{'id': item_id, 'name': name} for item_id, name in index.complete(query, limit)]
+        
+        return jsonify({'results': results})
+        
+    except Exception as e:
+        log.exception("❌ Error in typeahead: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+# Chart store statistics for monitoring
+@app.route('/api/health/charts', methods=['GET'])
+def chart_store_stats():
+    return jsonify({'charts': chart_store.stats()})
+
+# Search index statistics for monitoring
+@app.route('/api/health/search', methods=['GET'])
+def search_index_stats():
+    return jsonify({
+        'songs': song_index.stats(),
+        'artists': artist_index.stats(),
+        'users': user_index.stats(),
+        'user_typeahead': user_typeahead.stats(),
+        'artist_typeahead': artist_typeahead.stats()
+    })
+
+# ============================================================================
+# RECOMMENDATION ROUTES
+# ============================================================================
+
+# Item-item model over playlists and favorites (recommender.py). Workers load
+# the model file written by `flask build-recommendations` and pick up new
+# builds within RECOMMENDER_RELOAD_INTERVAL; the first worker to find no file
+# builds one itself
+RECOMMENDER_MODEL_PATH = os.getenv('RECOMMENDER_MODEL_PATH', 'recommendations.npz')
+RECOMMENDER_RELOAD_INTERVAL = float(os.getenv('RECOMMENDER_RELOAD_INTERVAL', 60))
+RECOMMENDER_MAX_SEEDS = int(os.getenv('RECOMMENDER_MAX_SEEDS', 500))
+RECOMMENDATIONS_MAX_RESULTS = 100
+
+recommender = Recommender(
+    RECOMMENDER_MODEL_PATH,
+    top_k=int(os.getenv('RECOMMENDER_TOP_K', 50)),
+    shrink=float(os.getenv('RECOMMENDER_SHRINK', 5))
+)
+recommender_lock = threading.Lock()
+
+def start_recommender_reloader():
+    """Reload the model file whenever a new build replaces it"""
+    def run():
+        while True:
+            time.sleep(RECOMMENDER_RELOAD_INTERVAL)
+            try:
+                if recommender.reload():
+                    log.info("🧭 Loaded new recommendation model")
+            except Exception as e:
+                log.warning("❌ Recommendation model reload failed: %s", e)
+    threading.Thread(target=run, name='recommender-reloader', daemon=True).start()
+
+def ensure_recommender():
+    """Load (or, with no model file yet, build) the model and fold in new favorites"""
+    if recommender.model is None:
+        with recommender_lock:
+            if recommender.model is None and not recommender.reload():
+                log.info("🧭 Building recommendation model")
+                recommender.build(get_db())
+    
+    user_ids = sorted(recommender.pending_users())
+    if user_ids:
+        placeholders = ', '.join(['%s'] * len(user_ids))
+        cursor = get_db().cursor()
+        cursor.execute(f"""
+            SELECT user_id, song_id FROM Favorite_Songs
+            WHERE user_id IN ({placeholders})
+        """, user_ids)
+        favorites_by_user = {}
+        for row in cursor.fetchall():
+            favorites_by_user.setdefault(row['user_id'], set()).add(row['song_id'])
+        cursor.close()
+        recommender.apply(favorites_by_user)
+
+def recommended_songs(scored):
+    """Song rows for [(song_id, score)], in score order"""
+    if not scored:
+        return []
+    song_ids = [song_id for song_id, _ in scored]
+    placeholders = ', '.join(['%s'] * len(song_ids))
+    cursor = get_db().cursor()
+    cursor.execute(f"""
+        SELECT 
+            {SONG_ROW.sql}
+        FROM Songs S
+        INNER JOIN Artists A ON S.artist_id = A.artist_id
+        WHERE S.song_id IN ({placeholders})
+    """, song_ids)
+    songs = {row['song_id']: row for row in SONG_ROW.shape(cursor.fetchall())}
+    cursor.close()
+    return [
+        dict(songs[song_id], score=score)
+        for song_id, score in scored
+        if song_id in songs
+    ]
+
+def recommendations_unavailable():
+    return jsonify({'error': 'Recommendations need numpy and scipy on the server'}), 503
+
+# Songs that share playlists and favorites with a song
+@app.route('/api/song/<int:song_id>/similar', methods=['GET'])
+def get_similar_songs(song_id):
+    if not RECOMMENDER_AVAILABLE:
+        return recommendations_unavailable()
+    try:
+        limit = min(request.args.get('limit', 20, type=int), RECOMMENDATIONS_MAX_RESULTS)
+        ensure_recommender()
+        
+        started = time.perf_counter()
+        scored = recommender.similar(song_id, limit)
+        took_ms = (time.perf_counter() - started) * 1000
+        
+        return jsonify({'songs': recommended_songs(scored), 'took_ms': round(took_ms, 3)})
+        
+    except Exception as e:
+        log.exception("❌ Error fetching similar songs: %s", e)
         return jsonify({'error': str(e)}), 500
 
+# Songs for a user, seeded by their favorites and playlist songs
+@app.route('/api/users/<int:user_id>/recommendations', methods=['GET'])
+def get_user_recommendations(user_id):
+    if not RECOMMENDER_AVAILABLE:
+        return recommendations_unavailable()
+    try:
+        limit = min(request.args.get('limit', 20, type=int), RECOMMENDATIONS_MAX_RESULTS)
+        ensure_recommender()
+        
+        cursor = get_db().cursor()
+        cursor.execute("""
+            (SELECT song_id FROM Favorite_Songs
+             WHERE user_id = %s
+             ORDER BY favorited_at DESC
+             LIMIT %s)
+            UNION
+            (SELECT PS.song_id FROM Playlists P
+             INNER JOIN Playlist_Songs PS ON P.playlist_id = PS.playlist_id
+             WHERE P.user_id = %s
+             ORDER BY PS.added_at DESC
+             LIMIT %s)
+        """, (user_id, RECOMMENDER_MAX_SEEDS, user_id, RECOMMENDER_MAX_SEEDS))
+        seeds = [row['song_id'] for row in cursor.fetchall()]
+        cursor.close()
+        
+        started = time.perf_counter()
+        scored = recommender.recommend(seeds, limit)
+        took_ms = (time.perf_counter() - started) * 1000
+        
+        return jsonify({
+            'songs': recommended_songs(scored),
+            'seeds': len(seeds),
+            'took_ms': round(took_ms, 3)
+        })
+        
+    except Exception as e:
+        log.exception("❌ Error fetching recommendations: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+# Recommendation model statistics for monitoring
+@app.route('/api/health/recommendations', methods=['GET'])
+def recommender_stats():
+    return jsonify({'recommendations': recommender.stats()})
+
 # ============================================================================
 # USER SEARCH AND PROFILE ROUTES
 # ============================================================================
 
-# Search users by username or email
+# Search users by username or email (served from the user search index)
 @app.route('/api/users/search', methods=['GET'])
 def search_users():
     try:
@@ -497,26 +2306,21 @@ def search_users():
         if not query or len(query) < 2:
             return jsonify({'users': []})
         
-        cursor = get_db().cursor()
-        
-        cursor.execute("""
-            SELECT 
-                user_id,
-                username,
-                email,
-                created_at
-            FROM Users
-            WHERE username LIKE %s OR email LIKE %s
-            LIMIT 10
-        """, (f'%{query}%', f'%{query}%'))
+        ensure_search_indexes('users')
         
-        users = cursor.fetchall()
-        cursor.close()
+        # Username prefix completions first (cheap bisect), then fill up with
+        # ranked matches on any username/email token
+        users = [user_index.get(user_id) for user_id, _ in user_typeahead.complete(query, 10)]
+        users = [user for user in users if user is not None]
+        if len(users) < 10:
+            seen = {user['user_id'] for user in users}
+            ranked, _ = run_search(user_index, query, 10)
+            users += [user for user in ranked if user['user_id'] not in seen][:10 - len(users)]
         
         return jsonify({'users': users})
         
     except Exception as e:
-        print(f"Error searching users: {e}")
+        log.exception("Error searching users: %s", e)
         return jsonify({'error': str(e)}), 500
 
 # Get public profile of any user
@@ -525,49 +2329,51 @@ def get_user_profile(user_id):
     try:
         cursor = get_db().cursor()
         
-        # Get user basic info
+        # Counters are maintained by the playlist write routes (profile_stats)
         cursor.execute("""
             SELECT 
                 user_id,
                 username,
                 email,
-                created_at
+                created_at,
+                playlist_count,
+                total_songs
             FROM Users
             WHERE user_id = %s
         """, (user_id,))
         
         user = cursor.fetchone()
+        cursor.close()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        # Get playlist count
-        cursor.execute("""
-            SELECT COUNT(*) as count
-            FROM Playlists
-            WHERE user_id = %s
-        """, (user_id,))
-        user['playlist_count'] = cursor.fetchone()['count']
-        
-        # Get total songs in playlists
-        cursor.execute("""
-            SELECT COUNT(DISTINCT PS.song_id) as count
-            FROM Playlist_Songs PS
-            INNER JOIN Playlists P ON PS.playlist_id = P.playlist_id
-            WHERE P.user_id = %s
-        """, (user_id,))
-        user['total_songs'] = cursor.fetchone()['count']
-        
-        cursor.close()
-        
         return jsonify({'user': user})
         
     except Exception as e:
-        print(f"Error fetching user profile: {e}")
+        log.exception("Error fetching user profile: %s", e)
         return jsonify({'error': str(e)}), 500
 
+def user_playlists_version(user_id):
+    """Version of a user's playlist collection for ETag / Last-Modified"""
+    # Playlist writes bump Playlists.version (see touch_playlist): the sum of
+    # versions moves on every edit, the count and newest id on creates and
+    # deletes
+    row = fetch_hot_row("""
+        SELECT 
+            COUNT(*) as playlist_count,
+            MAX(playlist_id) as newest_playlist,
+            SUM(version) as versions,
+            MAX(updated_at) as updated_at
+        FROM Playlists
+        WHERE user_id = %s
+    """, (user_id,))
+    return (user_id, row['playlist_count'], row['newest_playlist'], row['versions']), row['updated_at']
+
 # Get public playlists of a user
+# Optional: ?include=songs to nest each playlist's songs in the response
 @app.route('/api/users/<int:user_id>/playlists', methods=['GET'])
+@conditional(user_playlists_version)
 def get_user_playlists_public(user_id):
     try:
         cursor = get_db().cursor()
@@ -579,21 +2385,41 @@ def get_user_playlists_public(user_id):
                 P.description,
                 P.color_hex as color,
                 P.created_at,
-                COUNT(PS.song_id) as count
+                P.song_count as count
             FROM Playlists P
-            LEFT JOIN Playlist_Songs PS ON P.playlist_id = PS.playlist_id
             WHERE P.user_id = %s
-            GROUP BY P.playlist_id, P.name, P.description, P.color_hex, P.created_at
             ORDER BY P.created_at DESC
         """, (user_id,))
         
         playlists = cursor.fetchall()
+        
+        # ?include=songs nests every playlist's songs using one extra
+        # set-based query instead of one request (and two queries) per playlist
+        if request.args.get('include') == 'songs':
+            cursor.execute(f"""
+                SELECT 
+                    PS.playlist_id,
+                    {SONG_ROW.sql}
+                FROM Playlists P
+                INNER JOIN Playlist_Songs PS ON P.playlist_id = PS.playlist_id
+                INNER JOIN Songs S ON PS.song_id = S.song_id
+                INNER JOIN Artists A ON S.artist_id = A.artist_id
+                WHERE P.user_id = %s
+                ORDER BY PS.playlist_id, PS.track_order ASC, PS.playlist_song_id ASC
+            """, (user_id,))
+            
+            songs_by_playlist = {}
+            for song in SONG_ROW.shape(cursor.fetchall()):
+                songs_by_playlist.setdefault(song.pop('playlist_id'), []).append(song)
+            for playlist in playlists:
+                playlist['songs'] = songs_by_playlist.get(playlist['id'], [])
+        
         cursor.close()
         
         return jsonify({'playlists': playlists})
         
     except Exception as e:
-        print(f"Error fetching user playlists: {e}")
+        log.exception("Error fetching user playlists: %s", e)
         return jsonify({'error': str(e)}), 500
 
 # ============================================================================
@@ -611,7 +2437,7 @@ def update_user_profile(user_id):
         username = data.get('username')
         bio = data.get('bio', '')
         
-        print(f"📝 Updating profile for user {user_id}: username={username}")
+        log.info("📝 Updating profile for user %s: username=%s", user_id, username)
         
         cursor = get_db().cursor()
         
@@ -635,7 +2461,14 @@ def update_user_profile(user_id):
         get_db().commit()
         cursor.close()
         
-        print(f"✅ Profile updated successfully for user {user_id}")
+        # Keep the user search index in step with the new username
+        indexed = user_index.get(user_id)
+        if indexed is not None:
+            indexed = dict(indexed, username=username)
+            user_index.add(user_id, {'username': username, 'email': indexed['email']}, indexed)
+        user_typeahead.update(user_id, username)
+        
+        log.info("✅ Profile updated successfully for user %s", user_id)
         
         return jsonify({
             'success': True,
@@ -643,7 +2476,7 @@ def update_user_profile(user_id):
         })
         
     except Exception as e:
-        print(f"❌ Error updating profile: {e}")
+        log.exception("❌ Error updating profile: %s", e)
         return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
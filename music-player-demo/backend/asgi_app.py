@@ -0,0 +1,416 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - ASYNC (ASGI) SERVING MODE
+# Purpose: Serve the read-heavy routes on an event loop with a non-blocking
+#          MySQL driver, so one process can hold hundreds of requests that
+#          are waiting on the database
+# Run:     uvicorn asgi_app:app --host 0.0.0.0 --port 8000 --workers 2
+# Deps:    requirements-async.txt
+#
+# Same URLs and JSON shapes as app.py. Routes not ported here (writes, search,
+# health) fall through to the Flask app, which runs in a thread pool.
+# ============================================================================
+
+import os
+from contextlib import asynccontextmanager
+
+import aiomysql
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Mount, Route
+
+from app import (
+    DB_CONFIG,
+    SONGS_PAGE_MAX,
+    SONGS_STREAM_BATCH,
+    app as flask_app,
+    is_allowed_origin,
+    parse_songs_cursor,
+    songs_query,
+)
+from instrumentation import log
+from middleware import CORS_HEADERS, CORS_METHODS
+from projections import ARTIST_ROW, ARTIST_SONG_ROW, FAVORITE_SONG_ROW, SONG_ROW
+
+pool = None
+
+
+class JSONResponse(Response):
+    """JSON rendered by the Flask app's provider so both modes emit identical bodies"""
+    media_type = 'application/json'
+
+    def render(self, content):
+        return flask_app.json.dumps_bytes(content)
+
+
+def error(message, status):
+    return JSONResponse({'error': message}, status_code=status)
+
+
+async def fetch(sql, params=(), one=False):
+    """Run a query on a pooled connection and return dict rows"""
+    async with pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(sql, params)
+            if one:
+                return await cursor.fetchone()
+            return await cursor.fetchall()
+
+
+async def startup():
+    global pool
+    pool = await aiomysql.create_pool(
+        host=DB_CONFIG['host'],
+        port=DB_CONFIG['port'],
+        user=DB_CONFIG['user'],
+        password=DB_CONFIG['password'],
+        db=DB_CONFIG['database'],
+        minsize=int(os.getenv('MYSQL_ASYNC_POOL_MIN', 5)),
+        maxsize=int(os.getenv('MYSQL_ASYNC_POOL_MAX', 50)),
+        pool_recycle=float(os.getenv('MYSQL_POOL_RECYCLE', 3600)),
+        autocommit=True,
+    )
+
+
+async def shutdown():
+    pool.close()
+    await pool.wait_closed()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await startup()
+    yield
+    await shutdown()
+
+
+async def cors_headers(request, call_next):
+    """Same CORS headers as the Flask after_request hook"""
+    response = await call_next(request)
+    origin = request.headers.get('origin')
+    if origin and is_allowed_origin(origin):
+        response.headers['Access-Control-Allow-Origin'] = origin
+        response.headers['Access-Control-Allow-Credentials'] = 'true'
+        response.headers['Access-Control-Allow-Methods'] = CORS_METHODS
+        response.headers['Access-Control-Allow-Headers'] = CORS_HEADERS
+    return response
+
+
+# ============================================================================
+# SONGS ROUTES
+# ============================================================================
+
+async def get_songs(request):
+    try:
+        after = request.query_params.get('after')
+        limit = request.query_params.get('limit')
+        stream = request.query_params.get('stream')
+
+        if after is not None:
+            try:
+                after = parse_songs_cursor(after)
+            except ValueError as e:
+                return error(str(e), 400)
+
+        if stream is not None:
+            if stream not in ('json', 'ndjson'):
+                return error('stream must be json or ndjson', 400)
+            return await stream_songs(stream, after)
+
+        if limit is not None:
+            if not limit.isdigit() or not 1 <= int(limit) <= SONGS_PAGE_MAX:
+                return error(f'limit must be between 1 and {SONGS_PAGE_MAX}', 400)
+            limit = int(limit)
+
+        sql, params = songs_query(after, limit + 1 if limit else None)
+        songs = SONG_ROW.shape(await fetch(sql, params))
+
+        if limit is None and after is None:
+            return JSONResponse({'songs': songs})
+
+        next_after = None
+        if limit is not None and len(songs) > limit:
+            songs = songs[:limit]
+            last = songs[-1]
+            next_after = f"{last['title']},{last['song_id']}"
+
+        return JSONResponse({'songs': songs, 'next_after': next_after})
+
+    except Exception as e:
+        log.exception("❌ Error fetching songs: %s", e)
+        return error(str(e), 500)
+
+
+async def stream_songs(fmt, after):
+    """Stream the listing off an unbuffered cursor without blocking the loop"""
+    conn = await pool.acquire()
+    cursor = await conn.cursor(aiomysql.SSDictCursor)
+    sql, params = songs_query(after)
+    await cursor.execute(sql, params)
+
+    async def generate():
+        count = 0
+        try:
+            if fmt == 'json':
+                yield '{"songs": ['
+            while True:
+                rows = SONG_ROW.shape(await cursor.fetchmany(SONGS_STREAM_BATCH))
+                if not rows:
+                    break
+                if fmt == 'ndjson':
+                    yield ''.join(flask_app.json.dumps(row) + '\n' for row in rows)
+                else:
+                    chunk = ', '.join(flask_app.json.dumps(row) for row in rows)
+                    yield (', ' if count else '') + chunk
+                count += len(rows)
+            if fmt == 'json':
+                yield ']}'
+        finally:
+            await cursor.close()
+            pool.release(conn)
+
+    media_type = 'application/x-ndjson' if fmt == 'ndjson' else 'application/json'
+    return StreamingResponse(generate(), media_type=media_type)
+
+
+async def get_song_details(request):
+    try:
+        song = await fetch("""
+            SELECT
+                S.song_id,
+                S.title,
+                A.name as artist,
+
+                S.lyrics,
+                S.duration,
+                S.release_year
+            FROM Songs S
+            INNER JOIN Artists A ON S.artist_id = A.artist_id
+            WHERE S.song_id = %s
+        """, (request.path_params['song_id'],), one=True)
+
+        if song:
+            return JSONResponse({'song': song})
+        return error('Song not found', 404)
+
+    except Exception as e:
+        log.exception("❌ Error fetching song details: %s", e)
+        return error(str(e), 500)
+
+
+# ============================================================================
+# ARTISTS ROUTES
+# ============================================================================
+
+async def get_artists(request):
+    try:
+        artists = await fetch(f"""
+            SELECT
+                {ARTIST_ROW.sql}
+            FROM Artists
+            ORDER BY name ASC
+        """)
+        return JSONResponse({'artists': artists})
+
+    except Exception as e:
+        log.exception("❌ Error fetching artists: %s", e)
+        return error(str(e), 500)
+
+
+async def get_artist_details(request):
+    try:
+        artist_id = request.path_params['artist_id']
+        artist = await fetch(f"""
+            SELECT
+                {ARTIST_ROW.sql}
+            FROM Artists
+            WHERE artist_id = %s
+        """, (artist_id,), one=True)
+
+        if not artist:
+            return error('Artist not found', 404)
+
+        artist['songs'] = ARTIST_SONG_ROW.shape(await fetch(f"""
+            SELECT
+                {ARTIST_SONG_ROW.sql}
+            FROM Songs S
+            WHERE S.artist_id = %s
+            ORDER BY S.title ASC
+        """, (artist_id,)))
+        return JSONResponse({'artist': artist})
+
+    except Exception as e:
+        log.exception("❌ Error fetching artist details: %s", e)
+        return error(str(e), 500)
+
+
+# ============================================================================
+# PLAYLISTS ROUTES
+# ============================================================================
+
+async def get_playlists(request):
+    try:
+        playlists = await fetch("""
+            SELECT * FROM Playlists
+            WHERE user_id = %s
+            ORDER BY created_at DESC
+        """, (request.path_params['user_id'],))
+        return JSONResponse({'playlists': playlists})
+
+    except Exception as e:
+        log.exception("❌ Error fetching playlists: %s", e)
+        return error(str(e), 500)
+
+
+async def get_playlist_details(request):
+    try:
+        playlist_id = request.path_params['playlist_id']
+        playlist = await fetch("""
+            SELECT * FROM Playlists
+            WHERE playlist_id = %s
+        """, (playlist_id,), one=True)
+
+        if not playlist:
+            return error('Playlist not found', 404)
+
+        playlist['songs'] = SONG_ROW.shape(await fetch(f"""
+            SELECT
+                {SONG_ROW.sql}
+            FROM Playlist_Songs PS
+            INNER JOIN Songs S ON PS.song_id = S.song_id
+            INNER JOIN Artists A ON S.artist_id = A.artist_id
+            WHERE PS.playlist_id = %s
+            ORDER BY PS.track_order ASC, PS.playlist_song_id ASC
+        """, (playlist_id,)))
+        return JSONResponse({'playlist': playlist})
+
+    except Exception as e:
+        log.exception("❌ Error fetching playlist details: %s", e)
+        return error(str(e), 500)
+
+
+# ============================================================================
+# FAVORITES ROUTES
+# ============================================================================
+
+async def get_favorite_songs(request):
+    try:
+        favorites = FAVORITE_SONG_ROW.shape(await fetch(f"""
+            SELECT
+                {FAVORITE_SONG_ROW.sql}
+            FROM Favorite_Songs FS
+            INNER JOIN Songs S ON FS.song_id = S.song_id
+            INNER JOIN Artists A ON S.artist_id = A.artist_id
+            WHERE FS.user_id = %s
+            ORDER BY FS.favorited_at DESC
+        """, (request.path_params['user_id'],)))
+        return JSONResponse({'favorites': favorites})
+
+    except Exception as e:
+        log.exception("❌ Error fetching favorites: %s", e)
+        return error(str(e), 500)
+
+
+# ============================================================================
+# USER PROFILE ROUTES
+# ============================================================================
+
+async def get_user_profile(request):
+    try:
+        user = await fetch("""
+            SELECT
+                user_id,
+                username,
+                email,
+                created_at,
+                playlist_count,
+                total_songs
+            FROM Users
+            WHERE user_id = %s
+        """, (request.path_params['user_id'],), one=True)
+
+        if not user:
+            return error('User not found', 404)
+        return JSONResponse({'user': user})
+
+    except Exception as e:
+        log.exception("Error fetching user profile: %s", e)
+        return error(str(e), 500)
+
+
+async def get_user_playlists_public(request):
+    try:
+        user_id = request.path_params['user_id']
+        playlists = await fetch("""
+            SELECT
+                P.playlist_id as id,
+                P.name,
+                P.description,
+                P.color_hex as color,
+                P.created_at,
+                P.song_count as count
+            FROM Playlists P
+            WHERE P.user_id = %s
+            ORDER BY P.created_at DESC
+        """, (user_id,))
+
+        if request.query_params.get('include') == 'songs':
+            songs = SONG_ROW.shape(await fetch(f"""
+                SELECT
+                    PS.playlist_id,
+                    {SONG_ROW.sql}
+                FROM Playlists P
+                INNER JOIN Playlist_Songs PS ON P.playlist_id = PS.playlist_id
+                INNER JOIN Songs S ON PS.song_id = S.song_id
+                INNER JOIN Artists A ON S.artist_id = A.artist_id
+                WHERE P.user_id = %s
+                ORDER BY PS.playlist_id, PS.track_order ASC, PS.playlist_song_id ASC
+            """, (user_id,)))
+            songs_by_playlist = {}
+            for song in songs:
+                songs_by_playlist.setdefault(song.pop('playlist_id'), []).append(song)
+            for playlist in playlists:
+                playlist['songs'] = songs_by_playlist.get(playlist['id'], [])
+
+        return JSONResponse({'playlists': playlists})
+
+    except Exception as e:
+        log.exception("Error fetching user playlists: %s", e)
+        return error(str(e), 500)
+
+
+# ============================================================================
+# HEALTH
+# ============================================================================
+
+async def async_pool_stats(request):
+    return JSONResponse({
+        'pool': {
+            'size': pool.size,
+            'idle': pool.freesize,
+            'in_use': pool.size - pool.freesize,
+            'max_size': pool.maxsize,
+        }
+    })
+
+
+app = Starlette(
+    routes=[
+        Route('/api/songs', get_songs, methods=['GET']),
+        Route('/api/song/{song_id:int}', get_song_details, methods=['GET']),
+        Route('/api/artists', get_artists, methods=['GET']),
+        Route('/api/artist/{artist_id:int}', get_artist_details, methods=['GET']),
+        Route('/api/playlists/{user_id:int}', get_playlists, methods=['GET']),
+        Route('/api/playlist/{playlist_id:int}', get_playlist_details, methods=['GET']),
+        Route('/api/favorites/songs/{user_id:int}', get_favorite_songs, methods=['GET']),
+        Route('/api/users/{user_id:int}/profile', get_user_profile, methods=['GET']),
+        Route('/api/users/{user_id:int}/playlists', get_user_playlists_public, methods=['GET']),
+        Route('/api/health/async-db', async_pool_stats, methods=['GET']),
+        # Everything else (writes, search, typeahead, health) is served by Flask
+        Mount('/', WSGIMiddleware(flask_app)),
+    ],
+    middleware=[Middleware(BaseHTTPMiddleware, dispatch=cors_headers)],
+    lifespan=lifespan,
+)
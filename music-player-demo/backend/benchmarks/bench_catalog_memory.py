@@ -0,0 +1,177 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - CATALOG WORKER MEMORY BENCHMARK
+# Purpose: Compare per-worker memory of serving the full song listing from
+#          the shared catalog snapshot (catalog_snapshot.py) against building
+#          it per request from driver rows, and against a private per-worker
+#          copy of the catalog. All workers are measured at the same moment,
+#          so PSS splits the shared snapshot pages between them.
+# Usage:   python benchmarks/bench_catalog_memory.py --songs 1000000 --workers 4
+#          python benchmarks/bench_catalog_memory.py --from-db --workers 4
+# Linux only (reads /proc/self/smaps_rollup).
+# ============================================================================
+
+import argparse
+import gc
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog_snapshot import CatalogSnapshot, build_from_db, write_snapshot  # noqa: E402
+from json_provider import FastJSONProvider  # noqa: E402
+from projections import SONG_ROW  # noqa: E402
+
+from flask import Flask  # noqa: E402
+
+COLUMNS = ['song_id', 'title', 'artist', 'duration', 'release_year']
+WORDS = ['Neon', 'Nights', 'Midnight', 'Engine', 'Glass', 'River', 'Orbiting', 'Paper', 'Kites',
+         'Electric', 'Dreams', 'Echoes', 'Thunder', 'Vinyl', 'Memories', 'Horizon', 'Autumn']
+
+
+def synthetic_catalog(songs, seed):
+    """(artists, songs) rows in listing order, as build_from_db would read them"""
+    rng = random.Random(seed)
+    artist_count = max(1, songs // 20)
+    artists = sorted(
+        ((artist_id, f"{rng.choice(WORDS)} {rng.choice(WORDS)} {artist_id}", None, datetime(2024, 1, 1))
+         for artist_id in range(1, artist_count + 1)),
+        key=lambda row: row[1])
+    rows = sorted(
+        ((song_id, rng.randint(1, artist_count),
+          ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 3))),
+          rng.randint(120, 300), rng.randint(1957, 2025))
+         for song_id in range(1, songs + 1)),
+        key=lambda row: (row[2], row[0]))
+    return artists, rows
+
+
+def memory():
+    """This process's memory in MiB: rss, pss, private"""
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'private': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+    }
+
+
+def query_rows(args):
+    """Driver-shaped dict rows for one full listing (what DictCursor.fetchall builds)"""
+    if args.from_db:
+        from seed import connect  # noqa: E402
+        conn = connect()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT {SONG_ROW.sql}
+                    FROM Songs S
+                    INNER JOIN Artists A ON S.artist_id = A.artist_id
+                    ORDER BY S.title ASC, S.song_id ASC
+                """)
+                return cursor.fetchall()
+        finally:
+            conn.close()
+    artists, songs = synthetic_catalog(args.songs, args.seed)
+    names = {artist_id: name for artist_id, name, _, _ in artists}
+    return [dict(zip(COLUMNS, (song_id, title, names[artist_id], duration, year)))
+            for song_id, artist_id, title, duration, year in songs]
+
+
+def worker(mode, args, path, ready, done, results):
+    json = FastJSONProvider(Flask('bench'))
+    baseline = memory()
+    held = None
+    busy = 0
+    for _ in range(args.requests):
+        if mode == 'snapshot':
+            snapshot = CatalogSnapshot(path)
+            rows = SONG_ROW.shape([dict(zip(COLUMNS, row)) for row in snapshot.songs()])
+        elif mode == 'query':
+            rows = SONG_ROW.shape(query_rows(args))
+        else:
+            if held is None:
+                held = SONG_ROW.shape(query_rows(args))
+            rows = held
+        body = json.dumps_bytes({'songs': rows})
+        # ru_maxrss survives exec (it would report the parent's peak), so
+        # sample RSS while the rows and the encoded body are both alive
+        busy = max(busy, memory()['rss'])
+        del rows, body
+    gc.collect()
+    if mode == 'snapshot':
+        # Keep the mapping (as a worker would) while everyone is measured
+        held = CatalogSnapshot(path)
+        held.songs()
+    ready.wait()
+    results.put((baseline, dict(memory(), busy=busy)))
+    done.wait()
+
+
+def run(mode, args, path):
+    # Fresh interpreters, so every worker starts from the same small baseline
+    context = multiprocessing.get_context('spawn')
+    ready = context.Barrier(args.workers)
+    done = context.Barrier(args.workers + 1)
+    results = context.Queue()
+    workers = [context.Process(target=worker, args=(mode, args, path, ready, done, results))
+               for _ in range(args.workers)]
+    for process in workers:
+        process.start()
+    measured = [results.get() for _ in workers]
+    done.wait()
+    for process in workers:
+        process.join()
+    return measured
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare worker memory: snapshot vs per-request query')
+    parser.add_argument('--songs', type=int, default=200_000, help='synthetic catalog size')
+    parser.add_argument('--from-db', action='store_true', help='use the MYSQL* database instead')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=3, help='full listings served per worker')
+    parser.add_argument('--modes', default='query,copy,snapshot')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'catalog.snapshot')
+        started = time.perf_counter()
+        if args.from_db:
+            from seed import connect  # noqa: E402
+            conn = connect()
+            try:
+                written = build_from_db(conn, path)
+            finally:
+                conn.close()
+        else:
+            written = write_snapshot(path, *synthetic_catalog(args.songs, args.seed))
+        print(f"snapshot: {written['songs']:,} songs, {written['bytes'] / 2 ** 20:.1f} MiB, "
+              f"built in {time.perf_counter() - started:.1f}s")
+
+        print(f"{'mode':<10} {'workers':>7} {'held RSS':>9} {'held PSS':>9} {'private':>9} "
+              f"{'busy RSS':>9} {'total PSS':>10}")
+        for mode in args.modes.split(','):
+            measured = run(mode, args, path)
+            count = len(measured)
+            avg = {key: sum(after[key] - before[base] for before, after in measured) / count
+                   for key, base in (('rss', 'rss'), ('pss', 'pss'), ('private', 'private'), ('busy', 'rss'))}
+            total_pss = sum(after['pss'] for _, after in measured)
+            print(f"{mode:<10} {count:>7} {avg['rss']:>9.1f} {avg['pss']:>9.1f} {avg['private']:>9.1f} "
+                  f"{avg['busy']:>9.1f} {total_pss:>10.1f}")
+        print("MiB per worker over its own baseline: held = after serving, busy = while a")
+        print("full listing is in flight; total PSS sums whole workers.")
+
+
+if __name__ == '__main__':
+    main()
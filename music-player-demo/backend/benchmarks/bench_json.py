@@ -0,0 +1,96 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - JSON SERIALIZATION BENCHMARK
+# Purpose: Compare Flask's stdlib JSON provider with json_provider's orjson
+#          path on song / favorite shaped rows, for dict rows (DictCursor)
+#          and tuple rows (shape=columns)
+# Usage:   python benchmarks/bench_json.py --rows 10000 --rows 100000
+# ============================================================================
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from json_provider import FastJSONProvider, orjson  # noqa: E402
+
+COLUMNS = ['song_id', 'title', 'artist', 'duration', 'release_year', 'favorited_at']
+
+
+def synthetic_rows(count, seed):
+    """Rows shaped like the favorites listing, including a DATETIME column"""
+    rng = random.Random(seed)
+    started = datetime(2024, 1, 1)
+    for song_id in range(1, count + 1):
+        yield (
+            song_id,
+            f"Song {rng.randint(0, 10 ** 6)}",
+            f"Artist {rng.randint(0, 5000)}",
+            f"{rng.randint(1, 7)}:{rng.randint(0, 59):02d}",
+            rng.randint(1960, 2024),
+            started + timedelta(seconds=rng.randint(0, 10 ** 8)),
+        )
+
+
+def best_of(repeat, fn):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSON response encoding')
+    parser.add_argument('--rows', type=int, action='append', help='row count, may be repeated')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    if orjson is None:
+        print('orjson is not installed; the fast provider would fall back to stdlib')
+
+    stdlib_app = Flask('bench-stdlib')
+    stdlib_app.json = DefaultJSONProvider(stdlib_app)
+    fast_app = Flask('bench-fast')
+    fast_app.json = FastJSONProvider(fast_app)
+    iso_app = Flask('bench-iso')
+    iso_app.json = FastJSONProvider(iso_app, datetime_format='iso')
+
+    cases = [
+        ('stdlib, dict rows', stdlib_app, 'dicts'),
+        ('fast, dict rows', fast_app, 'dicts'),
+        ('fast, tuple rows', fast_app, 'tuples'),
+        ('fast iso, dict rows', iso_app, 'dicts'),
+        ('fast iso, tuple rows', iso_app, 'tuples'),
+    ]
+
+    print(f"{'rows':>8} {'case':<22} {'build ms':>9} {'encode ms':>10} {'total ms':>9} {'MiB':>7}")
+    for count in args.rows or [10000, 100000]:
+        tuples = list(synthetic_rows(count, args.seed))
+        for name, app, shape in cases:
+            # Building the row container is what DictCursor vs Cursor costs
+            if shape == 'dicts':
+                build = lambda: [dict(zip(COLUMNS, row)) for row in tuples]  # noqa: E731
+            else:
+                build = lambda: list(tuples)  # noqa: E731
+            rows = build()
+            payload = {'songs': rows} if shape == 'dicts' else {'columns': COLUMNS, 'songs': rows}
+
+            with app.app_context():
+                build_ms = best_of(args.repeat, build)
+                encode_ms = best_of(args.repeat, lambda: app.json.response(payload).get_data())
+                size = len(app.json.response(payload).get_data())
+            print(f"{count:>8} {name:<22} {build_ms:>9.1f} {encode_ms:>10.1f} "
+                  f"{build_ms + encode_ms:>9.1f} {size / 2 ** 20:>7.2f}")
+
+
+if __name__ == '__main__':
+    main()
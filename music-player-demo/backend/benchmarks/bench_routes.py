@@ -0,0 +1,242 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - ROUTE MIX LOAD TEST
+# Purpose: Drive every app.py route with a realistic request mix against a
+#          seeded database and report throughput, p50/p95/p99 latency and SQL
+#          statements per request for each route
+# Usage:
+#   python benchmarks/seed.py --reset --songs 100000
+#   python benchmarks/bench_routes.py --spawn flask --workers 4 \
+#       --mix mixed --concurrency 64 --duration 60
+#   python benchmarks/bench_routes.py --base-url http://localhost:5000
+# Query counts come from /metrics (music_http_request_queries_total); with
+# several workers they are the ratio seen by the worker that answered.
+# ============================================================================
+
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+from bench_serving import percentile
+from seed import WORDS, connect, id_ranges
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def pick(rng, ids, table):
+    return rng.randint(1, max(1, ids[table]))
+
+
+# name -> (method, Flask rule, request builder returning (path, JSON body))
+ROUTES = {
+    'songs page': ('GET', '/api/songs',
+                   lambda rng, ids: ('/api/songs?limit=50', None)),
+    'song': ('GET', '/api/song/<int:song_id>',
+             lambda rng, ids: (f"/api/song/{pick(rng, ids, 'songs')}", None)),
+    'artists': ('GET', '/api/artists',
+                lambda rng, ids: ('/api/artists', None)),
+    'artist': ('GET', '/api/artist/<int:artist_id>',
+               lambda rng, ids: (f"/api/artist/{pick(rng, ids, 'artists')}", None)),
+    'playlist': ('GET', '/api/playlist/<int:playlist_id>',
+                 lambda rng, ids: (f"/api/playlist/{pick(rng, ids, 'playlists')}", None)),
+    'user playlists': ('GET', '/api/playlists/<int:user_id>',
+                       lambda rng, ids: (f"/api/playlists/{pick(rng, ids, 'users')}", None)),
+    'profile': ('GET', '/api/users/<int:user_id>/profile',
+                lambda rng, ids: (f"/api/users/{pick(rng, ids, 'users')}/profile", None)),
+    'public playlists': ('GET', '/api/users/<int:user_id>/playlists',
+                         lambda rng, ids: (f"/api/users/{pick(rng, ids, 'users')}/playlists?include=songs", None)),
+    'favorites': ('GET', '/api/favorites/songs/<int:user_id>',
+                  lambda rng, ids: (f"/api/favorites/songs/{pick(rng, ids, 'users')}", None)),
+    'search': ('GET', '/api/search',
+               lambda rng, ids: (f"/api/search?q={quote(rng.choice(WORDS).lower())}", None)),
+    'typeahead': ('GET', '/api/typeahead',
+                  lambda rng, ids: (f"/api/typeahead?q={rng.choice(WORDS)[:2].lower()}&type=artists", None)),
+    'user search': ('GET', '/api/users/search',
+                    lambda rng, ids: (f"/api/users/search?q={rng.choice(WORDS)[:3].lower()}", None)),
+    'chart': ('GET', '/api/charts/latest',
+              lambda rng, ids: ('/api/charts/latest', None)),
+    'chart history': ('GET', '/api/song/<int:song_id>/chart-history',
+                      lambda rng, ids: (f"/api/song/{rng.randint(1, min(ids['songs'], 200))}/chart-history", None)),
+    'toggle favorite': ('POST', '/api/favorites/song/toggle',
+                        lambda rng, ids: ('/api/favorites/song/toggle', {
+                            'user_id': pick(rng, ids, 'users'), 'song_id': pick(rng, ids, 'songs')})),
+    'add to playlist': ('POST', '/api/playlist/song/add',
+                        lambda rng, ids: ('/api/playlist/song/add', {
+                            'playlist_id': pick(rng, ids, 'playlists'), 'song_id': pick(rng, ids, 'songs')})),
+}
+
+# Relative weights; 'read' approximates browsing, 'mixed' adds the write taps
+MIXES = {
+    'read': {
+        'songs page': 10, 'song': 15, 'artists': 3, 'artist': 8, 'playlist': 15,
+        'user playlists': 8, 'profile': 8, 'public playlists': 4, 'favorites': 10,
+        'search': 8, 'typeahead': 8, 'user search': 3, 'chart': 3, 'chart history': 2,
+    },
+    'mixed': {
+        'songs page': 8, 'song': 12, 'artists': 2, 'artist': 6, 'playlist': 12,
+        'user playlists': 6, 'profile': 6, 'public playlists': 3, 'favorites': 8,
+        'search': 6, 'typeahead': 6, 'user search': 2, 'chart': 2, 'chart history': 1,
+        'toggle favorite': 15, 'add to playlist': 8,
+    },
+}
+
+_METRIC_LINE = re.compile(r'^(music_http_requests_total|music_http_request_queries_total)\{(.*)\} ([0-9.e+-]+)$')
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def scrape(base_url):
+    """{(method, rule): [requests, queries]} from the app's /metrics"""
+    parts = urlsplit(base_url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    try:
+        conn.request('GET', '/metrics')
+        response = conn.getresponse()
+        body = response.read().decode()
+    finally:
+        conn.close()
+    counts = {}
+    for line in body.splitlines():
+        match = _METRIC_LINE.match(line)
+        if not match:
+            continue
+        labels = dict(_LABEL.findall(match.group(2)))
+        entry = counts.setdefault((labels['method'], labels['route']), [0, 0])
+        entry[0 if match.group(1) == 'music_http_requests_total' else 1] += float(match.group(3))
+    return counts
+
+
+def run(base_url, mix, ids, concurrency, duration, seed):
+    parts = urlsplit(base_url)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    results = {name: {'latencies': [], 'errors': 0} for name in names}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(client_seed):
+        rng = random.Random(client_seed)
+        conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        local = {name: ([], [0]) for name in names}
+        while time.monotonic() < deadline:
+            name = rng.choices(names, weights)[0]
+            method, _, build = ROUTES[name]
+            path, body = build(rng, ids)
+            headers = {'Content-Type': 'application/json'} if body is not None else {}
+            started = time.perf_counter()
+            try:
+                conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 500:
+                    local[name][1][0] += 1
+                else:
+                    local[name][0].append((time.perf_counter() - started) * 1000)
+            except (OSError, http.client.HTTPException):
+                local[name][1][0] += 1
+                conn.close()
+                conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        conn.close()
+        with lock:
+            for name, (latencies, errors) in local.items():
+                results[name]['latencies'].extend(latencies)
+                results[name]['errors'] += errors[0]
+
+    threads = [threading.Thread(target=client, args=(seed + i,)) for i in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.monotonic() - started
+
+
+def spawn(server, workers, port):
+    """Start the app under gunicorn (flask) or uvicorn (asgi) and wait for it"""
+    if server == 'flask':
+        command = [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}', 'app:app']
+    else:
+        command = [sys.executable, '-m', 'uvicorn', 'asgi_app:app', '--port', str(port),
+                   '--workers', str(workers), '--log-level', 'warning']
+    env = dict(os.environ, LOG_LEVEL=os.getenv('LOG_LEVEL', 'WARNING'))
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+    for _ in range(100):
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/')
+            conn.getresponse().read()
+            conn.close()
+            return process
+        except OSError:
+            if process.poll() is not None:
+                raise SystemExit(f"{server} server exited with code {process.returncode}")
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit(f"{server} server did not start on port {port}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the API with a route mix')
+    parser.add_argument('--base-url', help='running server (default: spawn one)')
+    parser.add_argument('--spawn', choices=['flask', 'asgi'], default='flask')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--mix', choices=sorted(MIXES), default='read')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--warmup', type=float, default=5, help='seconds of unmeasured load first')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    conn = connect()
+    try:
+        ids = id_ranges(conn)
+    finally:
+        conn.close()
+    if not ids['songs']:
+        raise SystemExit('Database is empty - run benchmarks/seed.py first')
+
+    process = None
+    base_url = args.base_url
+    if base_url is None:
+        process = spawn(args.spawn, args.workers, args.port)
+        base_url = f'http://127.0.0.1:{args.port}'
+
+    try:
+        mix = MIXES[args.mix]
+        if args.warmup:
+            run(base_url, mix, ids, args.concurrency, args.warmup, args.seed + 10000)
+        before = scrape(base_url)
+        results, elapsed = run(base_url, mix, ids, args.concurrency, args.duration, args.seed)
+        after = scrape(base_url)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    print(f"{base_url}  mix={args.mix}  concurrency={args.concurrency}  {elapsed:.1f}s  ids={ids}")
+    print(f"{'route':<18} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} "
+          f"{'p95 ms':>8} {'p99 ms':>8} {'queries/req':>12}")
+    total = 0
+    for name in mix:
+        method, rule, _ = ROUTES[name]
+        latencies = sorted(results[name]['latencies'])
+        total += len(latencies)
+        requests_before, queries_before = before.get((method, rule), (0, 0))
+        requests_after, queries_after = after.get((method, rule), (0, 0))
+        served = requests_after - requests_before
+        per_request = f"{(queries_after - queries_before) / served:.2f}" if served else '-'
+        print(f"{name:<18} {len(latencies):>9} {results[name]['errors']:>7} {len(latencies) / elapsed:>8.1f} "
+              f"{percentile(latencies, 50):>8.1f} {percentile(latencies, 95):>8.1f} "
+              f"{percentile(latencies, 99):>8.1f} {per_request:>12}")
+    print(f"{'total':<18} {total:>9} {'':>7} {total / elapsed:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - SERVING MODE LOAD TEST
+# Purpose: Compare the Flask (gunicorn) and async (uvicorn) serving modes on
+#          the same routes at high concurrency
+# Usage:
+#   gunicorn -w 4 -b :5000 app:app
+#   uvicorn asgi_app:app --port 8000 --workers 4
+#   python benchmarks/bench_serving.py \
+#       --target flask=http://localhost:5000 --target asgi=http://localhost:8000 \
+#       --concurrency 200 --duration 30
+# ============================================================================
+
+import argparse
+import http.client
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = [
+    '/api/songs?limit=50',
+    '/api/song/1',
+    '/api/artists',
+    '/api/artist/1',
+    '/api/playlist/1',
+    '/api/users/1/profile',
+    '/api/users/1/playlists?include=songs',
+]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))
+    return sorted_values[index]
+
+
+def run_target(base_url, paths, concurrency, duration):
+    """Hammer `base_url` from `concurrency` keep-alive clients for `duration` seconds"""
+    parts = urlsplit(base_url)
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(seed):
+        rng = random.Random(seed)
+        conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        local = []
+        local_errors = 0
+        while time.monotonic() < deadline:
+            path = rng.choice(paths)
+            started = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 500:
+                    local_errors += 1
+                else:
+                    local.append((time.perf_counter() - started) * 1000)
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': len(latencies) / elapsed,
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare serving modes under load')
+    parser.add_argument('--target', action='append', required=True,
+                        help='name=base_url, may be repeated')
+    parser.add_argument('--path', action='append', help='route to request (default: read mix)')
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=30)
+    args = parser.parse_args()
+
+    paths = args.path or DEFAULT_PATHS
+    print(f"{'target':<10} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for target in args.target:
+        name, _, url = target.partition('=')
+        result = run_target(url, paths, args.concurrency, args.duration)
+        print(f"{name:<10} {result['requests']:>9} {result['errors']:>7} {result['rps']:>9.1f} "
+              f"{result['p50']:>8.1f} {result['p95']:>8.1f} {result['p99']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - TYPEAHEAD BENCHMARK
+# Purpose: Measure build time, memory footprint and completion latency of
+#          typeahead.PrefixIndex at production-like scale
+# Usage:   python benchmarks/bench_typeahead.py --users 1000000
+# ============================================================================
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typeahead import PrefixIndex  # noqa: E402
+
+SYLLABLES = ['ka', 'ri', 'mo', 'lu', 'zen', 'ta', 'vi', 'no', 'el', 'sa', 'dro', 'me', 'ja', 'xo']
+
+
+def synthetic_usernames(count, seed):
+    """Pronounceable usernames with a numeric suffix, like real signups"""
+    rng = random.Random(seed)
+    for user_id in range(1, count + 1):
+        stem = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        yield user_id, f"{stem}{rng.randint(0, 9999)}"
+
+
+def percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))
+    return sorted_values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=100_000)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    index = PrefixIndex()
+    started = time.perf_counter()
+    index.build(synthetic_usernames(args.users, args.seed))
+    build_s = time.perf_counter() - started
+
+    print(f"Users:           {args.users:,}")
+    print(f"Build time:      {build_s:.2f}s")
+    print(f"Memory:          {index.memory_bytes() / 1024 / 1024:.1f} MiB")
+
+    rng = random.Random(args.seed + 1)
+    prefixes = [
+        rng.choice(SYLLABLES) + ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(0, 2)))
+        for _ in range(args.queries)
+    ]
+    timings = []
+    for prefix in prefixes:
+        started = time.perf_counter()
+        index.complete(prefix, args.k)
+        timings.append((time.perf_counter() - started) * 1_000_000)
+    timings.sort()
+
+    print(f"Queries:         {args.queries:,} (top-{args.k})")
+    print(f"Latency p50:     {percentile(timings, 50):.1f}us")
+    print(f"Latency p95:     {percentile(timings, 95):.1f}us")
+    print(f"Latency p99:     {percentile(timings, 99):.1f}us")
+
+    started = time.perf_counter()
+    for user_id in range(1, 1001):
+        index.update(user_id, f"renamed{user_id}")
+    print(f"Rename (update): {(time.perf_counter() - started) * 1000:.3f}ms per 1000")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - SYNTHETIC CATALOG SEEDER
+# Purpose: Fill a MySQL database with a reproducible catalog shaped like
+#          sql/02_insert_sample_data.sql - artists, songs, users, playlists,
+#          favorites and Billboard chart weeks - at any scale from 10k to
+#          10M songs, for the route benchmarks in bench_routes.py
+# Usage:
+#   docker run -d -p 3306:3306 -e MYSQL_ROOT_PASSWORD=bench mysql:8
+#   MYSQLPASSWORD=bench MYSQLDATABASE=music_bench \
+#       python benchmarks/seed.py --reset --songs 100000
+# Connection settings are read from the same MYSQL* variables as app.py.
+# ============================================================================
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import pymysql
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import profile_stats  # noqa: E402
+from charts import ChartStore  # noqa: E402
+from playlist_order import spaced_keys  # noqa: E402
+
+SQL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'sql')
+SCHEMA_FILES = [
+    '01_create_tables.sql',
+    '05_profile_counters.sql',
+    '06_covering_indexes.sql',
+    '07_favorite_songs.sql',
+    '08_playlist_order_gaps.sql',
+    '09_ingest_checkpoints.sql',
+    '10_plays.sql',
+    '11_row_versions.sql',
+    '12_song_lyrics.sql',
+]
+
+# Genres and playlist colours from the sample data
+GENRES = ['Synth-pop', 'Rock', 'Ambient', 'Indie Folk', 'Lo-fi Hip-hop', 'Synthwave', 'Post-rock',
+          'Pop', 'Rockabilly', 'Rock and Roll', 'R&B', 'Hip-hop', 'Country', 'Electronic', 'Jazz']
+COLORS = ['#a855f7', '#10b981', '#f59e0b', '#ef4444', '#3b82f6']
+WORDS = ['Neon', 'Nights', 'Midnight', 'Engine', 'Glass', 'River', 'Orbiting', 'Paper', 'Kites',
+         'Electric', 'Dreams', 'Echoes', 'Thunder', 'Vinyl', 'Memories', 'Horizon', 'Autumn',
+         'Whispers', 'Retro', 'Future', 'Aurora', 'Garden', 'Coffee', 'Blues', 'Last', 'Christmas',
+         'Golden', 'Hour', 'Velvet', 'Storm', 'Ember', 'Falls', 'Cosmic', 'Lantern', 'Wave', 'Pine']
+SYLLABLES = ['ka', 'ri', 'mo', 'lu', 'zen', 'ta', 'vi', 'no', 'el', 'sa', 'dro', 'me', 'ja', 'xo']
+
+BATCH = 5000
+
+
+def connect(database=True):
+    config = {
+        'host': os.getenv('MYSQLHOST', 'localhost'),
+        'port': int(os.getenv('MYSQLPORT', 3306)),
+        'user': os.getenv('MYSQLUSER', 'root'),
+        'password': os.getenv('MYSQLPASSWORD', 'MySecret123'),
+        'cursorclass': pymysql.cursors.DictCursor,
+        'autocommit': False,
+    }
+    if database:
+        config['database'] = os.getenv('MYSQLDATABASE', 'music_player_db')
+    return pymysql.connect(**config)
+
+
+def sql_statements(path, database):
+    """Split a schema file into statements, retargeted at `database`"""
+    with open(path, encoding='utf-8') as f:
+        text = f.read().replace('music_player_db', database)
+    lines = [line for line in text.splitlines() if not line.lstrip().startswith('--')]
+    for statement in '\n'.join(lines).split(';\n'):
+        statement = statement.strip().rstrip(';')
+        if statement:
+            yield statement
+
+
+def reset_schema(database):
+    """Drop and recreate `database` from the numbered schema files"""
+    conn = connect(database=False)
+    try:
+        with conn.cursor() as cursor:
+            for name in SCHEMA_FILES:
+                for statement in sql_statements(os.path.join(SQL_DIR, name), database):
+                    cursor.execute(statement)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def insert_rows(conn, sql, rows, label, total):
+    """executemany in BATCH-sized multi-row statements, printing progress"""
+    started = time.monotonic()
+    done = 0
+    batch = []
+    with conn.cursor() as cursor:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= BATCH:
+                cursor.executemany(sql, batch)
+                conn.commit()
+                done += len(batch)
+                batch.clear()
+                print(f"\r  {label}: {done:,}/{total:,}", end='', flush=True)
+        if batch:
+            cursor.executemany(sql, batch)
+            conn.commit()
+            done += len(batch)
+    print(f"\r  {label}: {done:,} rows in {time.monotonic() - started:.1f}s")
+    return done
+
+
+def title(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def popular_song(rng, songs):
+    """Skewed song pick: low ids are the hits, like real listening"""
+    return int(songs * rng.random() ** 3) + 1
+
+
+def seed(conn, args):
+    rng = random.Random(args.seed)
+    with conn.cursor() as cursor:
+        cursor.execute("SET foreign_key_checks = 0, unique_checks = 0")
+
+    artists = max(1, args.songs // 20)
+    insert_rows(conn, """
+        INSERT INTO Artists (name, bio) VALUES (%s, %s)
+    """, ((f"{title(rng, 2)} {n}", f"Synthetic artist {n}.") for n in range(1, artists + 1)),
+        'artists', artists)
+
+    insert_rows(conn, """
+        INSERT INTO Songs (artist_id, title, duration, genre, release_year, lyrics) VALUES (%s, %s, %s, %s, %s, %s)
+    """, ((rng.randint(1, artists), title(rng, rng.randint(1, 3)), rng.randint(120, 300),
+           rng.choice(GENRES), rng.randint(1957, 2025),
+           title(rng, 12) if rng.random() < args.lyrics_ratio else None)
+          for _ in range(args.songs)),
+        'songs', args.songs)
+
+    users = args.users or max(1, args.songs // 10)
+    insert_rows(conn, """
+        INSERT INTO Users (email, username, password_hash) VALUES (%s, %s, %s)
+    """, ((f"user{n}@bench.local",
+           ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) + str(n),
+           'bench-not-a-real-hash')
+          for n in range(1, users + 1)),
+        'users', users)
+
+    playlists = users * args.playlists_per_user
+    insert_rows(conn, """
+        INSERT INTO Playlists (user_id, name, description, color_hex) VALUES (%s, %s, %s, %s)
+    """, ((n // args.playlists_per_user + 1, title(rng, 2), 'Synthetic playlist', rng.choice(COLORS))
+          for n in range(playlists)),
+        'playlists', playlists)
+
+    def playlist_songs():
+        for playlist_id in range(1, playlists + 1):
+            size = rng.randint(0, 2 * args.songs_per_playlist)
+            picked = {popular_song(rng, args.songs) for _ in range(size)}
+            for track_order, song_id in zip(spaced_keys(len(picked)), picked):
+                yield playlist_id, song_id, track_order
+    insert_rows(conn, """
+        INSERT INTO Playlist_Songs (playlist_id, song_id, track_order) VALUES (%s, %s, %s)
+    """, playlist_songs(), 'playlist songs', playlists * args.songs_per_playlist)
+
+    def favorites():
+        for user_id in range(1, users + 1):
+            for song_id in {popular_song(rng, args.songs) for _ in range(rng.randint(0, 2 * args.favorites_per_user))}:
+                yield user_id, song_id
+    insert_rows(conn, """
+        INSERT INTO Favorite_Songs (user_id, song_id) VALUES (%s, %s)
+    """, favorites(), 'favorites', users * args.favorites_per_user)
+
+    # Chart weeks ending today; ChartStore derives last_week / weeks_on_chart
+    store = ChartStore()
+    start = date.today() - timedelta(weeks=args.chart_weeks - 1)
+    weeks = []
+    current = rng.sample(range(1, min(args.songs, 200) + 1), min(10, args.songs))
+    for week in range(args.chart_weeks):
+        if week:
+            current = current[:]
+            rng.shuffle(current)
+            current[-1] = popular_song(rng, min(args.songs, 200))
+            current = list(dict.fromkeys(current))
+        weeks.append((start + timedelta(weeks=week), current))
+    snapshots = store.plan(weeks)
+    insert_rows(conn, """
+        INSERT INTO Billboard_Top_Songs (song_id, `rank`, last_week, weeks_on_chart, chart_date) VALUES (%s, %s, %s, %s, %s)
+    """, ((song_id, i + 1, snapshot.last_week[i] or None, snapshot.weeks_on_chart[i],
+           date.fromordinal(snapshot.chart_date))
+          for snapshot in snapshots for i, song_id in enumerate(snapshot.song_ids)),
+        'chart entries', sum(len(snapshot.song_ids) for snapshot in snapshots))
+
+    with conn.cursor() as cursor:
+        cursor.execute("SET foreign_key_checks = 1, unique_checks = 1")
+    print("  profile counters:", profile_stats.reconcile(conn))
+
+
+def id_ranges(conn):
+    """Largest id per table, so the load driver can pick existing rows"""
+    ranges = {}
+    with conn.cursor() as cursor:
+        for table, column in (('Songs', 'song_id'), ('Artists', 'artist_id'),
+                              ('Users', 'user_id'), ('Playlists', 'playlist_id')):
+            cursor.execute(f"SELECT COALESCE(MAX({column}), 0) AS max_id FROM {table}")
+            ranges[table.lower()] = cursor.fetchone()['max_id']
+    return ranges
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed a benchmark database')
+    parser.add_argument('--reset', action='store_true',
+                        help='drop and recreate MYSQLDATABASE from sql/ first')
+    parser.add_argument('--songs', type=int, default=10000)
+    parser.add_argument('--users', type=int, help='default: songs / 10')
+    parser.add_argument('--playlists-per-user', type=int, default=3)
+    parser.add_argument('--songs-per-playlist', type=int, default=20, help='average')
+    parser.add_argument('--favorites-per-user', type=int, default=15, help='average')
+    parser.add_argument('--chart-weeks', type=int, default=52)
+    parser.add_argument('--lyrics-ratio', type=float, default=0.3)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    database = os.getenv('MYSQLDATABASE', 'music_player_db')
+    if args.reset:
+        print(f"🧱 Recreating schema in {database}")
+        reset_schema(database)
+
+    print(f"🌱 Seeding {database} with {args.songs:,} songs")
+    conn = connect()
+    try:
+        seed(conn, args)
+        print("✅ Done:", id_ranges(conn))
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
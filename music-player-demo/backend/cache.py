@@ -0,0 +1,144 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - READ-THROUGH RESPONSE CACHE
+# Purpose: Keep rendered catalog responses (artists, songs) in process memory
+#          so repeated reads do not hit MySQL
+# ============================================================================
+
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, request
+
+
+class ResponseCache:
+    """
+    TTL + LRU cache bounded by entry count and total bytes.
+
+    Every entry carries a set of tags (e.g. 'songs', 'artist:3') so writes can
+    evict exactly the keys they affect via `invalidate()`. The cache is local
+    to one worker process; `ttl` bounds how stale other workers can get.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=32 * 1024 * 1024, ttl=60.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (expires_at, size, value, tags)
+        self._tags = {}                 # tag -> set of keys
+        self._bytes = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def get(self, key):
+        """Return the cached value for `key`, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[2]
+
+    def set(self, key, value, size, tags=()):
+        """Store `value` (accounted as `size` bytes) under `key`"""
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, value, frozenset(tags))
+            self._bytes += size
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def invalidate(self, *tags):
+        """Evict every entry carrying any of `tags`"""
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+                    self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': round(self._hits / lookups, 4) if lookups else None,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'invalidations': self._invalidations,
+            }
+
+    def _remove(self, key):
+        _, size, _, tags = self._entries.pop(key)
+        self._bytes -= size
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+def cached(cache, *tags):
+    """
+    Cache successful JSON responses of a GET view.
+
+    The key is the request path plus its sorted query string. Tags may use
+    the view's URL parameters, e.g. @cached(cache, 'artist:{artist_id}').
+    Error and streamed responses are never stored.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            key = (request.path, tuple(sorted(request.args.items(multi=True))))
+            hit = cache.get(key)
+            if hit is not None:
+                body, mimetype = hit
+                response = Response(body, mimetype=mimetype)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            result = view(**kwargs)
+            response = result[0] if isinstance(result, tuple) else result
+            status = result[1] if isinstance(result, tuple) and len(result) > 1 else response.status_code
+            if status == 200 and isinstance(response, Response) and not response.is_streamed:
+                body = response.get_data()
+                cache.set(key, (body, response.mimetype), len(body),
+                          [tag.format(**kwargs) for tag in tags])
+                response.headers['X-Cache'] = 'MISS'
+            return result
+        return wrapper
+    return decorator
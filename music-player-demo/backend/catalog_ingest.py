@@ -0,0 +1,324 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - BULK CATALOG INGESTION
+# Purpose: Stream CSV or JSONL catalog feeds into Artists and Songs in large
+#          chunks: artists are deduplicated on the Artists.name unique key and
+#          resolved to ids a chunk at a time, songs go in as multi-row INSERTs
+#          (or LOAD DATA LOCAL INFILE), and each chunk commits together with
+#          its Ingest_Checkpoints row so an interrupted feed resumes exactly
+#          where it stopped (sql/09_ingest_checkpoints.sql)
+# Feed:    title, artist, duration (seconds or m:ss), genre, release_year, bio
+# ============================================================================
+
+import csv
+import io
+import json
+import os
+import tempfile
+import time
+
+# Column limits from sql/01_create_tables.sql
+MAX_NAME = 255
+MAX_TITLE = 255
+MAX_GENRE = 100
+MAX_TEXT_BYTES = 65535        # TEXT
+MAX_INT = 2 ** 31 - 1         # signed INT
+MAX_YEAR = 9999
+
+# Rejected records reported back in full; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+
+class IngestError(ValueError):
+    """A feed record that cannot be loaded"""
+
+    def __init__(self, record_number, message):
+        super().__init__(f"record {record_number}: {message}")
+        self.record_number = record_number
+
+
+def feed_format(filename, default='csv'):
+    """'csv' or 'jsonl' from a file name"""
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension in ('.jsonl', '.ndjson', '.json'):
+        return 'jsonl'
+    if extension in ('.csv', '.tsv'):
+        return 'csv'
+    return default
+
+
+def read_records(stream, fmt):
+    """Yield raw records (dicts) from a text stream"""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    elif fmt == 'jsonl':
+        for line in stream:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    yield e
+    else:
+        raise ValueError(f"Unknown feed format {fmt!r}, expected csv or jsonl")
+
+
+def parse_duration(value):
+    """Seconds from an int, '245' or 'm:ss' / 'h:mm:ss'"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        seconds = value
+    else:
+        text = str(value).strip()
+        parts = text.split(':')
+        if not text or not all(part.isdigit() for part in parts) or len(parts) > 3:
+            raise ValueError(f"invalid duration {value!r}")
+        seconds = 0
+        for part in parts:
+            seconds = seconds * 60 + int(part)
+    if not 0 <= seconds <= MAX_INT:
+        raise ValueError(f"invalid duration {value!r}")
+    return seconds
+
+
+def parse_year(value):
+    """Release year from an int or a digit string, None when empty"""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    if isinstance(value, int) and not isinstance(value, bool):
+        year = value
+    elif isinstance(value, str) and value.strip().isdigit():
+        year = int(value)
+    else:
+        raise ValueError(f"invalid release_year {value!r}")
+    if not 0 < year <= MAX_YEAR:
+        raise ValueError(f"invalid release_year {value!r}")
+    return year
+
+
+def _text(record, field, limit, required=False):
+    value = record.get(field)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        if required:
+            raise ValueError(f"{field} is required")
+        return None
+    value = str(value).strip()
+    if len(value) > limit:
+        raise ValueError(f"{field} is longer than {limit} characters")
+    return value
+
+
+def clean_record(record, record_number):
+    """(artist, title, duration, genre, release_year, bio) or IngestError"""
+    if isinstance(record, Exception):
+        raise IngestError(record_number, f"unreadable line ({record})")
+    if not isinstance(record, dict):
+        raise IngestError(record_number, "expected an object")
+    try:
+        artist = _text(record, 'artist', MAX_NAME, required=True)
+        title = _text(record, 'title', MAX_TITLE, required=True)
+        if record.get('duration') in (None, ''):
+            raise ValueError("duration is required")
+        duration = parse_duration(record['duration'])
+        genre = _text(record, 'genre', MAX_GENRE)
+        release_year = parse_year(record.get('release_year'))
+        bio = record.get('bio') or None
+        if bio is not None:
+            if not isinstance(bio, str):
+                raise ValueError("bio must be text")
+            if len(bio.encode('utf-8')) > MAX_TEXT_BYTES:
+                raise ValueError(f"bio is longer than {MAX_TEXT_BYTES} bytes")
+    except (TypeError, ValueError) as e:
+        raise IngestError(record_number, str(e)) from None
+    return artist, title, duration, genre, release_year, bio
+
+
+class CatalogIngester:
+    """
+    Load a feed through one connection in `chunk_size` record transactions.
+
+    With a `source` name, progress is checkpointed in Ingest_Checkpoints in
+    the same transaction as each chunk, and a rerun of the same source skips
+    the records already committed. `method` is 'insert' (multi-row INSERTs,
+    works everywhere) or 'load-data' (LOAD DATA LOCAL INFILE; needs
+    local_infile on both the connection and the server).
+    """
+
+    def __init__(self, conn, chunk_size=10000, method='insert', source=None,
+                 skip_invalid=True, progress=None):
+        if method not in ('insert', 'load-data'):
+            raise ValueError(f"Unknown method {method!r}, expected insert or load-data")
+        self.conn = conn
+        self.chunk_size = chunk_size
+        self.method = method
+        self.source = source
+        self.skip_invalid = skip_invalid
+        self.progress = progress
+        self._artist_ids = {}         # casefolded name -> artist_id
+        self.stats = {
+            'records': 0, 'skipped': 0, 'songs': 0, 'artists_created': 0,
+            'rejected': 0, 'errors': [], 'chunks': 0, 'seconds': 0.0,
+        }
+
+    # -- checkpoints ----------------------------------------------------------
+
+    def checkpoint(self, cursor):
+        cursor.execute("""
+            SELECT records_done, completed_at FROM Ingest_Checkpoints
+            WHERE source = %s
+        """, (self.source,))
+        return cursor.fetchone()
+
+    def reset_checkpoint(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute("""
+                DELETE FROM Ingest_Checkpoints
+                WHERE source = %s
+            """, (self.source,))
+        self.conn.commit()
+
+    def _save_checkpoint(self, cursor, records_done, completed=False):
+        cursor.execute("""
+            INSERT INTO Ingest_Checkpoints (source, records_done, songs_inserted, artists_created, completed_at)
+            VALUES (%s, %s, %s, %s, IF(%s, CURRENT_TIMESTAMP, NULL))
+            ON DUPLICATE KEY UPDATE
+                records_done = VALUES(records_done),
+                songs_inserted = songs_inserted + VALUES(songs_inserted),
+                artists_created = artists_created + VALUES(artists_created),
+                completed_at = VALUES(completed_at)
+        """, (self.source, records_done, self._chunk_songs, self._chunk_artists, completed))
+
+    # -- pipeline -------------------------------------------------------------
+
+    def run(self, records):
+        """Ingest an iterable of raw records; returns the stats dict"""
+        started = time.monotonic()
+        skip = 0
+        if self.source:
+            with self.conn.cursor() as cursor:
+                saved = self.checkpoint(cursor)
+            if saved:
+                skip = saved['records_done']
+                self.stats['skipped'] = skip
+
+        chunk = []
+        position = 0
+        for position, record in enumerate(records, start=1):
+            if position <= skip:
+                continue
+            try:
+                chunk.append(clean_record(record, position))
+            except IngestError as e:
+                if not self.skip_invalid:
+                    raise
+                self.stats['rejected'] += 1
+                if len(self.stats['errors']) < MAX_REPORTED_ERRORS:
+                    self.stats['errors'].append(str(e))
+            if position - skip - self.stats['records'] >= self.chunk_size:
+                self._write_chunk(chunk, position)
+                chunk = []
+
+        self._write_chunk(chunk, max(position, skip), completed=True)
+        self.stats['seconds'] = round(time.monotonic() - started, 3)
+        return self.stats
+
+    def _write_chunk(self, rows, position, completed=False):
+        """Write one chunk and its checkpoint in a single transaction"""
+        self._chunk_songs = 0
+        self._chunk_artists = 0
+        try:
+            with self.conn.cursor() as cursor:
+                if rows:
+                    artist_ids = self._resolve_artists(cursor, rows)
+                    songs = [(artist_ids[artist.casefold()], title, duration, genre, release_year)
+                             for artist, title, duration, genre, release_year, _ in rows]
+                    if self.method == 'load-data':
+                        self._load_data(cursor, songs)
+                    else:
+                        cursor.executemany("""
+                            INSERT INTO Songs (artist_id, title, duration, genre, release_year)
+                            VALUES (%s, %s, %s, %s, %s)
+                        """, songs)
+                    self._chunk_songs = len(songs)
+                if self.source:
+                    self._save_checkpoint(cursor, position, completed)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+        self.stats['records'] = position - self.stats['skipped']
+        self.stats['songs'] += self._chunk_songs
+        self.stats['artists_created'] += self._chunk_artists
+        self.stats['chunks'] += 1
+        if self.progress is not None:
+            self.progress(self.stats)
+
+    def _resolve_artists(self, cursor, rows):
+        """
+        Ids for every artist in the chunk: unseen names are inserted with
+        INSERT IGNORE (the unique key drops existing ones), then all of them
+        are read back with one IN query.
+        """
+        wanted = {}
+        for artist, _, _, _, _, bio in rows:
+            key = artist.casefold()
+            if key not in self._artist_ids and key not in wanted:
+                wanted[key] = (artist, bio)
+        if not wanted:
+            return self._artist_ids
+
+        cursor.executemany("""
+            INSERT IGNORE INTO Artists (name, bio)
+            VALUES (%s, %s)
+        """, list(wanted.values()))
+        self._chunk_artists = max(cursor.rowcount, 0)
+
+        names = [artist for artist, _ in wanted.values()]
+        placeholders = ', '.join(['%s'] * len(names))
+        cursor.execute(f"""
+            SELECT artist_id, name FROM Artists
+            WHERE name IN ({placeholders})
+        """, names)
+        for row in cursor.fetchall():
+            self._artist_ids[row['name'].casefold()] = row['artist_id']
+
+        # The column collation may equate names casefold() does not
+        # (accents, trailing spaces); look those up one by one
+        for key, (artist, _) in wanted.items():
+            if key not in self._artist_ids:
+                cursor.execute("""
+                    SELECT artist_id FROM Artists
+                    WHERE name = %s
+                """, (artist,))
+                self._artist_ids[key] = cursor.fetchone()['artist_id']
+        return self._artist_ids
+
+    def _load_data(self, cursor, songs):
+        """Bulk-load a chunk from a temporary tab-separated file"""
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.tsv', delete=False) as f:
+            path = f.name
+            for row in songs:
+                f.write('\t'.join(_tsv_field(value) for value in row))
+                f.write('\n')
+        try:
+            cursor.execute("""
+                LOAD DATA LOCAL INFILE %s
+                INTO TABLE Songs
+                CHARACTER SET utf8mb4
+                FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'
+                LINES TERMINATED BY '\\n'
+                (artist_id, title, duration, genre, release_year)
+            """, (path,))
+        finally:
+            os.unlink(path)
+
+
+def _tsv_field(value):
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def text_stream(binary):
+    """Decode a binary upload stream as UTF-8 (a leading BOM is dropped)"""
+    return io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
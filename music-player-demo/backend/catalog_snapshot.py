@@ -0,0 +1,427 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - MEMORY-MAPPED CATALOG SNAPSHOT
+# Purpose: Write Songs + Artists once into a compact binary file (fixed-width
+#          columns plus one interned string table) that every gunicorn worker
+#          maps read-only, so the catalog pages are shared by all workers
+#          instead of each holding or re-querying its own copy. A rebuild
+#          writes a new file and renames it over the old one; workers notice
+#          the new inode and remap.
+# Config:  CATALOG_SNAPSHOT_PATH, CATALOG_SNAPSHOT_CHECK_INTERVAL,
+#          CATALOG_SNAPSHOT_MAX_AGE (see app.py)
+# ============================================================================
+
+import fcntl
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+import pymysql
+
+MAGIC = b'MPCS'
+FORMAT_VERSION = 1
+
+# magic, format version, generation (ns), songs, artists, strings, blob bytes
+_HEADER = struct.Struct('<4sIqIIIQ')
+
+NULL_INT = -2 ** 31
+NULL_STRING = 2 ** 32 - 1
+NULL_TIME = -2 ** 63
+_EPOCH = datetime(1970, 1, 1)
+
+# Section layout: (name, typecode, length key); lengths are song / artist /
+# string counts. Every section starts on an 8-byte boundary.
+_SECTIONS = [
+    ('song_ids', 'i', 'songs'),          # listing order (title, song_id)
+    ('song_artist', 'i', 'songs'),       # row in the artist sections
+    ('song_title', 'I', 'songs'),        # string id
+    ('song_duration', 'i', 'songs'),
+    ('song_year', 'i', 'songs'),
+    ('song_index_ids', 'i', 'songs'),    # song ids ascending ...
+    ('song_index_rows', 'i', 'songs'),   # ... and their listing row
+    ('artist_ids', 'i', 'artists'),      # listing order (name)
+    ('artist_name', 'I', 'artists'),
+    ('artist_bio', 'I', 'artists'),
+    ('artist_created', 'q', 'artists'),  # seconds since 1970 (naive, as stored)
+    ('artist_index_ids', 'i', 'artists'),
+    ('artist_index_rows', 'i', 'artists'),
+    ('string_offsets', 'Q', 'offsets'),  # strings + 1 offsets into the blob
+]
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _layout(counts):
+    """{section: (offset, typecode, length)} and the offset of the string blob"""
+    offset = _align(_HEADER.size)
+    layout = {}
+    for name, typecode, key in _SECTIONS:
+        length = counts[key]
+        layout[name] = (offset, typecode, length)
+        offset = _align(offset + length * array(typecode).itemsize)
+    return layout, offset
+
+
+def _to_seconds(value):
+    return NULL_TIME if value is None else int((value - _EPOCH).total_seconds())
+
+
+def _from_seconds(value):
+    return None if value == NULL_TIME else _EPOCH + timedelta(seconds=value)
+
+
+# ----------------------------------------------------------------------------
+# Writing
+# ----------------------------------------------------------------------------
+
+def write_snapshot(path, artists, songs, generation=None):
+    """
+    Write a snapshot to `path`, replacing any existing one atomically.
+
+    artists: (artist_id, name, bio, created_at) rows in listing order (name)
+    songs:   (song_id, artist_id, title, duration, release_year) rows in
+             listing order (title, song_id); songs of unknown artists are skipped
+    Returns the header counts.
+    """
+    strings = {}
+
+    def intern(value):
+        if value is None:
+            return NULL_STRING
+        string_id = strings.get(value)
+        if string_id is None:
+            string_id = strings[value] = len(strings)
+        return string_id
+
+    columns = {name: array(typecode) for name, typecode, _ in _SECTIONS}
+    artist_rows = {}
+    for artist_id, name, bio, created_at in artists:
+        artist_rows[artist_id] = len(columns['artist_ids'])
+        columns['artist_ids'].append(artist_id)
+        columns['artist_name'].append(intern(name))
+        columns['artist_bio'].append(intern(bio))
+        columns['artist_created'].append(_to_seconds(created_at))
+
+    for song_id, artist_id, title, duration, release_year in songs:
+        artist_row = artist_rows.get(artist_id)
+        if artist_row is None:
+            continue
+        columns['song_ids'].append(song_id)
+        columns['song_artist'].append(artist_row)
+        columns['song_title'].append(intern(title))
+        columns['song_duration'].append(NULL_INT if duration is None else duration)
+        columns['song_year'].append(NULL_INT if release_year is None else release_year)
+
+    for ids, index_ids, index_rows in (('song_ids', 'song_index_ids', 'song_index_rows'),
+                                       ('artist_ids', 'artist_index_ids', 'artist_index_rows')):
+        for row, item_id in sorted(enumerate(columns[ids]), key=lambda pair: pair[1]):
+            columns[index_ids].append(item_id)
+            columns[index_rows].append(row)
+
+    blob = bytearray()
+    offsets = columns['string_offsets']
+    offsets.append(0)
+    for value in strings:               # dicts keep insertion (= string id) order
+        blob += value.encode('utf-8')
+        offsets.append(len(blob))
+
+    counts = {'songs': len(columns['song_ids']), 'artists': len(columns['artist_ids']),
+              'offsets': len(offsets)}
+    layout, blob_offset = _layout(counts)
+    generation = generation or time.time_ns()
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, generation, counts['songs'],
+                             counts['artists'], len(strings), len(blob)))
+        for name, _, _ in _SECTIONS:
+            f.seek(layout[name][0])
+            column = columns[name]
+            if sys.byteorder != 'little':
+                column.byteswap()
+            f.write(column.tobytes())
+        f.seek(blob_offset)
+        f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return {'generation': generation, 'songs': counts['songs'], 'artists': counts['artists'],
+            'strings': len(strings), 'bytes': blob_offset + len(blob)}
+
+
+def build_from_db(conn, path):
+    """Snapshot the catalog in the same order the SQL listings use"""
+    # The generation is taken before a fresh read view opens, so it never
+    # postdates a write this snapshot does not contain (see mark_stale)
+    conn.commit()
+    generation = time.time_ns()
+    artists_cursor = conn.cursor(pymysql.cursors.Cursor)
+    artists_cursor.execute("""
+        SELECT artist_id, name, bio, created_at FROM Artists
+        ORDER BY name ASC
+    """)
+    artists = artists_cursor.fetchall()
+    artists_cursor.close()
+
+    songs_cursor = conn.cursor(pymysql.cursors.SSCursor)
+    try:
+        songs_cursor.execute("""
+            SELECT S.song_id, S.artist_id, S.title, S.duration, S.release_year
+            FROM Songs S
+            INNER JOIN Artists A ON S.artist_id = A.artist_id
+            ORDER BY S.title ASC, S.song_id ASC
+        """)
+        return write_snapshot(path, artists, songs_cursor, generation)
+    finally:
+        songs_cursor.close()
+
+
+# ----------------------------------------------------------------------------
+# Reading
+# ----------------------------------------------------------------------------
+
+class CatalogSnapshot:
+    """
+    A mapped snapshot. Columns are zero-copy memoryviews over the mapping;
+    strings are decoded only for the rows a request returns.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.identity = (stat.st_dev, stat.st_ino, stat.st_mtime_ns)
+        magic, version, self.generation, songs, artists, strings, blob_size = \
+            _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f'{path} is not a version {FORMAT_VERSION} catalog snapshot')
+        if sys.byteorder != 'little':
+            raise ValueError('Catalog snapshots are little-endian only')
+
+        self.song_count = songs
+        self.artist_count = artists
+        self.string_count = strings
+        layout, blob_offset = _layout({'songs': songs, 'artists': artists, 'offsets': strings + 1})
+        view = memoryview(self._map)
+        for name, (offset, typecode, length) in layout.items():
+            size = array(typecode).itemsize
+            setattr(self, name, view[offset:offset + length * size].cast(typecode))
+        self._blob = view[blob_offset:blob_offset + blob_size]
+        self.size = len(self._map)
+
+    def string(self, string_id):
+        if string_id == NULL_STRING:
+            return None
+        return str(self._blob[self.string_offsets[string_id]:self.string_offsets[string_id + 1]], 'utf-8')
+
+    def _strings(self, string_ids):
+        offsets = self.string_offsets
+        blob = self._blob
+        return [None if string_id == NULL_STRING
+                else str(blob[offsets[string_id]:offsets[string_id + 1]], 'utf-8')
+                for string_id in string_ids]
+
+    def song_row(self, song_id):
+        """Listing row of a song id, or None"""
+        i = bisect_left(self.song_index_ids, song_id)
+        if i < self.song_count and self.song_index_ids[i] == song_id:
+            return self.song_index_rows[i]
+        return None
+
+    def title_at(self, row):
+        return self.string(self.song_title[row])
+
+    def songs(self, start=0, stop=None):
+        """
+        (song_id, title, artist, duration, release_year) tuples for listing
+        rows [start, stop) - the SONG_ROW columns, duration still in seconds.
+        """
+        stop = self.song_count if stop is None else min(stop, self.song_count)
+        if start >= stop:
+            return []
+        titles = self._strings(self.song_title[start:stop].tolist())
+        artist_rows = self.song_artist[start:stop].tolist()
+        names = {}
+        for artist_row in set(artist_rows):
+            names[artist_row] = self.string(self.artist_name[artist_row])
+        return [
+            (song_id, title, names[artist_row],
+             None if duration == NULL_INT else duration,
+             None if year == NULL_INT else year)
+            for song_id, title, artist_row, duration, year in zip(
+                self.song_ids[start:stop].tolist(), titles, artist_rows,
+                self.song_duration[start:stop].tolist(), self.song_year[start:stop].tolist())
+        ]
+
+    def artists(self):
+        """Every artist as a dict (the Artists columns), in name order"""
+        names = self._strings(self.artist_name.tolist())
+        bios = self._strings(self.artist_bio.tolist())
+        return [
+            {'artist_id': artist_id, 'name': name, 'bio': bio, 'created_at': _from_seconds(created)}
+            for artist_id, name, bio, created in zip(
+                self.artist_ids.tolist(), names, bios, self.artist_created.tolist())
+        ]
+
+    def stats(self):
+        return {
+            'generation': self.generation,
+            'songs': self.song_count,
+            'artists': self.artist_count,
+            'strings': self.string_count,
+            'bytes': self.size,
+        }
+
+
+class SnapshotStore:
+    """
+    The current snapshot of one worker. `current()` re-stats the file at most
+    every `check_interval` seconds and maps a replaced file; the previous
+    mapping is released once the requests still using it are done.
+
+    `mark_stale()` (after a catalog write) stops every worker serving
+    snapshots generated before it: the mtime of the `<path>.stale` marker is
+    the shared signal, checked along with the snapshot file. A worker runs
+    at most one background rebuild at a time, and waits `retry_min` seconds,
+    doubling up to `retry_max`, after one fails.
+    """
+
+    def __init__(self, path, check_interval=5.0, retry_min=5.0, retry_max=300.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.retry_min = retry_min
+        self.retry_max = retry_max
+        self._marker = f"{path}.stale"
+        self._snapshot = None
+        self._stale_before = 0      # generations older than this are stale (ns)
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._rebuilding = threading.Lock()
+        self._rebuild_running = False
+        self._retry_at = 0.0
+        self._retry_delay = retry_min
+        self._stats = {'loads': 0, 'load_errors': 0, 'rebuilds': 0, 'rebuild_failures': 0}
+
+    def current(self):
+        """The mapped snapshot, or None when there is none to serve"""
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            with self._lock:
+                if now - self._checked_at >= self.check_interval:
+                    self._checked_at = now
+                    self._refresh()
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.generation < self._stale_before:
+            return None
+        return snapshot
+
+    def _refresh(self):
+        try:
+            self._stale_before = max(self._stale_before, os.stat(self._marker).st_mtime_ns)
+        except OSError:
+            pass
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            self._snapshot = None
+            return
+        identity = (stat.st_dev, stat.st_ino, stat.st_mtime_ns)
+        if self._snapshot is not None and self._snapshot.identity == identity:
+            return
+        try:
+            self._snapshot = CatalogSnapshot(self.path)
+            self._stats['loads'] += 1
+        except (OSError, ValueError, struct.error):
+            # Keep serving the previous mapping (if any)
+            self._stats['load_errors'] += 1
+
+    def mark_stale(self):
+        """Stop serving snapshots generated before now, in every worker"""
+        now = time.time_ns()
+        self._stale_before = max(self._stale_before, now)
+        try:
+            with open(self._marker, 'a'):
+                pass
+            os.utime(self._marker, ns=(now, now))
+        except OSError:
+            pass
+        self._checked_at = 0.0
+
+    @property
+    def stale(self):
+        snapshot = self._snapshot
+        return snapshot is not None and snapshot.generation < self._stale_before
+
+    def age(self):
+        """Seconds since the mapped snapshot was built, or None"""
+        snapshot = self._snapshot
+        return None if snapshot is None else time.time() - snapshot.generation / 1e9
+
+    def rebuild(self, pool):
+        """
+        Write a new snapshot from the database. Returns False without doing
+        anything if another thread or worker process is already rebuilding.
+        """
+        if not self._rebuilding.acquire(blocking=False):
+            return False
+        try:
+            with open(f"{self.path}.lock", 'w') as lock:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return False
+                with pool.connection() as conn:
+                    build_from_db(conn, self.path)
+                self._stats['rebuilds'] += 1
+            self._checked_at = 0.0
+            return True
+        finally:
+            self._rebuilding.release()
+
+    def rebuild_async(self, pool, log=print):
+        """
+        Start a background rebuild unless one is already running in this
+        worker or the last attempt failed less than the backoff ago.
+        """
+        with self._lock:
+            if self._rebuild_running or time.monotonic() < self._retry_at:
+                return False
+            self._rebuild_running = True
+
+        def run():
+            try:
+                done = self.rebuild(pool)
+            except Exception as e:
+                with self._lock:
+                    self._stats['rebuild_failures'] += 1
+                    self._retry_at = time.monotonic() + self._retry_delay
+                    self._retry_delay = min(self._retry_delay * 2, self.retry_max)
+                log(f"❌ Catalog snapshot rebuild failed: {e}")
+            else:
+                with self._lock:
+                    self._retry_delay = self.retry_min
+                    # Another process holds the rebuild: its file shows up
+                    # at the next check, no point asking again before that
+                    self._retry_at = 0.0 if done else time.monotonic() + self.check_interval
+            finally:
+                with self._lock:
+                    self._rebuild_running = False
+
+        threading.Thread(target=run, name='catalog-snapshot-rebuild', daemon=True).start()
+        return True
+
+    def stats(self):
+        snapshot = self._snapshot
+        stats = dict(self._stats)
+        stats['path'] = self.path
+        stats['stale'] = self.stale
+        stats['rebuilding'] = self._rebuild_running
+        stats['snapshot'] = snapshot.stats() if snapshot is not None else None
+        return stats
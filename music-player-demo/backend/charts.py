@@ -0,0 +1,241 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - BILLBOARD CHART STORE
+# Purpose: Hold weekly chart snapshots in compact per-date arrays so "chart
+#          for date", "song history" and "biggest movers" are answered from
+#          memory, and fold in new weeks incrementally as they are ingested
+# Table:   Billboard_Top_Songs (sql/01_create_tables.sql)
+# ============================================================================
+
+import threading
+from array import array
+from bisect import bisect_right
+from datetime import date
+
+# Billboard_Top_Songs keeps the Top 10 (CHECK rank BETWEEN 1 AND 10)
+CHART_SIZE = 10
+
+
+class ChartSnapshot:
+    """
+    One week of the chart (chart_date is a date ordinal); index i of each
+    array holds the entry at rank i + 1.
+    """
+
+    __slots__ = ('chart_date', 'song_ids', 'last_week', 'weeks_on_chart')
+
+    def __init__(self, chart_date, song_ids, last_week, weeks_on_chart):
+        self.chart_date = chart_date
+        self.song_ids = array('i', song_ids)
+        self.last_week = array('h', last_week)        # 0 = new / re-entry
+        self.weeks_on_chart = array('h', weeks_on_chart)
+
+    def rank_of(self, song_id):
+        try:
+            return self.song_ids.index(song_id) + 1
+        except ValueError:
+            return None
+
+    def entries(self):
+        for i, song_id in enumerate(self.song_ids):
+            yield {
+                'rank': i + 1,
+                'song_id': song_id,
+                'last_week': self.last_week[i] or None,
+                'weeks_on_chart': self.weeks_on_chart[i],
+            }
+
+
+class ChartStore:
+    """
+    Weekly snapshots keyed by chart date plus a per-song history index.
+
+    Weeks are appended in date order; a week may replace the latest one but
+    never an earlier week, because last_week / weeks_on_chart of every later
+    week are derived from it.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._snapshots = {}      # date ordinal -> ChartSnapshot
+        self._dates = []          # sorted date ordinals
+        self._history = {}        # song_id -> [(date ordinal, rank)]
+        self._songs = {}          # song_id -> (title, artist)
+        self.loaded = False
+
+    # ------------------------------------------------------------------------
+    # Loading and ingestion
+    # ------------------------------------------------------------------------
+
+    def load(self, rows):
+        """
+        Append stored chart rows (ordered by chart_date, rank), each with
+        song_id, rank, last_week, weeks_on_chart, chart_date, title, artist.
+        """
+        week = None
+        pending = []
+
+        def flush():
+            if pending:
+                self._append(ChartSnapshot(
+                    week,
+                    [row['song_id'] for row in pending],
+                    [row['last_week'] or 0 for row in pending],
+                    [row['weeks_on_chart'] or 1 for row in pending],
+                ))
+                pending.clear()
+
+        with self._lock:
+            for row in rows:
+                ordinal = row['chart_date'].toordinal()
+                if ordinal != week:
+                    flush()
+                    week = ordinal
+                self._songs[row['song_id']] = (row['title'], row['artist'])
+                pending.append(row)
+            flush()
+            self.loaded = True
+
+    def plan(self, weeks):
+        """
+        Derive last_week and weeks_on_chart for new weeks without storing them.
+        `weeks` is a list of (date, [song_id by rank]) in any order.
+        Returns snapshots in date order; raises ValueError for weeks older
+        than the latest stored week or malformed charts.
+        """
+        with self._lock:
+            latest = self._dates[-1] if self._dates else None
+            previous = self._snapshots[latest] if latest is not None else None
+            appearances = {}
+            planned = []
+
+            for chart_date, song_ids in sorted(weeks, key=lambda week: week[0]):
+                ordinal = chart_date.toordinal()
+                if latest is not None and ordinal < latest:
+                    raise ValueError(f'{chart_date} is older than the latest chart week')
+                if not song_ids or len(song_ids) > CHART_SIZE:
+                    raise ValueError(f'A chart week needs 1 to {CHART_SIZE} songs')
+                if len(set(song_ids)) != len(song_ids):
+                    raise ValueError(f'Duplicate songs in chart for {chart_date}')
+                if planned and ordinal == planned[-1].chart_date:
+                    raise ValueError(f'Chart for {chart_date} given twice')
+
+                if ordinal == latest and not planned:
+                    # Replacing the latest week: derive from the week before it
+                    before = self._dates[-2] if len(self._dates) > 1 else None
+                    previous = self._snapshots[before] if before is not None else None
+                    for song_id in self._snapshots[latest].song_ids:
+                        appearances[song_id] = appearances.get(song_id, 0) - 1
+
+                last_week = []
+                weeks_on_chart = []
+                for song_id in song_ids:
+                    rank = previous.rank_of(song_id) if previous else None
+                    seen = len(self._history.get(song_id, ())) + appearances.get(song_id, 0)
+                    last_week.append(rank or 0)
+                    weeks_on_chart.append(seen + 1)
+                    appearances[song_id] = appearances.get(song_id, 0) + 1
+
+                snapshot = ChartSnapshot(ordinal, song_ids, last_week, weeks_on_chart)
+                planned.append(snapshot)
+                previous = snapshot
+            return planned
+
+    def commit(self, snapshots, songs=None):
+        """Store planned snapshots once they have been written to MySQL"""
+        with self._lock:
+            if songs:
+                self._songs.update(songs)
+            for snapshot in snapshots:
+                self._append(snapshot)
+
+    # ------------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------------
+
+    def latest_date(self):
+        with self._lock:
+            return date.fromordinal(self._dates[-1]) if self._dates else None
+
+    def chart(self, on_date=None):
+        """Chart in effect on `on_date` (latest week on or before it)"""
+        with self._lock:
+            if not self._dates:
+                return None
+            if on_date is None:
+                ordinal = self._dates[-1]
+            else:
+                i = bisect_right(self._dates, on_date.toordinal())
+                if i == 0:
+                    return None
+                ordinal = self._dates[i - 1]
+            snapshot = self._snapshots[ordinal]
+            return {
+                'chart_date': date.fromordinal(ordinal).isoformat(),
+                'entries': [self._describe(entry) for entry in snapshot.entries()],
+            }
+
+    def history(self, song_id):
+        with self._lock:
+            weeks = self._history.get(song_id, [])
+            return {
+                'song_id': song_id,
+                'weeks_on_chart': len(weeks),
+                'peak': min((rank for _, rank in weeks), default=None),
+                'history': [
+                    {'chart_date': date.fromordinal(ordinal).isoformat(), 'rank': rank}
+                    for ordinal, rank in weeks
+                ],
+            }
+
+    def movers(self, on_date=None, limit=5):
+        """Biggest climbers, fallers and new entries for a chart week"""
+        chart = self.chart(on_date)
+        if chart is None:
+            return None
+        moved = []
+        new_entries = []
+        for entry in chart['entries']:
+            if entry['last_week'] is None:
+                new_entries.append(entry)
+            else:
+                moved.append(dict(entry, change=entry['last_week'] - entry['rank']))
+        return {
+            'chart_date': chart['chart_date'],
+            'gainers': sorted((e for e in moved if e['change'] > 0), key=lambda e: -e['change'])[:limit],
+            'losers': sorted((e for e in moved if e['change'] < 0), key=lambda e: e['change'])[:limit],
+            'new_entries': new_entries[:limit],
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                'weeks': len(self._dates),
+                'songs_charted': len(self._history),
+                'latest': date.fromordinal(self._dates[-1]).isoformat() if self._dates else None,
+            }
+
+    # ------------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------------
+
+    def _append(self, snapshot):
+        ordinal = snapshot.chart_date
+        if self._dates and ordinal < self._dates[-1]:
+            raise ValueError('Chart weeks must be appended in date order')
+        if self._dates and ordinal == self._dates[-1]:
+            replaced = self._snapshots[ordinal]
+            for song_id in replaced.song_ids:
+                weeks = self._history.get(song_id)
+                if weeks and weeks[-1][0] == ordinal:
+                    weeks.pop()
+                    if not weeks:
+                        del self._history[song_id]
+        else:
+            self._dates.append(ordinal)
+        self._snapshots[ordinal] = snapshot
+        for i, song_id in enumerate(snapshot.song_ids):
+            self._history.setdefault(song_id, []).append((ordinal, i + 1))
+
+    def _describe(self, entry):
+        title, artist = self._songs.get(entry['song_id'], (None, None))
+        return dict(entry, title=title, artist=artist)
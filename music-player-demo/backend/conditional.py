@@ -0,0 +1,73 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - HTTP CONDITIONAL REQUESTS
+# Purpose: ETag / Last-Modified validators so clients polling unchanged
+#          resources get a 304 before the heavy query runs
+# ============================================================================
+
+import hashlib
+from datetime import timezone
+from functools import wraps
+
+from flask import Response, request
+
+
+def make_etag(*parts):
+    """Strong ETag from the row versions that make up a response"""
+    digest = hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=12)
+    return digest.hexdigest()
+
+
+def as_http_datetime(value):
+    """MySQL TIMESTAMP columns come back naive; the server runs in UTC"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.replace(microsecond=0)
+
+
+def conditional(version):
+    """
+    Answer If-None-Match / If-Modified-Since for a GET view.
+
+    `version(**view_args)` runs a cheap lookup and returns a tuple of
+    (version parts, last modified datetime), or None when the resource does
+    not exist (the view then produces its usual 404). The query string is
+    folded into the ETag so variants of one URL never share a validator.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            current = version(**kwargs)
+            if current is None:
+                return view(**kwargs)
+
+            parts, last_modified = current
+            etag = make_etag(request.path, sorted(request.args.items(multi=True)), *parts)
+            last_modified = as_http_datetime(last_modified)
+
+            if request.if_none_match:
+                # Weak comparison: a compressed 200 carries the tag as W/"..."
+                not_modified = request.if_none_match.contains_weak(etag)
+            elif request.if_modified_since and last_modified:
+                not_modified = last_modified <= request.if_modified_since
+            else:
+                not_modified = False
+
+            if not_modified:
+                response = Response(status=304)
+            else:
+                result = view(**kwargs)
+                response = result[0] if isinstance(result, tuple) else result
+                status = result[1] if isinstance(result, tuple) and len(result) > 1 else response.status_code
+                if status != 200:
+                    return result
+
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            # Let clients keep the body but always revalidate it
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,273 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - DATABASE CONNECTION POOL
+# Purpose: Reuse MySQL connections across requests instead of opening a new
+#          pymysql connection (TCP + auth handshake) for every call
+# ============================================================================
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the pool timeout"""
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of DB-API connections.
+
+    `size` connections are kept idle for reuse; up to `max_overflow` extra
+    connections may be opened under bursts and are closed again when they are
+    returned. Idle connections older than `idle_timeout` seconds are dropped,
+    connections older than `recycle` seconds are replaced, and every checkout
+    pings the server so callers never receive a dead socket.
+    """
+
+    def __init__(self, connect, size=5, max_overflow=10, timeout=30.0,
+                 idle_timeout=300.0, recycle=3600.0, ping=True):
+        self._connect = connect
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.recycle = recycle
+        self.ping = ping
+
+        self._cond = threading.Condition()
+        self._idle = deque()      # (conn, last_used) - most recent on the right
+        self._born = {}           # id(conn) -> creation time
+        self._open = 0
+        self._pid = os.getpid()
+
+        # Monitoring counters
+        self._checkouts = 0
+        self._waits = 0
+        self._waiting = 0         # callers blocked in acquire() right now
+        self._wait_time = 0.0
+        self._timeouts = 0
+        self._created = 0
+        self._recycled = 0
+        self._ping_failures = 0
+
+    # ------------------------------------------------------------------------
+    # Checkout / return
+    # ------------------------------------------------------------------------
+
+    def acquire(self):
+        """Borrow a live connection, waiting up to `timeout` seconds"""
+        deadline = None
+        waited_since = None
+
+        try:
+            while True:
+                stale = []
+                conn = None
+                create = False
+
+                with self._cond:
+                    self._check_fork()
+                    stale.extend(self._prune_idle())
+
+                    while conn is None and self._idle:
+                        candidate, _ = self._idle.pop()
+                        if self._expired(candidate):
+                            stale.append(candidate)
+                            self._recycled += 1
+                        else:
+                            conn = candidate
+
+                    if conn is None:
+                        if self._open < self.size + self.max_overflow:
+                            self._open += 1
+                            create = True
+                        else:
+                            now = time.monotonic()
+                            if deadline is None:
+                                deadline = now + self.timeout
+                                waited_since = now
+                                self._waits += 1
+                                self._waiting += 1
+                            remaining = deadline - now
+                            if remaining <= 0:
+                                self._timeouts += 1
+                                self._wait_time += now - waited_since
+                                raise PoolTimeout(
+                                    f"No database connection available after {self.timeout}s"
+                                )
+                            self._cond.wait(remaining)
+
+                for old in stale:
+                    self._close(old)
+
+                if create:
+                    try:
+                        conn = self._connect()
+                    except Exception:
+                        with self._cond:
+                            self._open -= 1
+                            self._cond.notify()
+                        raise
+                    with self._cond:
+                        self._born[id(conn)] = time.monotonic()
+                        self._created += 1
+                elif conn is not None and self.ping and not self._alive(conn):
+                    self._discard(conn)
+                    conn = None
+
+                if conn is not None:
+                    with self._cond:
+                        self._checkouts += 1
+                        if waited_since is not None:
+                            self._wait_time += time.monotonic() - waited_since
+                    return conn
+        finally:
+            if waited_since is not None:
+                with self._cond:
+                    self._waiting -= 1
+
+    def release(self, conn, discard=False):
+        """Return a connection to the pool (or close it if it is unusable)"""
+        if not discard:
+            try:
+                # Never hand an open transaction to the next request
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        if discard:
+            self._discard(conn)
+            return
+
+        close = False
+        with self._cond:
+            if os.getpid() != self._pid or id(conn) not in self._born:
+                close = True
+            elif self._expired(conn):
+                close = True
+                self._recycled += 1
+            elif len(self._idle) >= self.size:
+                # Overflow connection - close it instead of keeping it idle
+                close = True
+                self._born.pop(id(conn), None)
+                self._open -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+        if close:
+            self._close(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a `with` block"""
+        conn = self.acquire()
+        failed = False
+        try:
+            yield conn
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.release(conn, discard=failed and not self._alive(conn))
+
+    # ------------------------------------------------------------------------
+    # Monitoring
+    # ------------------------------------------------------------------------
+
+    def stats(self):
+        """Snapshot of pool occupancy and wait counters"""
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'open': self._open,
+                'idle': idle,
+                'in_use': self._open - idle,
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'waiting': self._waiting,
+                'wait_time_ms': round(self._wait_time * 1000, 3),
+                'timeouts': self._timeouts,
+                'created': self._created,
+                'recycled': self._recycled,
+                'ping_failures': self._ping_failures,
+            }
+
+    @property
+    def waiting(self):
+        """Callers currently blocked waiting for a connection"""
+        return self._waiting
+
+    def dispose(self):
+        """Close every idle connection (checked-out ones close on return)"""
+        with self._cond:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            for conn in idle:
+                self._born.pop(id(conn), None)
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._close(conn)
+
+    # ------------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------------
+
+    def _check_fork(self):
+        # gunicorn forks workers after import; inherited sockets must not be
+        # shared with the parent, so start from an empty pool in the child.
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._idle.clear()
+            self._born.clear()
+            self._open = 0
+
+    def _prune_idle(self):
+        stale = []
+        if self.idle_timeout is None:
+            return stale
+        cutoff = time.monotonic() - self.idle_timeout
+        while self._idle and self._idle[0][1] < cutoff:
+            conn, _ = self._idle.popleft()
+            self._born.pop(id(conn), None)
+            self._open -= 1
+            stale.append(conn)
+        return stale
+
+    def _expired(self, conn):
+        if self.recycle is None:
+            return False
+        born = self._born.get(id(conn))
+        if born is not None and time.monotonic() - born > self.recycle:
+            self._born.pop(id(conn), None)
+            self._open -= 1
+            return True
+        return False
+
+    def _alive(self, conn):
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            with self._cond:
+                self._ping_failures += 1
+            return False
+
+    def _discard(self, conn):
+        with self._cond:
+            if self._born.pop(id(conn), None) is not None:
+                self._open -= 1
+            self._cond.notify()
+        self._close(conn)
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
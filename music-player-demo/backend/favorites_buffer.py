@@ -0,0 +1,242 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - FAVORITES WRITE-BEHIND BUFFER
+# Purpose: Absorb favorite taps in memory, coalesced per (user_id, song_id),
+#          and write them to Favorite_Songs in batched multi-row statements
+#          on an interval or once enough toggles are pending
+# Config:  FAVORITES_WRITE_BEHIND=1, FAVORITES_FLUSH_INTERVAL,
+#          FAVORITES_FLUSH_SIZE (see app.py)
+# Limits:  the buffer lives in one worker process. With several workers a
+#          tap is visible to the other workers only once it is flushed, up
+#          to FAVORITES_FLUSH_INTERVAL later, and a toggle handled by another
+#          worker in that window reads the older stored state
+# ============================================================================
+
+import threading
+
+import pymysql
+from pymysql.constants import ER
+
+
+def set_favorite(cursor, user_id, song_id, favorited):
+    """
+    Write one favorite state in a single idempotent statement.
+    Returns True if a row was inserted or deleted.
+    """
+    if favorited:
+        # Plain INSERT, not INSERT IGNORE: IGNORE would also swallow a
+        # missing user or song (foreign keys) and report it as a no-op
+        try:
+            cursor.execute("""
+                INSERT INTO Favorite_Songs (user_id, song_id, favorited_at)
+                VALUES (%s, %s, NOW())
+            """, (user_id, song_id))
+        except pymysql.err.IntegrityError as e:
+            if e.args[:1] != (ER.DUP_ENTRY,):
+                raise
+            return False
+    else:
+        cursor.execute("""
+            DELETE FROM Favorite_Songs
+            WHERE user_id = %s AND song_id = %s
+        """, (user_id, song_id))
+    return cursor.rowcount > 0
+
+
+def toggle_favorite(cursor, user_id, song_id):
+    """
+    Flip a favorite without reading it first. The (user_id, song_id) primary
+    key makes the INSERT the test: a duplicate key error means the song was
+    already a favorite, so it is deleted instead. Returns the new state.
+    """
+    if set_favorite(cursor, user_id, song_id, True):
+        return True
+    set_favorite(cursor, user_id, song_id, False)
+    return False
+
+
+def is_favorite(cursor, user_id, song_id):
+    cursor.execute("""
+        SELECT 1 FROM Favorite_Songs
+        WHERE user_id = %s AND song_id = %s
+    """, (user_id, song_id))
+    return cursor.fetchone() is not None
+
+
+class FavoritesBuffer:
+    """
+    Pending favorite states keyed by (user_id, song_id).
+
+    Only the latest state per key is kept, so a burst of taps on one song
+    costs at most one row write. Entries move to an in-flight map while a
+    flush is writing them, and lookups check pending, then in-flight, then
+    the database - so requests handled by this process always see the taps
+    buffered here. Other worker processes see them only after a flush.
+    """
+
+    def __init__(self, pool, flush_interval=1.0, flush_size=500, log=print):
+        self.pool = pool
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.log = log
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}      # (user_id, song_id) -> favorited
+        self._in_flight = {}
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {'toggles': 0, 'coalesced': 0, 'flushes': 0, 'rows_written': 0, 'failures': 0}
+
+    # ------------------------------------------------------------------------
+    # Request path
+    # ------------------------------------------------------------------------
+
+    def state(self, user_id, song_id):
+        """Buffered state for a key, or None if the database is authoritative"""
+        key = (user_id, song_id)
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+            return self._in_flight.get(key)
+
+    def set(self, user_id, song_id, favorited, load_state):
+        """
+        Set a favorite. Returns True when that changes its state; like
+        `toggle`, `load_state()` is only called when nothing is buffered.
+        """
+        key = (user_id, song_id)
+        current = self.state(user_id, song_id)
+        if current is None:
+            current = load_state()
+        with self._lock:
+            if key in self._pending:
+                current = self._pending[key]
+            elif key in self._in_flight:
+                current = self._in_flight[key]
+            self._record(key, favorited)
+        return current != favorited
+
+    def toggle(self, user_id, song_id, load_state):
+        """
+        Flip a favorite. `load_state()` reads the stored state and is only
+        called (outside the lock) when the buffer holds nothing for the key;
+        a tap that lands while it runs is flipped on top, not overwritten.
+        """
+        key = (user_id, song_id)
+        current = self.state(user_id, song_id)
+        if current is None:
+            current = load_state()
+        with self._lock:
+            if key in self._pending:
+                current = self._pending[key]
+            elif key in self._in_flight:
+                current = self._in_flight[key]
+            favorited = not current
+            self._record(key, favorited)
+        return favorited
+
+    def _record(self, key, favorited):
+        self._stats['toggles'] += 1
+        if key in self._pending:
+            self._stats['coalesced'] += 1
+        self._pending[key] = favorited
+        if len(self._pending) >= self.flush_size:
+            self._wakeup.set()
+
+    # ------------------------------------------------------------------------
+    # Flushing
+    # ------------------------------------------------------------------------
+
+    def flush(self, user_id=None):
+        """
+        Write pending states (only `user_id`'s when given) to MySQL.
+        Returns the number of keys written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if user_id is None:
+                    batch, self._pending = self._pending, {}
+                else:
+                    batch = {key: value for key, value in self._pending.items() if key[0] == user_id}
+                    for key in batch:
+                        del self._pending[key]
+                if not batch:
+                    return 0
+                self._in_flight = batch
+
+            try:
+                with self.pool.connection() as conn:
+                    self._write(conn, batch)
+            except Exception:
+                with self._lock:
+                    # Requeue, keeping any newer tap made during the flush
+                    for key, value in batch.items():
+                        self._pending.setdefault(key, value)
+                    self._in_flight = {}
+                    self._stats['failures'] += 1
+                raise
+
+            with self._lock:
+                self._in_flight = {}
+                self._stats['flushes'] += 1
+                self._stats['rows_written'] += len(batch)
+            return len(batch)
+
+    def _write(self, conn, batch):
+        added = [(user_id, song_id) for (user_id, song_id), favorited in batch.items() if favorited]
+        removed = [key for key, favorited in batch.items() if not favorited]
+        cursor = conn.cursor()
+        try:
+            if added:
+                # pymysql folds this into one multi-row INSERT; IGNORE also
+                # skips taps on a user or song deleted since, rather than
+                # failing the batch for everyone
+                cursor.executemany("""
+                    INSERT IGNORE INTO Favorite_Songs (user_id, song_id, favorited_at)
+                    VALUES (%s, %s, NOW())
+                """, added)
+            for start in range(0, len(removed), 500):
+                chunk = removed[start:start + 500]
+                cursor.execute(f"""
+                    DELETE FROM Favorite_Songs
+                    WHERE (user_id, song_id) IN ({', '.join(['(%s, %s)'] * len(chunk))})
+                """, [value for key in chunk for value in key])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    # ------------------------------------------------------------------------
+    # Background flusher
+    # ------------------------------------------------------------------------
+
+    def start(self):
+        """Flush every `flush_interval` seconds (or sooner at `flush_size`)"""
+        def run():
+            while not self._stop.is_set():
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+                try:
+                    self.flush()
+                except Exception as e:
+                    self.log(f"❌ Favorites flush failed: {e}")
+
+        self._thread = threading.Thread(target=run, name='favorites-flusher', daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Stop the flusher and write whatever is still pending"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+        try:
+            self.flush()
+        except Exception as e:
+            self.log(f"❌ Favorites final flush failed: {e}")
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, pending=len(self._pending), in_flight=len(self._in_flight))
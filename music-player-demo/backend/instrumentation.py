@@ -0,0 +1,491 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - INSTRUMENTATION
+# Purpose: Logging, Prometheus metrics, per-statement SQL timing and an
+#          opt-in request profiler, cheap enough to leave on in production
+# Config:  LOG_LEVEL, SLOW_QUERY_MS, PROFILE_SAMPLE_RATE, PROFILE_DIR,
+#          PROFILE_ALLOW_HEADER, QUERY_BUDGET, QUERY_REPEAT_LIMIT,
+#          QUERY_BUDGET_MODE (see app.py)
+# ============================================================================
+
+import atexit
+import cProfile
+import io
+import logging
+import logging.handlers
+import os
+import pstats
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left
+from functools import lru_cache
+
+import pymysql
+
+log = logging.getLogger('music_player')
+
+# ============================================================================
+# LOGGING
+# ============================================================================
+
+class KeyValueFormatter(logging.Formatter):
+    """`time level logger message key=value ...` - fields come from extra={'fields': {...}}"""
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, 'fields', None)
+        if fields:
+            line += ' ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        return line
+
+
+_log_handler = None
+_log_listener = None
+_log_listener_pid = None
+_log_listener_lock = threading.Lock()
+
+
+def configure_logging(level='INFO', stream=None):
+    """
+    Write the app's log records to `stream` (stdout). They are written
+    synchronously until start_log_listener() moves them onto a background
+    writer. Returns the stream handler.
+    """
+    global _log_handler
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(KeyValueFormatter('%(asctime)s %(levelname)s %(name)s %(message)s'))
+    _log_handler = handler
+
+    log.handlers[:] = [handler]
+    log.setLevel(level.upper() if isinstance(level, str) else level)
+    log.propagate = False
+    return handler
+
+
+def start_log_listener():
+    """
+    Send log records through a queue to a writer thread, so a request thread
+    never blocks on stdout. Threads do not survive a fork, so each worker
+    process calls this itself; repeat calls in one process are no-ops.
+    Returns the queue listener.
+    """
+    global _log_listener, _log_listener_pid
+    with _log_listener_lock:
+        if _log_handler is None or _log_listener_pid == os.getpid():
+            return _log_listener
+        records = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(records, _log_handler, respect_handler_level=True)
+        listener.start()
+
+        log.handlers[:] = [logging.handlers.QueueHandler(records)]
+        _log_listener, _log_listener_pid = listener, os.getpid()
+        return listener
+
+
+def stop_log_listener():
+    """Flush and stop this process's log writer; records are written synchronously again"""
+    global _log_listener, _log_listener_pid
+    with _log_listener_lock:
+        if _log_listener is None or _log_listener_pid != os.getpid():
+            return
+        log.handlers[:] = [_log_handler]
+        _log_listener.stop()
+        _log_listener = _log_listener_pid = None
+
+
+# Inherited by forked workers, where it stops only their own listener
+atexit.register(stop_log_listener)
+
+# ============================================================================
+# METRICS (Prometheus text exposition format)
+# ============================================================================
+
+# Seconds; fine-grained at the low end where most queries and routes sit
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in self._values.items():
+                lines.append(f'{self.name}{_labels(self.labelnames, labels)} {value}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}       # labels -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[i] += 1
+            series[-1] += value
+
+    def snapshot(self):
+        """{labels: (cumulative bucket counts, count, sum)}"""
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        result = {}
+        for labels, values in series.items():
+            cumulative = []
+            running = 0
+            for count in values[:-1]:
+                running += count
+                cumulative.append(running)
+            result[labels] = (cumulative, running, values[-1])
+        return result
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        bounds = [repr(float(bound)) for bound in self.buckets] + ['+Inf']
+        for labels, (cumulative, count, total) in self.snapshot().items():
+            for bound, value in zip(bounds, cumulative):
+                le = 'le="' + bound + '"'
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, labels, le)} {value}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {total}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {count}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help, labelnames=()):
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return lines
+
+
+def render_gauges(prefix, stats, help=''):
+    """Render the numeric values of a stats() dict as gauges named <prefix>_<key>"""
+    lines = []
+    for key, value in stats.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        name = f'{prefix}_{key}'
+        lines.append(f'# HELP {name} {help or key}')
+        lines.append(f'# TYPE {name} gauge')
+        lines.append(f'{name} {value}')
+    return lines
+
+
+registry = Registry()
+
+http_request_seconds = registry.histogram(
+    'music_http_request_seconds', 'Request latency by route', ('method', 'route'))
+http_requests_total = registry.counter(
+    'music_http_requests_total', 'Requests by route and status', ('method', 'route', 'status'))
+http_request_queries_total = registry.counter(
+    'music_http_request_queries_total', 'SQL statements issued by requests, by route', ('method', 'route'))
+db_query_seconds = registry.histogram(
+    'music_db_query_seconds', 'SQL statement latency', ('statement',))
+db_query_rows_total = registry.counter(
+    'music_db_query_rows_total', 'Rows returned or affected per SQL statement', ('statement',))
+
+# ============================================================================
+# SQL TIMING
+# ============================================================================
+
+SLOW_QUERY_SECONDS = 0.2
+
+# Per-request query budget (0 disables it); set with configure_query_budget
+QUERY_BUDGET = 0
+QUERY_REPEAT_LIMIT = 0
+QUERY_BUDGET_RAISE = False
+
+_request_stats = threading.local()
+
+_WHITESPACE = re.compile(r'\s+')
+_SQL_LITERAL = re.compile(r"('(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`)")
+_PLACEHOLDER_LIST = re.compile(r'%s(?:\s*,\s*%s)+')
+_ROW_LIST = re.compile(r'\(%s\.\.\.\)(?:\s*,\s*\(%s\.\.\.\))+')
+
+
+@lru_cache(maxsize=2048)
+def compact_sql(sql):
+    """
+    The statement text actually sent: indentation and line breaks folded to
+    single spaces outside quoted literals. The routes' triple-quoted SQL is
+    often half whitespace, and the text protocol re-sends it on every call.
+    """
+    parts = _SQL_LITERAL.split(sql)
+    for i in range(0, len(parts), 2):
+        parts[i] = _WHITESPACE.sub(' ', parts[i])
+    return ''.join(parts).strip()
+
+
+@lru_cache(maxsize=2048)
+def statement_label(sql):
+    """
+    Collapse a SQL template to a stable metric label: whitespace folded and
+    variable-length IN (...) / VALUES lists reduced to one element.
+    """
+    text = _WHITESPACE.sub(' ', sql).strip()
+    text = _PLACEHOLDER_LIST.sub('%s...', text)
+    text = _ROW_LIST.sub('(%s...)...', text)
+    return text[:200]
+
+
+def redact(args):
+    """Describe bound parameters by type and size only, never by value"""
+    if args is None:
+        return '[]'
+    if isinstance(args, dict):
+        return '{' + ', '.join(f'{key}: {_describe(value)}' for key, value in args.items()) + '}'
+    if isinstance(args, (list, tuple)):
+        return '[' + ', '.join(_describe(value) for value in args) + ']'
+    return _describe(args)
+
+
+def _describe(value):
+    if value is None:
+        return 'NULL'
+    if isinstance(value, (str, bytes)):
+        return f'{type(value).__name__}({len(value)})'
+    if isinstance(value, (list, tuple)):
+        return f'{type(value).__name__}({len(value)})'
+    return type(value).__name__
+
+
+class QueryBudgetExceeded(Exception):
+    """A request issued more statements than the development query budget allows"""
+
+
+def configure_query_budget(limit, repeat_limit=5, mode='warn'):
+    """
+    Flag requests issuing more than `limit` statements, or the same statement
+    more than `repeat_limit` times (the N+1 shape). mode='raise' fails the
+    request at the offending statement instead of logging afterwards.
+    """
+    global QUERY_BUDGET, QUERY_REPEAT_LIMIT, QUERY_BUDGET_RAISE
+    if mode not in ('warn', 'raise'):
+        raise ValueError('mode must be warn or raise')
+    QUERY_BUDGET = limit
+    QUERY_REPEAT_LIMIT = repeat_limit
+    QUERY_BUDGET_RAISE = mode == 'raise'
+
+
+def begin_request():
+    """Reset this thread's per-request query counters"""
+    _request_stats.queries = 0
+    _request_stats.db_seconds = 0.0
+    _request_stats.statements = {} if QUERY_BUDGET else None
+    _request_stats.over_budget = False
+
+
+def budget_violations():
+    """Budget problems of the current request, as readable strings"""
+    statements = getattr(_request_stats, 'statements', None)
+    if statements is None:
+        return []
+    problems = []
+    queries = _request_stats.queries
+    if queries > QUERY_BUDGET:
+        problems.append(f"{queries} queries (budget {QUERY_BUDGET})")
+    if QUERY_REPEAT_LIMIT:
+        for label, count in statements.items():
+            if count > QUERY_REPEAT_LIMIT:
+                problems.append(f"{count}x {label[:120]} (possible N+1)")
+    return problems
+
+
+def _check_budget(label):
+    statements = _request_stats.statements
+    statements[label] = statements.get(label, 0) + 1
+    if not QUERY_BUDGET_RAISE or _request_stats.over_budget:
+        return
+    if (_request_stats.queries > QUERY_BUDGET
+            or (QUERY_REPEAT_LIMIT and statements[label] > QUERY_REPEAT_LIMIT)):
+        # Raised once per request, so error handling can still query
+        _request_stats.over_budget = True
+        raise QueryBudgetExceeded('; '.join(budget_violations()))
+
+
+def request_stats():
+    """(queries, seconds in the database) for the current request"""
+    return getattr(_request_stats, 'queries', 0), getattr(_request_stats, 'db_seconds', 0.0)
+
+
+def record_query(sql, args, elapsed, rowcount, batch=None, check=True):
+    label = statement_label(sql)
+    db_query_seconds.observe(elapsed, label)
+    # Unbuffered (SS) cursors do not know their row count up front
+    if rowcount is not None and 0 <= rowcount < 2 ** 62:
+        db_query_rows_total.inc(label, amount=rowcount)
+
+    _request_stats.queries = getattr(_request_stats, 'queries', 0) + 1
+    _request_stats.db_seconds = getattr(_request_stats, 'db_seconds', 0.0) + elapsed
+
+    if elapsed >= SLOW_QUERY_SECONDS:
+        fields = {'batch': batch} if batch is not None else {'params': redact(args)}
+        fields['rows'] = rowcount
+        log.warning("🐢 Slow query %.1fms: %s", elapsed * 1000, label, extra={'fields': fields})
+
+    if check and getattr(_request_stats, 'statements', None) is not None:
+        _check_budget(label)
+
+
+class QueryTimingMixin:
+    """Time, count and compact every statement a pymysql cursor sends"""
+
+    _in_executemany = False
+
+    def execute(self, query, args=None):
+        if isinstance(query, str):
+            query = compact_sql(query)
+        if self._in_executemany:
+            return super().execute(query, args)
+        started = time.perf_counter()
+        try:
+            result = super().execute(query, args)
+        except Exception:
+            record_query(query, args, time.perf_counter() - started, None, check=False)
+            raise
+        record_query(query, args, time.perf_counter() - started, self.rowcount)
+        return result
+
+    def executemany(self, query, args):
+        # Recorded once against the template; pymysql may send it as
+        # several multi-row statements with the values inlined
+        if isinstance(query, str):
+            query = compact_sql(query)
+        self._in_executemany = True
+        started = time.perf_counter()
+        try:
+            result = super().executemany(query, args)
+        except Exception:
+            record_query(query, None, time.perf_counter() - started, None, check=False)
+            raise
+        finally:
+            self._in_executemany = False
+        record_query(query, None, time.perf_counter() - started, self.rowcount,
+                     batch=len(args) if args is not None else 0)
+        return result
+
+
+_instrumented_classes = {}
+
+
+def instrumented(cursor_class):
+    """Timed subclass of a pymysql cursor class (created once per class)"""
+    if issubclass(cursor_class, QueryTimingMixin):
+        return cursor_class
+    subclass = _instrumented_classes.get(cursor_class)
+    if subclass is None:
+        subclass = type(f'Timed{cursor_class.__name__}', (QueryTimingMixin, cursor_class), {})
+        _instrumented_classes[cursor_class] = subclass
+    return subclass
+
+
+class InstrumentedConnection(pymysql.connections.Connection):
+    """pymysql connection whose cursors (any class asked for) are timed"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cursorclass = instrumented(self.cursorclass)
+
+    def cursor(self, cursor=None):
+        return super().cursor(instrumented(cursor) if cursor else None)
+
+# ============================================================================
+# REQUEST PROFILER
+# ============================================================================
+
+class RequestProfiler:
+    """
+    cProfile individual requests: a random `sample_rate` fraction of them,
+    plus any request sent with `X-Profile: 1` when `allow_header` is set.
+    One request is profiled at a time; each profile is written to
+    `output_dir` as a .prof file (open with pstats or snakeviz).
+    """
+
+    def __init__(self, sample_rate=0.0, output_dir='profiles', allow_header=False, top=20):
+        self.sample_rate = sample_rate
+        self.output_dir = output_dir
+        self.allow_header = allow_header
+        self.top = top
+        self._busy = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.sample_rate > 0 or self.allow_header
+
+    def start(self, requested=False):
+        """Begin profiling this request if it is sampled; returns the profiler or None"""
+        sampled = (requested and self.allow_header) or (
+            self.sample_rate > 0 and random.random() < self.sample_rate)
+        if not sampled or not self._busy.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler (or debugger) is already active
+            self._busy.release()
+            return None
+        return profiler
+
+    def finish(self, profiler, label):
+        """Stop `profiler`, write it out and return the file path"""
+        try:
+            profiler.disable()
+        finally:
+            self._busy.release()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        name = re.sub(r'[^A-Za-z0-9_.-]+', '_', label).strip('_') or 'root'
+        path = os.path.join(self.output_dir, f'{int(time.time() * 1000)}-{name}.prof')
+        profiler.dump_stats(path)
+
+        if log.isEnabledFor(logging.DEBUG):
+            summary = io.StringIO()
+            pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(self.top)
+            log.debug("🔬 Profile for %s\n%s", label, summary.getvalue())
+        return path
@@ -0,0 +1,122 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - JSON PROVIDER
+# Purpose: Serialize API responses with orjson when it is installed (falling
+#          back to Flask's stdlib provider otherwise), handling the MySQL
+#          column types - datetime, date, Decimal - natively
+# Config:  JSON_DATETIME_FORMAT=http (RFC 822, Flask's default) or iso
+# ============================================================================
+
+import dataclasses
+import decimal
+import uuid
+from datetime import date, datetime, timezone
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib fallback
+    orjson = None
+
+
+_DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+           'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+
+def http_date(value):
+    """
+    RFC 822 date, identical to werkzeug.http.http_date (naive values are
+    taken as UTC) but several times faster on large row sets.
+    """
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        hour, minute, second = value.hour, value.minute, value.second
+    else:
+        hour = minute = second = 0
+    return (f"{_DAYS[value.weekday()]}, {value.day:02d} {_MONTHS[value.month - 1]} "
+            f"{value.year:04d} {hour:02d}:{minute:02d}:{second:02d} GMT")
+
+
+def _default(value):
+    """Types orjson does not handle itself, encoded the way Flask does"""
+    if isinstance(value, date):
+        return http_date(value)
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _iso_default(value):
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return _default(value)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Drop-in replacement for Flask's DefaultJSONProvider.
+
+    With orjson available, dumps() and response() encode in one native call
+    and response() hands the bytes to the Response without a str round trip.
+    Calls with stdlib-only keyword arguments (indent, cls, ...) and the
+    fallback without orjson go through DefaultJSONProvider unchanged.
+    """
+
+    def __init__(self, app, datetime_format='http'):
+        super().__init__(app)
+        if datetime_format not in ('http', 'iso'):
+            raise ValueError('datetime_format must be http or iso')
+        self.datetime_format = datetime_format
+        self.available = orjson is not None
+
+    def _options(self):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if self.datetime_format == 'http':
+            # Keep the wire format clients already parse (RFC 822 dates)
+            option |= orjson.OPT_PASSTHROUGH_DATETIME
+            return option, _default
+        return option | orjson.OPT_NAIVE_UTC, _iso_default
+
+    def dumps_bytes(self, obj):
+        """Serialize to UTF-8 bytes (the fast path for responses and streams)"""
+        if not self.available:
+            return super().dumps(obj, separators=(',', ':')).encode('utf-8')
+        option, default = self._options()
+        return orjson.dumps(obj, default=default, option=option)
+
+    def dumps(self, obj, **kwargs):
+        if not self.available or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if not self.available or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if not self.available or self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
+
+
+def rows_as_columns(cursor):
+    """
+    Fetch the remaining rows of a tuple cursor as (columns, rows) without
+    building a dict per row; rows stay tuples and serialize as JSON arrays.
+    """
+    columns = [column[0] for column in cursor.description]
+    return columns, cursor.fetchall()
@@ -0,0 +1,256 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - HTTP MIDDLEWARE
+# Purpose: Per-request work that sits in front of Flask: CORS origin checks
+#          compiled once and memoized per origin, CORS preflights answered
+#          from cached headers (with Access-Control-Max-Age so browsers stop
+#          re-preflighting every POST), and gzip / brotli compression of
+#          large or streamed response bodies
+# Config:  CORS_MAX_AGE, COMPRESSION_ENABLED, COMPRESSION_MIN_SIZE,
+#          COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY (see app.py)
+# Deps:    brotli is optional (requirements-compression.txt); without it
+#          responses are gzip-compressed only
+# ============================================================================
+
+import re
+import zlib
+from functools import lru_cache
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+CORS_METHODS = 'GET, POST, PUT, DELETE, OPTIONS'
+CORS_HEADERS = 'Content-Type, Authorization'
+
+# Content types worth compressing (images and audio are compressed already)
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'application/javascript',
+                      'application/xml', 'image/svg+xml')
+
+
+class OriginPolicy:
+    """
+    Allowed CORS origins as one precompiled alternation of `patterns`
+    (matched from the start of the origin, like re.match). Browsers send the
+    same few origins over and over, so verdicts are memoized per origin.
+    """
+
+    def __init__(self, patterns, cache_size=1024):
+        self.patterns = list(patterns)
+        self._regex = re.compile('|'.join(f'(?:{pattern})' for pattern in self.patterns))
+        self.allows = lru_cache(maxsize=cache_size)(self._allows)
+
+    def _allows(self, origin):
+        return bool(self.patterns) and self._regex.match(origin) is not None
+
+    def stats(self):
+        info = self.allows.cache_info()
+        return {'patterns': len(self.patterns), 'hits': info.hits, 'misses': info.misses,
+                'origins': info.currsize}
+
+
+class PreflightMiddleware:
+    """
+    WSGI middleware answering CORS preflights (OPTIONS with an
+    Access-Control-Request-Method header) with 204 before Flask routing
+    runs. Headers are built once per origin; `max_age` lets the browser
+    reuse a preflight for that many seconds (0 omits the header).
+    """
+
+    def __init__(self, app, policy, max_age=600):
+        self.app = app
+        self.policy = policy
+        self.max_age = max_age
+        self._headers = lru_cache(maxsize=256)(self._build_headers)
+
+    def _build_headers(self, origin):
+        headers = [('Content-Length', '0'), ('Vary', 'Origin')]
+        if self.policy.allows(origin):
+            headers += [
+                ('Access-Control-Allow-Origin', origin),
+                ('Access-Control-Allow-Credentials', 'true'),
+                ('Access-Control-Allow-Methods', CORS_METHODS),
+                ('Access-Control-Allow-Headers', CORS_HEADERS),
+            ]
+            if self.max_age > 0:
+                headers.append(('Access-Control-Max-Age', str(self.max_age)))
+        return tuple(headers)
+
+    def __call__(self, environ, start_response):
+        origin = environ.get('HTTP_ORIGIN')
+        if (origin and environ.get('REQUEST_METHOD') == 'OPTIONS'
+                and 'HTTP_ACCESS_CONTROL_REQUEST_METHOD' in environ):
+            start_response('204 No Content', list(self._headers(origin)))
+            return []
+        return self.app(environ, start_response)
+
+
+@lru_cache(maxsize=256)
+def negotiate(accept_encoding, brotli_available):
+    """'br', 'gzip' or None for an Accept-Encoding header (q=0 excludes a coding)"""
+    accepted = {}
+    for item in accept_encoding.lower().split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding.strip()] = quality
+
+    def weight(coding):
+        return accepted.get(coding, accepted.get('*', 0.0))
+
+    if brotli_available and weight('br') > 0 and weight('br') >= weight('gzip'):
+        return 'br'
+    if weight('gzip') > 0:
+        return 'gzip'
+    return None
+
+
+class CompressionMiddleware:
+    """
+    WSGI middleware compressing responses for clients that accept it.
+
+    Bodies with a Content-Length are compressed whole when at least
+    `min_size` bytes. Streamed bodies (no Content-Length, e.g.
+    /api/songs?stream=ndjson) are compressed chunk by chunk, each chunk
+    flushed so the client keeps receiving rows as they are produced.
+    Responses that already have a Content-Encoding, are not a compressible
+    type, or say Cache-Control: no-transform pass through untouched.
+    """
+
+    def __init__(self, app, min_size=1024, gzip_level=6, brotli_quality=4):
+        self.app = app
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._stats = {'compressed': 0, 'streamed': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+    def __call__(self, environ, start_response):
+        coding = negotiate(environ.get('HTTP_ACCEPT_ENCODING', ''), brotli is not None)
+        if coding is None or environ.get('REQUEST_METHOD') == 'HEAD':
+            return self.app(environ, start_response)
+
+        captured = []
+
+        def capture(status, headers, exc_info=None):
+            # Nothing is sent before the body is seen, so a second call
+            # (an error page replacing the response) simply wins
+            captured[:] = [status, headers, exc_info]
+            return self._no_write
+
+        body = self.app(environ, capture)
+        status, headers, exc_info = captured
+        length = self._eligible(status, headers)
+        if length is False:
+            start_response(status, headers, exc_info)
+            return body
+
+        if length is None:
+            return self._stream(body, coding, status, headers, start_response)
+
+        try:
+            data = b''.join(body)
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+        if len(data) < self.min_size:
+            start_response(status, headers, exc_info)
+            return [data]
+        compressed = self._compress(coding, data)
+        if len(compressed) >= len(data):
+            start_response(status, headers, exc_info)
+            return [data]
+        self._stats['compressed'] += 1
+        self._stats['bytes_in'] += len(data)
+        self._stats['bytes_out'] += len(compressed)
+        start_response(status, self._headers(headers, coding, len(compressed)), exc_info)
+        return [compressed]
+
+    @staticmethod
+    def _no_write(data):
+        raise RuntimeError('CompressionMiddleware does not support the WSGI write() callable')
+
+    def _eligible(self, status, headers):
+        """Content-Length (None when streamed) if compressible, else False"""
+        if not status.startswith('2') or status.startswith(('204', '206')):
+            return False
+        length = None
+        content_type = ''
+        for name, value in headers:
+            name = name.lower()
+            if name == 'content-encoding':
+                return False
+            if name == 'cache-control' and 'no-transform' in value.lower():
+                return False
+            if name == 'content-length':
+                length = int(value)
+            elif name == 'content-type':
+                content_type = value.split(';', 1)[0].strip().lower()
+        if not (content_type.startswith('text/') or content_type in COMPRESSIBLE_TYPES):
+            return False
+        return length
+
+    def _headers(self, headers, coding, length=None):
+        result = []
+        vary = None
+        for name, value in headers:
+            lower = name.lower()
+            if lower == 'content-length':
+                continue
+            if lower == 'etag' and not value.startswith('W/'):
+                # The compressed bytes differ from the identity representation
+                value = f'W/{value}'
+            if lower == 'vary':
+                vary = value
+                continue
+            result.append((name, value))
+        result.append(('Content-Encoding', coding))
+        result.append(('Vary', f'{vary}, Accept-Encoding' if vary else 'Accept-Encoding'))
+        if length is not None:
+            result.append(('Content-Length', str(length)))
+        return result
+
+    def _compress(self, coding, data):
+        if coding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return zlib.compress(data, self.gzip_level, wbits=31)
+
+    def _stream(self, body, coding, status, headers, start_response):
+        if coding == 'br':
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            compress, flush, finish = compressor.process, compressor.flush, compressor.finish
+        else:
+            compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)
+            compress = compressor.compress
+            flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)  # noqa: E731
+            finish = compressor.flush
+        self._stats['streamed'] += 1
+        start_response(status, self._headers(headers, coding))
+
+        def generate():
+            try:
+                for chunk in body:
+                    if chunk:
+                        self._stats['bytes_in'] += len(chunk)
+                        out = compress(chunk) + flush()
+                        self._stats['bytes_out'] += len(out)
+                        yield out
+                out = finish()
+                self._stats['bytes_out'] += len(out)
+                yield out
+            finally:
+                # Ends the request context of stream_with_context views
+                if hasattr(body, 'close'):
+                    body.close()
+        return generate()
+
+    def stats(self):
+        stats = dict(self._stats)
+        if stats['bytes_in']:
+            stats['ratio'] = round(stats['bytes_out'] / stats['bytes_in'], 4)
+        return stats
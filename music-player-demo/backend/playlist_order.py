@@ -0,0 +1,249 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - PLAYLIST ORDERING
+# Purpose: Keep Playlist_Songs.track_order as sparse integer rank keys spaced
+#          GAP apart, so adding, moving or removing a song writes one row:
+#          a moved song takes a key between its new neighbours. Only when two
+#          neighbours have no integer left between them is the playlist
+#          respaced (inline, or ahead of time by `flask rebalance-playlists`)
+# Locking: callers hold the playlist's row lock (SELECT ... FROM Playlists
+#          FOR UPDATE) before computing or writing keys, so two writers never
+#          derive the same key or respace a playlist under each other
+# ============================================================================
+
+from bisect import bisect_left
+
+GAP = 1024
+
+# Playlist_Songs.track_order is a signed INT
+MIN_KEY = -2 ** 31
+MAX_KEY = 2 ** 31 - 1
+
+
+def key_between(before, after):
+    """
+    Integer key strictly between two neighbouring keys (None = that end of the
+    playlist is open), or None when there is no room left.
+    """
+    if before is None and after is None:
+        key = GAP
+    elif before is None:
+        key = after - GAP
+    elif after is None:
+        key = before + GAP
+    elif after - before > 1:
+        key = (before + after) // 2
+    else:
+        return None
+    return key if MIN_KEY < key < MAX_KEY else None
+
+
+def spaced_keys(count):
+    """Fresh keys for `count` songs: GAP, 2*GAP, ..."""
+    return [GAP * i for i in range(1, count + 1)]
+
+
+def _increasing_run(keys):
+    """Indexes of a longest strictly increasing subsequence of `keys` (None = absent)"""
+    tails = []          # smallest tail key of an increasing run of each length
+    tail_index = []
+    previous = [None] * len(keys)
+    for i, key in enumerate(keys):
+        if key is None:
+            continue
+        length = bisect_left(tails, key)
+        if length == len(tails):
+            tails.append(key)
+            tail_index.append(i)
+        else:
+            tails[length] = key
+            tail_index[length] = i
+        previous[i] = tail_index[length - 1] if length else None
+    run = []
+    i = tail_index[-1] if tail_index else None
+    while i is not None:
+        run.append(i)
+        i = previous[i]
+    return set(run)
+
+
+def plan_keys(current, order):
+    """
+    Keys for `order` (song ids, first to last) given `current` {song_id: key}.
+
+    Songs that already sit in the right relative order keep their key; the
+    rest get keys spread between their kept neighbours. Returns
+    ({song_id: key} for every song in `order`, {song_id: key} to write).
+    Falls back to respacing the whole playlist if some run has no room.
+    """
+    keys = [current.get(song_id) for song_id in order]
+    kept = _increasing_run(keys)
+    planned = list(keys)
+
+    i = 0
+    while i < len(order):
+        if i in kept:
+            i += 1
+            continue
+        start = i
+        while i < len(order) and i not in kept:
+            i += 1
+        before = planned[start - 1] if start else None
+        after = planned[i] if i < len(order) else None
+        count = i - start
+        # Open ends extend GAP per song past the last kept neighbour
+        if before is None and after is None:
+            before, after = 0, GAP * (count + 1)
+        elif before is None:
+            before = after - GAP * (count + 1)
+        elif after is None:
+            after = before + GAP * (count + 1)
+        if after - before <= count or before < MIN_KEY or after > MAX_KEY:
+            planned = spaced_keys(len(order))
+            break
+        for n in range(count):
+            planned[start + n] = before + (after - before) * (n + 1) // (count + 1)
+
+    result = dict(zip(order, planned))
+    changed = {song_id: key for song_id, key in result.items() if current.get(song_id) != key}
+    return result, changed
+
+
+# ----------------------------------------------------------------------------
+# Database helpers (take a DictCursor; the caller commits)
+# ----------------------------------------------------------------------------
+
+def write_keys(cursor, playlist_id, keys):
+    """Upsert {song_id: key}; pymysql folds this into multi-row statements"""
+    if keys:
+        cursor.executemany("""
+            INSERT INTO Playlist_Songs (playlist_id, song_id, track_order)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE track_order = VALUES(track_order)
+        """, [(playlist_id, song_id, key) for song_id, key in keys.items()])
+
+
+def ordered_keys(cursor, playlist_id):
+    """{song_id: key} in playlist order"""
+    cursor.execute("""
+        SELECT song_id, track_order FROM Playlist_Songs
+        WHERE playlist_id = %s
+        ORDER BY track_order ASC, playlist_song_id ASC
+    """, (playlist_id,))
+    return {row['song_id']: row['track_order'] for row in cursor.fetchall()}
+
+
+def rebalance(cursor, playlist_id):
+    """Respace a playlist's keys GAP apart, keeping its order. Returns rows written."""
+    current = ordered_keys(cursor, playlist_id)
+    _, changed = plan_keys({}, list(current))
+    changed = {song_id: key for song_id, key in changed.items() if current[song_id] != key}
+    write_keys(cursor, playlist_id, changed)
+    return len(changed)
+
+
+def _neighbours_at(cursor, playlist_id, song_id, position):
+    """Keys either side of 0-based `position` among the other songs"""
+    if position <= 0:
+        cursor.execute("""
+            SELECT MIN(track_order) AS after_key FROM Playlist_Songs
+            WHERE playlist_id = %s AND song_id <> %s
+        """, (playlist_id, song_id))
+        return None, cursor.fetchone()['after_key']
+    # Walks `position` index entries; anchors (after_song_id) avoid the scan
+    cursor.execute("""
+        SELECT track_order FROM Playlist_Songs
+        WHERE playlist_id = %s AND song_id <> %s
+        ORDER BY track_order ASC, playlist_song_id ASC
+        LIMIT %s, 2
+    """, (playlist_id, song_id, position - 1))
+    rows = [row['track_order'] for row in cursor.fetchall()]
+    if not rows:
+        return _last_key(cursor, playlist_id, song_id), None
+    return rows[0], rows[1] if len(rows) > 1 else None
+
+
+def _neighbours_after(cursor, playlist_id, song_id, after_song_id):
+    """Keys of `after_song_id` and of the song following it (two index lookups)"""
+    if after_song_id is None:
+        return _neighbours_at(cursor, playlist_id, song_id, 0)
+    cursor.execute("""
+        SELECT track_order FROM Playlist_Songs
+        WHERE playlist_id = %s AND song_id = %s
+    """, (playlist_id, after_song_id))
+    anchor = cursor.fetchone()
+    if anchor is None or after_song_id == song_id:
+        raise ValueError(f'Song {after_song_id} is not a valid anchor in the playlist')
+    # >= so a song sharing the anchor's key reads as "no room" and respaces
+    cursor.execute("""
+        SELECT MIN(track_order) AS after_key FROM Playlist_Songs
+        WHERE playlist_id = %s AND track_order >= %s AND song_id NOT IN (%s, %s)
+    """, (playlist_id, anchor['track_order'], song_id, after_song_id))
+    return anchor['track_order'], cursor.fetchone()['after_key']
+
+
+def _last_key(cursor, playlist_id, song_id=None):
+    cursor.execute("""
+        SELECT MAX(track_order) AS last_key FROM Playlist_Songs
+        WHERE playlist_id = %s AND song_id <> %s
+    """, (playlist_id, song_id or 0))
+    return cursor.fetchone()['last_key']
+
+
+def _place(cursor, playlist_id, neighbours):
+    """Key between the neighbours, respacing the playlist once if they touch"""
+    key = key_between(*neighbours())
+    if key is None:
+        rebalance(cursor, playlist_id)
+        key = key_between(*neighbours())
+    return key
+
+
+def append_key(cursor, playlist_id):
+    """Key that puts a new song at the end of the playlist"""
+    return _place(cursor, playlist_id, lambda: (_last_key(cursor, playlist_id), None))
+
+
+def move_key(cursor, playlist_id, song_id, position=None, after_song_id=None):
+    """
+    New key for `song_id`: directly after `after_song_id` (None = first), or
+    at 0-based `position` when given. Raises ValueError for an unknown anchor.
+    """
+    if position is not None:
+        return _place(cursor, playlist_id,
+                      lambda: _neighbours_at(cursor, playlist_id, song_id, position))
+    return _place(cursor, playlist_id,
+                  lambda: _neighbours_after(cursor, playlist_id, song_id, after_song_id))
+
+
+def crowded_playlists(cursor, min_gap=2):
+    """Playlists where two neighbouring songs are less than `min_gap` apart"""
+    cursor.execute("""
+        SELECT DISTINCT playlist_id FROM (
+            SELECT
+                playlist_id,
+                track_order - LAG(track_order) OVER (
+                    PARTITION BY playlist_id
+                    ORDER BY track_order, playlist_song_id
+                ) AS gap
+            FROM Playlist_Songs
+        ) G
+        WHERE gap < %s
+    """, (min_gap,))
+    return [row['playlist_id'] for row in cursor.fetchall()]
+
+
+def rebalance_crowded(conn, min_gap=2):
+    """Respace every crowded playlist, one transaction each. Returns {playlist_id: rows}."""
+    with conn.cursor() as cursor:
+        playlist_ids = crowded_playlists(cursor, min_gap)
+    written = {}
+    for playlist_id in playlist_ids:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT playlist_id FROM Playlists
+                WHERE playlist_id = %s
+                FOR UPDATE
+            """, (playlist_id,))
+            written[playlist_id] = rebalance(cursor, playlist_id)
+        conn.commit()
+    return written
@@ -0,0 +1,377 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - PLAY EVENTS
+# Purpose: Listening history and live play counts. POST /api/plays appends
+#          events to a bounded in-memory ring buffer that a background thread
+#          writes to Plays (sql/10_plays.sql) in multi-row INSERTs. Every
+#          worker tails the new Plays rows into per-song rolling counters
+#          (last hour / day / week), so play counts and trending are served
+#          from memory and agree across workers
+# Config:  PLAYS_BUFFER_CAPACITY, PLAYS_FLUSH_INTERVAL, PLAYS_FLUSH_SIZE,
+#          PLAY_COUNTS_POLL_INTERVAL (see app.py)
+# ============================================================================
+
+import heapq
+import threading
+import time
+from collections import Counter, deque
+from operator import itemgetter
+
+import pymysql
+from pymysql.constants import ER
+
+HOUR = 3600
+DAY = 24 * HOUR
+WEEK = 7 * DAY
+
+# Rolling windows: name -> (length, bucket size) in seconds
+WINDOWS = {
+    'hour': (HOUR, 60),
+    'day': (DAY, HOUR),
+    'week': (WEEK, HOUR),
+}
+
+# Ids skipped by the tail (a flush from another worker not committed yet, or
+# a rolled back insert) are re-checked for this long, up to this many
+GAP_RETRY_SECONDS = 60.0
+MAX_GAPS = 10000
+
+# Bounds of the Plays columns (INT ids, TIMESTAMP played_at)
+MAX_INT = 2 ** 31 - 1
+MIN_TIMESTAMP = 1.0
+
+
+def is_row_error(error):
+    """True when MySQL refused the values sent, so retrying them cannot succeed"""
+    if isinstance(error, (pymysql.err.DataError, pymysql.err.IntegrityError)):
+        return True
+    return isinstance(error, pymysql.err.MySQLError) and error.args[:1] == (ER.TRUNCATED_WRONG_VALUE,)
+
+
+class PlayBuffer:
+    """
+    Play events waiting to be written, oldest first.
+
+    The buffer is a ring of `capacity` events: if MySQL stays unavailable for
+    long enough to fill it, the oldest unwritten events are dropped (and
+    counted) rather than growing without bound. A flush takes everything
+    pending and writes it in one transaction; if MySQL is unreachable the
+    events go back to the front of the ring. If it rejects the values
+    instead, the batch is split in halves until the offending events are
+    isolated and dropped (counted as rejected), so one bad event cannot
+    block every play queued behind it.
+    """
+
+    def __init__(self, pool, capacity=100000, flush_interval=1.0, flush_size=1000, log=print):
+        self.pool = pool
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.log = log
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._events = deque(maxlen=capacity)     # (user_id, song_id, played_at, seconds_played)
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {'events': 0, 'dropped': 0, 'rejected': 0, 'flushes': 0, 'rows_written': 0, 'failures': 0}
+
+    def append(self, events):
+        """Queue (user_id, song_id, played_at, seconds_played) tuples"""
+        with self._lock:
+            overflow = len(self._events) + len(events) - self._events.maxlen
+            if overflow > 0:
+                self._stats['dropped'] += overflow
+            self._events.extend(events)
+            self._stats['events'] += len(events)
+            if len(self._events) >= self.flush_size:
+                self._wakeup.set()
+
+    def flush(self):
+        """Write every pending event to Plays. Returns the number written."""
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._events)
+                self._events.clear()
+            if not batch:
+                return 0
+
+            pending = deque([batch])    # parts not written yet, in order
+            written = rejected = 0
+            try:
+                with self.pool.connection() as conn:
+                    while pending:
+                        part = pending[0]
+                        try:
+                            self._write(conn, part)
+                        except Exception as e:
+                            if not is_row_error(e):
+                                raise
+                            pending.popleft()
+                            if len(part) > 1:
+                                middle = len(part) // 2
+                                pending.extendleft([part[middle:], part[:middle]])
+                            else:
+                                rejected += 1
+                                self.log(f"❌ Dropped play rejected by MySQL {part[0]}: {e}")
+                            continue
+                        pending.popleft()
+                        written += len(part)
+            except Exception:
+                with self._lock:
+                    # Back in front of anything queued during the flush; the
+                    # ring drops the oldest if that overflows it
+                    unwritten = [event for part in pending for event in part]
+                    newer = list(self._events)
+                    self._events.clear()
+                    self._events.extend(unwritten)
+                    self._events.extend(newer)
+                    self._stats['dropped'] += max(0, len(unwritten) + len(newer) - self._events.maxlen)
+                    self._stats['rows_written'] += written
+                    self._stats['rejected'] += rejected
+                    self._stats['failures'] += 1
+                raise
+
+            with self._lock:
+                self._stats['flushes'] += 1
+                self._stats['rows_written'] += written
+                self._stats['rejected'] += rejected
+            return written
+
+    def _write(self, conn, batch):
+        cursor = conn.cursor()
+        try:
+            # pymysql folds this into multi-row INSERTs
+            cursor.executemany("""
+                INSERT INTO Plays (user_id, song_id, played_at, seconds_played)
+                VALUES (%s, %s, FROM_UNIXTIME(%s), %s)
+            """, batch)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def start(self):
+        """Flush every `flush_interval` seconds (or sooner at `flush_size`)"""
+        def run():
+            while not self._stop.is_set():
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+                try:
+                    self.flush()
+                except Exception as e:
+                    self.log(f"❌ Plays flush failed: {e}")
+
+        self._thread = threading.Thread(target=run, name='plays-flusher', daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Stop the flusher and write whatever is still pending"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+        try:
+            self.flush()
+        except Exception as e:
+            self.log(f"❌ Plays final flush failed: {e}")
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, pending=len(self._events), capacity=self._events.maxlen)
+
+
+class RollingCounter:
+    """
+    Per-song counts over the last `window` seconds, kept in `bucket` second
+    slots. Totals are maintained incrementally: a slot's counts are added as
+    plays arrive and subtracted once when the slot leaves the window.
+    """
+
+    def __init__(self, window, bucket):
+        self.bucket = bucket
+        self.slots = window // bucket
+        self._buckets = {}      # slot number -> Counter
+        self._head = 0          # newest slot expired against
+        self.totals = Counter()
+
+    def add(self, song_id, slot, count=1):
+        if slot <= self._head - self.slots:
+            return
+        bucket = self._buckets.get(slot)
+        if bucket is None:
+            bucket = self._buckets[slot] = Counter()
+        bucket[song_id] += count
+        self.totals[song_id] += count
+
+    def expire(self, now):
+        head = int(now // self.bucket)
+        if head == self._head:
+            return
+        self._head = head
+        for slot in [slot for slot in self._buckets if slot <= head - self.slots]:
+            self.totals.subtract(self._buckets.pop(slot))
+        # Drop songs whose count fell to zero so the totals stay small
+        self.totals = +self.totals
+
+
+class PlayCounts:
+    """
+    Rolling play counts per song for every window in WINDOWS, fed from the
+    Plays table rather than from this worker's own requests: `load` reads
+    the last week once, then `poll` reads only rows past the highest
+    play_id seen (a primary key range), so every worker counts every play
+    exactly once.
+    """
+
+    def __init__(self, pool, poll_interval=2.0, trending_ttl=5.0, log=print):
+        self.pool = pool
+        self.poll_interval = poll_interval
+        self.trending_ttl = trending_ttl
+        self.log = log
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        self._counters = {name: RollingCounter(*spec) for name, spec in WINDOWS.items()}
+        self._last_id = None
+        self._gaps = {}         # skipped play_id -> monotonic time first missed
+        self._trending = {}     # (window, limit) -> (computed at, [(song_id, plays)])
+        self._thread = None
+        self._stats = {'loaded': 0, 'polls': 0, 'rows_read': 0, 'gaps_filled': 0, 'gaps_expired': 0, 'failures': 0}
+
+    @property
+    def loaded(self):
+        return self._last_id is not None
+
+    def _add(self, song_id, played_at, count=1):
+        for counter in self._counters.values():
+            counter.add(song_id, int(played_at // counter.bucket), count)
+
+    def load(self):
+        """Count the last week of plays (one aggregate per bucket size)"""
+        with self._poll_lock, self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("""
+                    SELECT COALESCE(MAX(play_id), 0) AS last_id FROM Plays
+                """)
+                last_id = cursor.fetchone()['last_id']
+                since = time.time() - WEEK
+                with self._lock:
+                    self._counters = {name: RollingCounter(*spec) for name, spec in WINDOWS.items()}
+                    for bucket in sorted({bucket for _, bucket in WINDOWS.values()}):
+                        cursor.execute("""
+                            SELECT song_id, FLOOR(UNIX_TIMESTAMP(played_at) / %s) AS slot, COUNT(*) AS plays
+                            FROM Plays
+                            WHERE play_id <= %s AND played_at >= FROM_UNIXTIME(%s)
+                            GROUP BY song_id, slot
+                        """, (bucket, last_id, since))
+                        for row in cursor.fetchall():
+                            for counter in self._counters.values():
+                                if counter.bucket == bucket:
+                                    counter.add(row['song_id'], int(row['slot']), row['plays'])
+                    self._last_id = last_id
+                    self._gaps = {}
+                    self._trending = {}
+                    self._stats['loaded'] += 1
+            finally:
+                cursor.close()
+            conn.commit()
+
+    def poll(self):
+        """Count plays written since the last poll. Returns rows read."""
+        if not self.loaded:
+            self.load()
+            return 0
+        with self._poll_lock, self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                gaps = list(self._gaps)
+                params = [self._last_id]
+                condition = 'play_id > %s'
+                if gaps:
+                    condition += f" OR play_id IN ({', '.join(['%s'] * len(gaps))})"
+                    params += gaps
+                cursor.execute(f"""
+                    SELECT play_id, song_id, UNIX_TIMESTAMP(played_at) AS played_at
+                    FROM Plays
+                    WHERE {condition}
+                    ORDER BY play_id
+                """, params)
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+            # A fresh read view on the next poll sees newly committed rows
+            conn.commit()
+
+        now = time.monotonic()
+        with self._lock:
+            expected = self._last_id + 1
+            for row in rows:
+                play_id = row['play_id']
+                if play_id in self._gaps:
+                    del self._gaps[play_id]
+                    self._stats['gaps_filled'] += 1
+                elif play_id > self._last_id:
+                    for missing in range(expected, min(play_id, expected + MAX_GAPS)):
+                        self._gaps[missing] = now
+                    expected = play_id + 1
+                    self._last_id = play_id
+                self._add(row['song_id'], float(row['played_at']))
+            for play_id, missed_at in list(self._gaps.items()):
+                if now - missed_at > GAP_RETRY_SECONDS:
+                    del self._gaps[play_id]
+                    self._stats['gaps_expired'] += 1
+            while len(self._gaps) > MAX_GAPS:
+                self._gaps.pop(next(iter(self._gaps)))
+                self._stats['gaps_expired'] += 1
+            self._stats['polls'] += 1
+            self._stats['rows_read'] += len(rows)
+        return len(rows)
+
+    def start(self):
+        """Load, then poll every `poll_interval` seconds"""
+        def run():
+            while True:
+                try:
+                    self.poll()
+                except Exception as e:
+                    self._stats['failures'] += 1
+                    self.log(f"❌ Play counts poll failed: {e}")
+                time.sleep(self.poll_interval)
+
+        self._thread = threading.Thread(target=run, name='play-counts', daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------------
+
+    def counts(self, song_id):
+        """{window: plays} for one song"""
+        now = time.time()
+        with self._lock:
+            result = {}
+            for name, counter in self._counters.items():
+                counter.expire(now)
+                result[name] = counter.totals.get(song_id, 0)
+            return result
+
+    def trending(self, window, limit):
+        """[(song_id, plays)] most played in `window`, recomputed at most every trending_ttl"""
+        key = (window, limit)
+        cached = self._trending.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self.trending_ttl:
+            return cached[1]
+        with self._lock:
+            counter = self._counters[window]
+            counter.expire(time.time())
+            top = heapq.nlargest(limit, counter.totals.items(), key=itemgetter(1))
+        self._trending[key] = (time.monotonic(), top)
+        return top
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, last_play_id=self._last_id, gaps=len(self._gaps))
+            for name, counter in self._counters.items():
+                stats[f'songs_{name}'] = len(counter.totals)
+            return stats
@@ -0,0 +1,87 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - SERVER-SIDE PREPARED STATEMENTS
+# Purpose: Run the hottest single-row lookups (the ETag version checks and
+#          song details, issued on nearly every GET) as server-side prepared
+#          statements. Each connection prepares a statement once
+#          (COM_STMT_PREPARE); every later call sends only the statement id
+#          and binary-encoded parameters (COM_STMT_EXECUTE), so MySQL skips
+#          parsing and planning and no SQL text crosses the wire
+# Config:  MYSQL_PREPARED_STATEMENTS, MYSQL_PREPARED_POOL_SIZE (see app.py)
+# Requires: mysql-connector-python (PyMySQL only speaks the text protocol);
+#          without it callers fall back to their pymysql connection
+# ============================================================================
+
+import time
+
+from db_pool import ConnectionPool
+from instrumentation import compact_sql, record_query
+
+try:
+    import mysql.connector
+except ImportError:  # pragma: no cover - optional dependency
+    mysql = None
+
+AVAILABLE = mysql is not None
+
+
+class PreparedStatements:
+    """
+    Pool of mysql-connector connections that keeps one prepared cursor per
+    statement per connection. Connections run in autocommit, so a lookup
+    always sees the latest committed rows and holds no transaction open.
+    """
+
+    def __init__(self, config, size=5, max_overflow=10, timeout=30.0,
+                 idle_timeout=300.0, recycle=3600.0):
+        if not AVAILABLE:
+            raise RuntimeError('mysql-connector-python is not installed')
+        self._config = {
+            'host': config['host'],
+            'port': config['port'],
+            'user': config['user'],
+            'password': config['password'],
+            'database': config['database'],
+            'autocommit': True,
+        }
+        self.pool = ConnectionPool(
+            self._connect, size=size, max_overflow=max_overflow, timeout=timeout,
+            idle_timeout=idle_timeout, recycle=recycle)
+
+    def _connect(self):
+        conn = mysql.connector.connect(**self._config)
+        # statement text -> (statement, prepared cursor), closed with the connection
+        conn.prepared_cursors = {}
+        return conn
+
+    def fetchall(self, sql, args=()):
+        """Rows of a prepared `sql` (%s placeholders) as dicts"""
+        sql = compact_sql(sql)
+        with self.pool.connection() as conn:
+            cached = conn.prepared_cursors.get(sql)
+            if cached is None:
+                cached = conn.prepared_cursors[sql] = (sql, conn.cursor(prepared=True, dictionary=True))
+            # The driver re-prepares whenever it is handed a different string
+            # object, even an equal one, so always pass the one it prepared
+            sql, cursor = cached
+            started = time.perf_counter()
+            try:
+                cursor.execute(sql, args)
+                rows = cursor.fetchall()
+            except Exception:
+                # The statement may not have been prepared; start over next time
+                conn.prepared_cursors.pop(sql, None)
+                record_query(sql, args, time.perf_counter() - started, None, check=False)
+                raise
+            record_query(sql, args, time.perf_counter() - started, len(rows))
+        return rows
+
+    def fetchone(self, sql, args=()):
+        """First row of a prepared `sql`, or None"""
+        rows = self.fetchall(sql, args)
+        return rows[0] if rows else None
+
+    def stats(self):
+        return self.pool.stats()
+
+    def dispose(self):
+        self.pool.dispose()
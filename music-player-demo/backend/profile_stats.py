@@ -0,0 +1,300 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - MAINTAINED PROFILE STATISTICS
+# Purpose: Keep Users.playlist_count, Users.total_songs and
+#          Playlists.song_count up to date inside the playlist write
+#          transactions, plus a reconcile job that repairs any drift
+# Schema:  sql/05_profile_counters.sql
+# ============================================================================
+
+import threading
+
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def lock_user(cursor, user_id):
+    """Serialize counter updates for one user for the rest of the transaction"""
+    cursor.execute("""
+        SELECT user_id FROM Users
+        WHERE user_id = %s
+        FOR UPDATE
+    """, (user_id,))
+
+
+def playlist_created(cursor, user_id):
+    cursor.execute("""
+        UPDATE Users
+        SET playlist_count = playlist_count + 1
+        WHERE user_id = %s
+    """, (user_id,))
+
+
+def songs_added(cursor, user_id, playlist_id, song_ids):
+    """Account for songs newly inserted into one of the user's playlists"""
+    song_ids = list(set(song_ids))
+    if not song_ids:
+        return
+    lock_user(cursor, user_id)
+
+    cursor.execute("""
+        UPDATE Playlists
+        SET song_count = song_count + %s
+        WHERE playlist_id = %s
+    """, (len(song_ids), playlist_id))
+
+    cursor.execute(f"""
+        SELECT song_id FROM User_Song_Refs
+        WHERE user_id = %s AND song_id IN ({_placeholders(song_ids)})
+    """, [user_id] + song_ids)
+    already_owned = {row['song_id'] for row in cursor.fetchall()}
+
+    cursor.executemany("""
+        INSERT INTO User_Song_Refs (user_id, song_id, playlist_refs)
+        VALUES (%s, %s, 1)
+        ON DUPLICATE KEY UPDATE playlist_refs = playlist_refs + 1
+    """, [(user_id, song_id) for song_id in song_ids])
+
+    new_songs = len(song_ids) - len(already_owned)
+    if new_songs:
+        cursor.execute("""
+            UPDATE Users
+            SET total_songs = total_songs + %s
+            WHERE user_id = %s
+        """, (new_songs, user_id))
+
+
+def songs_removed(cursor, user_id, playlist_id, song_ids, playlist_deleted=False):
+    """Account for songs removed from one of the user's playlists"""
+    song_ids = list(set(song_ids))
+    if not song_ids:
+        return
+    lock_user(cursor, user_id)
+
+    if not playlist_deleted:
+        cursor.execute("""
+            UPDATE Playlists
+            SET song_count = GREATEST(song_count - %s, 0)
+            WHERE playlist_id = %s
+        """, (len(song_ids), playlist_id))
+
+    cursor.execute(f"""
+        UPDATE User_Song_Refs
+        SET playlist_refs = playlist_refs - 1
+        WHERE user_id = %s AND song_id IN ({_placeholders(song_ids)})
+    """, [user_id] + song_ids)
+
+    # Songs no longer in any of the user's playlists leave the distinct set
+    cursor.execute(f"""
+        DELETE FROM User_Song_Refs
+        WHERE user_id = %s AND song_id IN ({_placeholders(song_ids)})
+          AND playlist_refs <= 0
+    """, [user_id] + song_ids)
+    gone = cursor.rowcount
+
+    if gone:
+        cursor.execute("""
+            UPDATE Users
+            SET total_songs = GREATEST(total_songs - %s, 0)
+            WHERE user_id = %s
+        """, (gone, user_id))
+
+
+def playlist_deleted(cursor, user_id, playlist_id, song_ids):
+    """Account for a deleted playlist and every song it contained"""
+    songs_removed(cursor, user_id, playlist_id, song_ids, playlist_deleted=True)
+    cursor.execute("""
+        UPDATE Users
+        SET playlist_count = GREATEST(playlist_count - 1, 0)
+        WHERE user_id = %s
+    """, (user_id,))
+
+
+# ============================================================================
+# RECONCILE JOB
+# ============================================================================
+
+# Named lock held for a whole run, so workers and cron never reconcile at once
+RECONCILE_LOCK = 'music_player.profile_stats_reconcile'
+
+
+def drifted_users(cursor):
+    """Users with a counter or song reference that disagrees with the source tables"""
+    user_ids = set()
+
+    cursor.execute("""
+        SELECT U.user_id
+        FROM Users U
+        LEFT JOIN (
+            SELECT user_id, COUNT(*) AS playlist_count
+            FROM Playlists
+            GROUP BY user_id
+        ) PC ON U.user_id = PC.user_id
+        LEFT JOIN (
+            SELECT user_id, COUNT(*) AS total_songs
+            FROM User_Song_Refs
+            GROUP BY user_id
+        ) TS ON U.user_id = TS.user_id
+        WHERE U.playlist_count <> COALESCE(PC.playlist_count, 0)
+           OR U.total_songs <> COALESCE(TS.total_songs, 0)
+    """)
+    user_ids.update(row['user_id'] for row in cursor.fetchall())
+
+    cursor.execute("""
+        SELECT DISTINCT P.user_id
+        FROM Playlists P
+        LEFT JOIN (
+            SELECT playlist_id, COUNT(*) AS song_count
+            FROM Playlist_Songs
+            GROUP BY playlist_id
+        ) X ON P.playlist_id = X.playlist_id
+        WHERE P.song_count <> COALESCE(X.song_count, 0)
+    """)
+    user_ids.update(row['user_id'] for row in cursor.fetchall())
+
+    # References counted wrongly or missing, then references to nothing
+    cursor.execute("""
+        SELECT DISTINCT X.user_id
+        FROM (
+            SELECT P.user_id, PS.song_id, COUNT(*) AS playlist_refs
+            FROM Playlist_Songs PS
+            INNER JOIN Playlists P ON PS.playlist_id = P.playlist_id
+            GROUP BY P.user_id, PS.song_id
+        ) X
+        LEFT JOIN User_Song_Refs R ON R.user_id = X.user_id AND R.song_id = X.song_id
+        WHERE R.playlist_refs IS NULL OR R.playlist_refs <> X.playlist_refs
+    """)
+    user_ids.update(row['user_id'] for row in cursor.fetchall())
+
+    cursor.execute("""
+        SELECT DISTINCT R.user_id
+        FROM User_Song_Refs R
+        WHERE NOT EXISTS (
+            SELECT 1
+            FROM Playlist_Songs PS
+            INNER JOIN Playlists P ON PS.playlist_id = P.playlist_id
+            WHERE P.user_id = R.user_id AND PS.song_id = R.song_id
+        )
+    """)
+    user_ids.update(row['user_id'] for row in cursor.fetchall())
+    return sorted(user_ids)
+
+
+def repair_user(cursor, user_id):
+    """
+    Rewrite only the counters and references of one user that are wrong.
+    Runs under the same Users row lock as the write routes, so a concurrent
+    playlist edit applies its delta after the repair instead of racing it.
+    Returns (references, playlists, users) rows changed.
+    """
+    lock_user(cursor, user_id)
+
+    cursor.execute("""
+        SELECT PS.song_id, COUNT(*) AS playlist_refs
+        FROM Playlist_Songs PS
+        INNER JOIN Playlists P ON PS.playlist_id = P.playlist_id
+        WHERE P.user_id = %s
+        GROUP BY PS.song_id
+    """, (user_id,))
+    expected = {row['song_id']: row['playlist_refs'] for row in cursor.fetchall()}
+    cursor.execute("""
+        SELECT song_id, playlist_refs FROM User_Song_Refs
+        WHERE user_id = %s
+    """, (user_id,))
+    actual = {row['song_id']: row['playlist_refs'] for row in cursor.fetchall()}
+
+    wrong = [(user_id, song_id, refs) for song_id, refs in expected.items() if actual.get(song_id) != refs]
+    if wrong:
+        cursor.executemany("""
+            INSERT INTO User_Song_Refs (user_id, song_id, playlist_refs)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE playlist_refs = VALUES(playlist_refs)
+        """, wrong)
+    stale = [song_id for song_id in actual if song_id not in expected]
+    if stale:
+        cursor.execute(f"""
+            DELETE FROM User_Song_Refs
+            WHERE user_id = %s AND song_id IN ({_placeholders(stale)})
+        """, [user_id] + stale)
+
+    cursor.execute("""
+        SELECT P.playlist_id, P.song_count, COUNT(PS.song_id) AS actual_count
+        FROM Playlists P
+        LEFT JOIN Playlist_Songs PS ON P.playlist_id = PS.playlist_id
+        WHERE P.user_id = %s
+        GROUP BY P.playlist_id, P.song_count
+    """, (user_id,))
+    rows = cursor.fetchall()
+    playlist_count = len(rows)
+    playlists = [(row['actual_count'], row['playlist_id'])
+                 for row in rows if row['song_count'] != row['actual_count']]
+    if playlists:
+        cursor.executemany("""
+            UPDATE Playlists
+            SET song_count = %s
+            WHERE playlist_id = %s
+        """, playlists)
+
+    cursor.execute("""
+        UPDATE Users
+        SET playlist_count = %s, total_songs = %s
+        WHERE user_id = %s AND (playlist_count <> %s OR total_songs <> %s)
+    """, (playlist_count, len(expected), user_id, playlist_count, len(expected)))
+
+    return len(wrong) + len(stale), len(playlists), cursor.rowcount
+
+
+def reconcile(conn):
+    """
+    Find users whose counters drifted from the source tables and repair just
+    those rows, one short transaction per user. Returns how many rows were
+    repaired, or None when another process is already reconciling.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, 0) AS acquired", (RECONCILE_LOCK,))
+        if not cursor.fetchone()['acquired']:
+            return None
+        try:
+            user_ids = drifted_users(cursor)
+            conn.commit()
+
+            fixed = {'users_checked': len(user_ids), 'refs_fixed': 0, 'playlists_fixed': 0, 'users_fixed': 0}
+            for user_id in user_ids:
+                try:
+                    refs, playlists, users = repair_user(cursor, user_id)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                fixed['refs_fixed'] += refs
+                fixed['playlists_fixed'] += playlists
+                fixed['users_fixed'] += users
+            return fixed
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (RECONCILE_LOCK,))
+            conn.commit()
+    finally:
+        cursor.close()
+
+
+def start_reconciler(pool, interval, log=print):
+    """
+    Run `reconcile` every `interval` seconds on a daemon thread. Runs that
+    find another worker (or the CLI) already reconciling are skipped.
+    """
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            try:
+                with pool.connection() as conn:
+                    fixed = reconcile(conn)
+                if fixed and (fixed['refs_fixed'] or fixed['playlists_fixed'] or fixed['users_fixed']):
+                    log(f"🔧 Profile stats drift repaired: {fixed}")
+            except Exception as e:
+                log(f"❌ Profile stats reconcile failed: {e}")
+
+    thread = threading.Thread(target=run, name='profile-stats-reconciler', daemon=True)
+    thread.start()
+    return stop
@@ -0,0 +1,114 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - ROW PROJECTIONS
+# Purpose: One place for the column lists the song routes select and for the
+#          derived fields computed from them. Queries fetch raw columns (so
+#          MySQL can answer from covering indexes, see sql/06_covering_indexes.sql)
+#          and durations are formatted here, a whole result set at a time
+# ============================================================================
+
+# Pre-formatted "m:ss" strings for every duration under two hours
+_DURATION_TABLE = [f"{seconds // 60}:{seconds % 60:02d}" for seconds in range(7200)]
+
+
+def format_duration(seconds):
+    """Format a duration in seconds as m:ss (None stays None)"""
+    if seconds is None:
+        return None
+    seconds = int(seconds)
+    if 0 <= seconds < len(_DURATION_TABLE):
+        return _DURATION_TABLE[seconds]
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+def format_durations(values):
+    """Batch form of format_duration for a column of values"""
+    table = _DURATION_TABLE
+    size = len(table)
+    return [
+        table[value] if value is not None and 0 <= value < size else format_duration(value)
+        for value in values
+    ]
+
+
+class Projection:
+    """
+    A shared select list plus the derived fields computed from it.
+
+    `columns` are SQL select expressions; `derived` maps an output field to a
+    batch function that receives that column for every row and returns the
+    formatted values in the same order.
+    """
+
+    def __init__(self, columns, derived=None):
+        self.columns = list(columns)
+        self.derived = dict(derived or {})
+        self.sql = ',\n                '.join(self.columns)
+
+    def shape(self, rows):
+        """Apply derived fields to dict rows in place; returns the rows"""
+        if rows:
+            for field, batch in self.derived.items():
+                for row, value in zip(rows, batch([row[field] for row in rows])):
+                    row[field] = value
+        return rows
+
+    def shape_one(self, row):
+        if row is not None:
+            self.shape([row])
+        return row
+
+    def shape_tuples(self, columns, rows):
+        """Apply derived fields to tuple rows; returns a new list of lists"""
+        rows = [list(row) for row in rows]
+        for field, batch in self.derived.items():
+            if field in columns:
+                i = columns.index(field)
+                for row, value in zip(rows, batch([row[i] for row in rows])):
+                    row[i] = value
+        return rows
+
+
+# Song listings: catalog, playlists, search results
+SONG_ROW = Projection([
+    'S.song_id',
+    'S.title',
+    'A.name as artist',
+    'S.duration',
+    'S.release_year',
+], {'duration': format_durations})
+
+# Songs listed under their artist (artist name is on the parent object)
+ARTIST_SONG_ROW = Projection([
+    'S.song_id',
+    'S.title',
+    'S.duration',
+    'S.release_year',
+], {'duration': format_durations})
+
+# A user's favorite songs
+FAVORITE_SONG_ROW = Projection([
+    'S.song_id',
+    'S.title',
+    'A.name as artist',
+    'S.duration',
+    'FS.favorited_at',
+], {'duration': format_durations})
+
+# Artist and playlist objects: the columns the API has always returned, so
+# bookkeeping columns added later (version, song_count) stay out of responses
+ARTIST_ROW = Projection([
+    'artist_id',
+    'name',
+    'bio',
+    'created_at',
+])
+
+PLAYLIST_ROW = Projection([
+    'playlist_id',
+    'user_id',
+    'name',
+    'description',
+    'color_hex',
+    'created_at',
+    'updated_at',
+])
@@ -0,0 +1,350 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - SONG RECOMMENDATIONS
+# Purpose: Item-item "people who kept this also kept" model. Every playlist
+#          and every user's favorites is a basket; two songs co-occur when
+#          they share a basket. Co-occurrence counts are computed with sparse
+#          matrix products (SciPy), cut to the top-k neighbours per song and
+#          stored as flat NumPy arrays, so a lookup is a binary search and a
+#          slice. New favorites are folded in as small count deltas until the
+#          next rebuild (`flask build-recommendations`).
+# Requires: numpy and scipy (optional - the API answers 503 without them)
+# Tables:  Playlist_Songs, Favorite_Songs
+# ============================================================================
+
+import os
+import threading
+import time
+from collections import defaultdict
+
+import pymysql
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # pragma: no cover - optional dependency
+    np = sparse = None
+
+AVAILABLE = np is not None and sparse is not None
+
+
+def baskets(conn):
+    """
+    Stream (basket, song_id) pairs: playlists are even basket ids, a user's
+    favorites odd ones, so the two kinds never collide.
+    """
+    cursor = conn.cursor(pymysql.cursors.SSCursor)
+    try:
+        cursor.execute("""
+            SELECT playlist_id * 2 AS basket, song_id FROM Playlist_Songs
+            UNION ALL
+            SELECT user_id * 2 + 1 AS basket, song_id FROM Favorite_Songs
+        """)
+        for basket, song_id in cursor:
+            yield basket, song_id
+    finally:
+        cursor.close()
+
+
+class CooccurrenceModel:
+    """
+    Top-k neighbour lists in CSR layout, sorted by score within each song:
+
+        song_ids    sorted song ids (row i describes song_ids[i])
+        counts      baskets containing each song
+        indptr      row i's neighbours are neighbours[indptr[i]:indptr[i + 1]]
+        neighbours  row indexes of the neighbouring songs
+        together    baskets shared with each neighbour
+
+    Scores are recomputed from the counts at read time (cosine with a
+    shrinkage term), so count deltas can be merged in before ranking.
+    """
+
+    __slots__ = ('song_ids', 'counts', 'indptr', 'neighbours', 'together',
+                 'top_k', 'shrink', 'built_at')
+
+    def __init__(self, song_ids, counts, indptr, neighbours, together, top_k, shrink, built_at):
+        self.song_ids = song_ids
+        self.counts = counts
+        self.indptr = indptr
+        self.neighbours = neighbours
+        self.together = together
+        self.top_k = top_k
+        self.shrink = shrink
+        self.built_at = built_at
+
+    @classmethod
+    def build(cls, pairs, top_k=50, shrink=5.0, block_size=2048):
+        """
+        Build from (basket, song_id) pairs. The song x song product is taken
+        `block_size` songs at a time so memory stays bounded by one block of
+        co-occurrence rows.
+        """
+        pairs = np.fromiter((value for pair in pairs for value in pair), dtype=np.int64)
+        pairs = pairs.reshape(-1, 2)
+        song_ids, cols = np.unique(pairs[:, 1], return_inverse=True)
+        _, rows = np.unique(pairs[:, 0], return_inverse=True)
+
+        baskets = sparse.csr_matrix(
+            (np.ones(len(cols), dtype=np.int32), (rows, cols)),
+            shape=(int(rows.max(initial=-1)) + 1, len(song_ids))
+        )
+        baskets.data[:] = 1                     # a song counts once per basket
+        counts = np.asarray(baskets.sum(axis=0)).ravel().astype(np.int32)
+        by_song = baskets.T.tocsr()
+
+        indptr = [0]
+        neighbours = []
+        together = []
+        for start in range(0, len(song_ids), block_size):
+            block = (by_song[start:start + block_size] @ baskets).tocsr()
+            for i in range(block.shape[0]):
+                row = start + i
+                lo, hi = block.indptr[i], block.indptr[i + 1]
+                others = block.indices[lo:hi]
+                shared = block.data[lo:hi]
+                keep = others != row
+                others, shared = others[keep], shared[keep]
+                scores = shared / (np.sqrt(counts[others] * float(counts[row])) + shrink)
+                if len(scores) > top_k:
+                    top = np.argpartition(-scores, top_k)[:top_k]
+                    others, shared, scores = others[top], shared[top], scores[top]
+                order = np.argsort(-scores, kind='stable')
+                neighbours.append(others[order])
+                together.append(shared[order])
+                indptr.append(indptr[-1] + len(order))
+
+        empty = np.empty(0, dtype=np.int32)
+        return cls(
+            song_ids.astype(np.int32),
+            counts,
+            np.asarray(indptr, dtype=np.int64),
+            np.concatenate(neighbours).astype(np.int32) if neighbours else empty,
+            np.concatenate(together).astype(np.int32) if together else empty,
+            top_k, shrink, time.time()
+        )
+
+    def save(self, path):
+        """Write the arrays to `path` (.npz), replacing any previous file atomically"""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            np.savez(f, song_ids=self.song_ids, counts=self.counts, indptr=self.indptr,
+                     neighbours=self.neighbours, together=self.together,
+                     meta=np.array([self.top_k, self.shrink, self.built_at]))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            top_k, shrink, built_at = data['meta'].tolist()
+            return cls(data['song_ids'], data['counts'], data['indptr'],
+                       data['neighbours'], data['together'], int(top_k), shrink, built_at)
+
+    def row(self, song_id):
+        """Row index of a song, or None if it is in no basket"""
+        i = int(np.searchsorted(self.song_ids, song_id))
+        if i < len(self.song_ids) and self.song_ids[i] == song_id:
+            return i
+        return None
+
+    def stats(self):
+        return {
+            'songs': len(self.song_ids),
+            'neighbour_entries': len(self.neighbours),
+            'top_k': self.top_k,
+            'bytes': sum(array.nbytes for array in (self.song_ids, self.counts, self.indptr,
+                                                     self.neighbours, self.together)),
+            'built_at': self.built_at,
+        }
+
+
+class Recommender:
+    """
+    Serves similar-song and per-user lookups from a CooccurrenceModel plus
+    the favorite changes recorded since it was built.
+
+    Favorite changes are queued by `record_favorite` (cheap, on the write
+    path) and turned into count deltas by `apply` once the caller has
+    loaded the affected users' favorites. Deltas only cover this process
+    and are dropped whenever a freshly built model is swapped in.
+    """
+
+    def __init__(self, path=None, top_k=50, shrink=5.0):
+        self.path = path
+        self.top_k = top_k
+        self.shrink = shrink
+        self.model = None
+        self._loaded_mtime = None
+        self._lock = threading.Lock()
+        self._pending = []
+        self._count_delta = defaultdict(int)
+        self._pair_delta = defaultdict(lambda: defaultdict(int))
+        self._delta_cache = None
+
+    # -- model lifecycle ----------------------------------------------------
+
+    def build(self, conn):
+        """Build from the database, save it to `path` and serve it"""
+        model = CooccurrenceModel.build(baskets(conn), self.top_k, self.shrink)
+        if self.path:
+            model.save(self.path)
+        self._swap(model, os.path.getmtime(self.path) if self.path else None)
+        return model
+
+    def reload(self):
+        """Load `path` if it changed since it was last loaded. Returns True if it did."""
+        if not self.path:
+            return False
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        if mtime == self._loaded_mtime:
+            return False
+        self._swap(CooccurrenceModel.load(self.path), mtime)
+        return True
+
+    def _swap(self, model, mtime):
+        with self._lock:
+            self.model = model
+            self._loaded_mtime = mtime
+            self._count_delta.clear()
+            self._pair_delta.clear()
+            self._delta_cache = None
+
+    # -- incremental updates ------------------------------------------------
+
+    def record_favorite(self, user_id, song_id, favorited):
+        """Queue a favorite that was added (True) or removed (False)"""
+        with self._lock:
+            self._pending.append((user_id, song_id, 1 if favorited else -1))
+
+    def pending_users(self):
+        with self._lock:
+            return {user_id for user_id, _, _ in self._pending}
+
+    def apply(self, favorites_by_user):
+        """
+        Fold queued favorite changes into the count deltas. `favorites_by_user`
+        maps each user in `pending_users()` to their current favorite song ids.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._delta_cache = None
+            for user_id, song_id, sign in pending:
+                self._count_delta[song_id] += sign
+                for other in favorites_by_user.get(user_id, ()):
+                    if other != song_id:
+                        self._pair_delta[song_id][other] += sign
+                        self._pair_delta[other][song_id] += sign
+        return len(pending)
+
+    # -- lookups ------------------------------------------------------------
+
+    def _delta_arrays(self):
+        """Count deltas as sorted (song ids, deltas) arrays, rebuilt after each apply"""
+        if self._delta_cache is None:
+            ids = np.fromiter(sorted(self._count_delta), dtype=np.int64, count=len(self._count_delta))
+            values = np.array([self._count_delta[song_id] for song_id in ids.tolist()], dtype=np.float64)
+            self._delta_cache = (ids, values)
+        return self._delta_cache
+
+    def _counts(self, model, ids):
+        """Baskets containing each song id, deltas included"""
+        counts = np.zeros(len(ids), dtype=np.float64)
+        for known, values in ((model.song_ids, model.counts),
+                              self._delta_arrays() if self._count_delta else (None, None)):
+            if known is None or not len(known):
+                continue
+            at = np.minimum(np.searchsorted(known, ids), len(known) - 1)
+            counts += np.where(known[at] == ids, values[at], 0)
+        return counts
+
+    def _candidates(self, model, seeds):
+        """
+        (neighbour song ids, scores) for every seed, concatenated. Seeds with
+        no pair deltas are gathered from the arrays in one vectorised pass.
+        """
+        seeds = np.asarray(seeds, dtype=np.int64)
+        at = np.minimum(np.searchsorted(model.song_ids, seeds), max(len(model.song_ids) - 1, 0))
+        found = (model.song_ids[at] == seeds) if len(model.song_ids) else np.zeros(len(seeds), dtype=bool)
+        merged = np.array([int(song_id) in self._pair_delta for song_id in seeds.tolist()], dtype=bool)
+
+        rows = at[found & ~merged]
+        plain = seeds[found & ~merged]
+        starts = model.indptr[rows]
+        lengths = model.indptr[rows + 1] - starts
+        index = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        others = model.neighbours[index]
+        ids = [model.song_ids[others].astype(np.int64)]
+        shared = [model.together[index].astype(np.float64)]
+        own = [np.repeat(self._counts(model, plain), lengths)]
+        counts = [self._counts(model, ids[0]) if self._count_delta
+                  else model.counts[others].astype(np.float64)]
+
+        for song_id in seeds[merged].tolist():
+            combined = defaultdict(int)
+            row = model.row(song_id)
+            if row is not None:
+                lo, hi = model.indptr[row], model.indptr[row + 1]
+                for other, together in zip(model.song_ids[model.neighbours[lo:hi]].tolist(),
+                                           model.together[lo:hi].tolist()):
+                    combined[other] += together
+            for other, delta in self._pair_delta[song_id].items():
+                combined[other] += delta
+            ids.append(np.fromiter(combined, dtype=np.int64, count=len(combined)))
+            shared.append(np.fromiter(combined.values(), dtype=np.float64, count=len(combined)))
+            own.append(np.full(len(combined), self._counts(model, [song_id])[0]))
+            counts.append(self._counts(model, ids[-1]))
+
+        ids, shared = np.concatenate(ids), np.concatenate(shared)
+        own, counts = np.concatenate(own), np.concatenate(counts)
+        keep = shared > 0
+        ids, shared, own, counts = ids[keep], shared[keep], own[keep], counts[keep]
+        scores = shared / (np.sqrt(np.maximum(counts, 1) * np.maximum(own, 1)) + model.shrink)
+        return ids, scores
+
+    def similar(self, song_id, limit=20):
+        """[(song_id, score)] best first, or None before a model is loaded"""
+        with self._lock:
+            model = self.model
+            if model is None:
+                return None
+            ids, scores = self._candidates(model, [song_id])
+        return _top(ids, scores, limit)
+
+    def recommend(self, seed_song_ids, limit=20):
+        """
+        Songs most similar to a set of seeds (a user's favorites and playlist
+        songs): neighbour scores summed over the seeds, seeds excluded.
+        """
+        seeds = list(dict.fromkeys(seed_song_ids))
+        with self._lock:
+            model = self.model
+            if model is None:
+                return None
+            if not seeds:
+                return []
+            ids, scores = self._candidates(model, seeds)
+        unique, inverse = np.unique(ids, return_inverse=True)
+        totals = np.bincount(inverse, weights=scores, minlength=len(unique))
+        keep = ~np.isin(unique, np.asarray(seeds, dtype=np.int64))
+        return _top(unique[keep], totals[keep], limit)
+
+    def stats(self):
+        with self._lock:
+            model = self.model
+            stats = {
+                'available': AVAILABLE,
+                'pending_events': len(self._pending),
+                'songs_with_deltas': len(self._pair_delta),
+            }
+        stats['model'] = model.stats() if model is not None else None
+        return stats
+
+
+def _top(ids, scores, limit):
+    if len(scores) > limit:
+        top = np.argpartition(-scores, limit)[:limit]
+        ids, scores = ids[top], scores[top]
+    order = np.lexsort((ids, -scores))
+    return [(int(ids[i]), round(float(scores[i]), 6)) for i in order]
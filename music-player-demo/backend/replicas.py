@@ -0,0 +1,165 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - READ REPLICA ROUTING
+# Purpose: Send read-only requests to MySQL replicas and keep writes on the
+#          primary, skipping any replica whose replication lag is over the
+#          limit (or unknown) so reads never fall far behind
+# Config:  MYSQL_REPLICA_HOSTS, REPLICA_MAX_LAG, REPLICA_LAG_CHECK_INTERVAL,
+#          PRIMARY_STICKY_SECONDS (see app.py)
+# ============================================================================
+
+import itertools
+import threading
+import time
+
+
+def parse_hosts(value, default_port=3306):
+    """'db-r1:3306, db-r2' -> [('db-r1', 3306), ('db-r2', 3306)]"""
+    hosts = []
+    for item in (value or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.partition(':')
+        hosts.append((host, int(port) if port else default_port))
+    return hosts
+
+
+def replication_lag(conn):
+    """
+    Seconds the replica is behind its source, or None when replication is
+    not running (or the server is not a replica).
+    """
+    cursor = conn.cursor()
+    try:
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+        except Exception:
+            # MySQL before 8.0.22 / MariaDB
+            cursor.execute("SHOW SLAVE STATUS")
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+    if not row:
+        return None
+    if isinstance(row, dict):
+        lag = row.get('Seconds_Behind_Source', row.get('Seconds_Behind_Master'))
+    else:
+        columns = [column[0] for column in cursor.description]
+        key = 'Seconds_Behind_Source' if 'Seconds_Behind_Source' in columns else 'Seconds_Behind_Master'
+        lag = row[columns.index(key)]
+    return float(lag) if lag is not None else None
+
+
+class Replica:
+    __slots__ = ('name', 'pool', 'lag', 'checked_at', 'error')
+
+    def __init__(self, name, pool):
+        self.name = name
+        self.pool = pool
+        self.lag = None           # seconds behind, None = unknown / stopped
+        self.checked_at = None
+        self.error = None
+
+
+class ReplicaRouter:
+    """
+    Pick the pool for a request: the primary for writes, otherwise the next
+    replica (round robin) whose last lag check was within `max_lag`.
+
+    Replicas start out unchecked and therefore unused; `check()` (run every
+    `check_interval` seconds by `start()`) measures lag on each one. A reading
+    older than `stale_after` seconds (default three check intervals) no longer
+    counts, so a replica stays out of rotation if its checks stop landing.
+    When no replica qualifies, reads fall back to the primary.
+    """
+
+    def __init__(self, primary, replicas=(), max_lag=5.0, check_interval=5.0, log=print,
+                 stale_after=None):
+        self.primary = primary
+        self.replicas = [Replica(name, pool) for name, pool in replicas]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.stale_after = stale_after if stale_after is not None else 3 * check_interval
+        self.log = log
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+        self._stats = {'primary_reads': 0, 'replica_reads': 0, 'fallbacks': 0}
+
+    @property
+    def enabled(self):
+        return bool(self.replicas)
+
+    def healthy(self, replica, now=None):
+        """True when `replica` had a recent lag reading within `max_lag`"""
+        if replica.lag is None or replica.checked_at is None or replica.lag > self.max_lag:
+            return False
+        return (now if now is not None else time.time()) - replica.checked_at <= self.stale_after
+
+    def read_pool(self):
+        """Pool for a read-only request"""
+        now = time.time()
+        healthy = [replica for replica in self.replicas if self.healthy(replica, now)]
+        with self._lock:
+            if not healthy:
+                self._stats['primary_reads'] += 1
+                if self.replicas:
+                    self._stats['fallbacks'] += 1
+                return self.primary
+            self._stats['replica_reads'] += 1
+            return healthy[next(self._next) % len(healthy)].pool
+
+    def check(self):
+        """Measure replication lag on every replica"""
+        for replica in self.replicas:
+            try:
+                with replica.pool.connection() as conn:
+                    lag = replication_lag(conn)
+                replica.error = None if lag is not None else 'replication not running'
+            except Exception as e:
+                lag = None
+                replica.error = str(e)
+            now = time.time()
+            was_healthy = self.healthy(replica, now)
+            replica.lag = lag
+            replica.checked_at = now
+            healthy = self.healthy(replica, now)
+            if was_healthy and not healthy:
+                self.log(f"⚠️ Replica {replica.name} taken out of rotation "
+                         f"(lag={lag}, error={replica.error})")
+            elif healthy and not was_healthy:
+                self.log(f"✅ Replica {replica.name} serving reads (lag={lag}s)")
+
+    def start(self):
+        """Check lag now and then every `check_interval` seconds on a daemon thread"""
+        stop = threading.Event()
+
+        def run():
+            while True:
+                try:
+                    self.check()
+                except Exception as e:
+                    self.log(f"❌ Replica lag check failed: {e}")
+                if stop.wait(self.check_interval):
+                    return
+
+        thread = threading.Thread(target=run, name='replica-lag-check', daemon=True)
+        thread.start()
+        return stop
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['max_lag'] = self.max_lag
+        now = time.time()
+        stats['replicas'] = [
+            {
+                'name': replica.name,
+                'lag': replica.lag,
+                'healthy': self.healthy(replica, now),
+                'checked_at': replica.checked_at,
+                'error': replica.error,
+                'pool': replica.pool.stats(),
+            }
+            for replica in self.replicas
+        ]
+        return stats
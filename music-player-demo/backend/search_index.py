@@ -0,0 +1,217 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - IN-PROCESS SEARCH INDEX
+# Purpose: Inverted index with BM25 ranking and prefix (typeahead) matching
+#          for songs, artists and users, replacing LIKE '%q%' table scans
+# ============================================================================
+
+import heapq
+import math
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+TOKEN_RE = re.compile(r'\w+')
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text):
+    """Split text into case-folded word tokens"""
+    if not text:
+        return []
+    return TOKEN_RE.findall(str(text).casefold())
+
+
+class SearchIndex:
+    """
+    Inverted index over documents made of weighted text fields.
+
+    Every term maps to {doc_id: weighted term frequency}; a sorted vocabulary
+    lets the last query term match as a prefix (typeahead). Queries require
+    every term to match and rank documents with BM25. Each document also keeps
+    a small payload so results can be rendered without another DB query.
+    """
+
+    def __init__(self, weights, max_expansions=64):
+        self.weights = weights
+        self.max_expansions = max_expansions
+        self.built_at = None
+
+        self._lock = threading.RLock()
+        self._postings = {}       # term -> {doc_id: weighted tf}
+        self._terms = []          # sorted vocabulary for prefix lookups
+        self._docs = {}           # doc_id -> (terms, length, payload)
+        self._total_length = 0.0
+
+    # ------------------------------------------------------------------------
+    # Building and incremental updates
+    # ------------------------------------------------------------------------
+
+    def load(self, documents):
+        """
+        Replace the whole index from an iterable of (doc_id, fields, payload).
+        The new index is built off to the side and swapped in at the end, so
+        searches keep using the previous one while a rebuild runs.
+        """
+        postings = {}
+        docs = {}
+        total_length = 0.0
+        for doc_id, fields, payload in documents:
+            tf = self._term_frequencies(fields)
+            for term, freq in tf.items():
+                postings.setdefault(term, {})[doc_id] = freq
+            length = sum(tf.values())
+            docs[doc_id] = (tuple(tf), length, payload)
+            total_length += length
+
+        terms = sorted(postings)
+        with self._lock:
+            self._postings = postings
+            self._terms = terms
+            self._docs = docs
+            self._total_length = total_length
+            self.built_at = time.monotonic()
+
+    def add(self, doc_id, fields, payload=None):
+        """Index (or re-index) a single document"""
+        tf = self._term_frequencies(fields)
+        with self._lock:
+            self._remove(doc_id)
+            for term, freq in tf.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    insort(self._terms, term)
+                postings[doc_id] = freq
+            length = sum(tf.values())
+            self._docs[doc_id] = (tuple(tf), length, payload)
+            self._total_length += length
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def get(self, doc_id):
+        """Payload stored for a document, or None"""
+        with self._lock:
+            doc = self._docs.get(doc_id)
+            return doc[2] if doc else None
+
+    # ------------------------------------------------------------------------
+    # Querying
+    # ------------------------------------------------------------------------
+
+    def search(self, query, limit=10, prefix=True):
+        """
+        Return up to `limit` (doc_id, score, payload) tuples, best first.
+        With `prefix`, the last query term also matches longer terms.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            groups = []
+            for i, term in enumerate(terms):
+                if prefix and i == len(terms) - 1:
+                    expansions = self._expand(term)
+                else:
+                    expansions = [term] if term in self._postings else []
+                if not expansions:
+                    return []
+                groups.append(expansions)
+
+            # Intersect the candidate sets, smallest first
+            candidate_sets = sorted(
+                (self._doc_set(expansions) for expansions in groups), key=len
+            )
+            candidates = candidate_sets[0]
+            for docs in candidate_sets[1:]:
+                candidates = candidates & docs
+                if not candidates:
+                    return []
+
+            n_docs = len(self._docs)
+            avg_length = self._total_length / n_docs if n_docs else 1.0
+            idf = {}
+            for expansions in groups:
+                for term in expansions:
+                    df = len(self._postings[term])
+                    idf[term] = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+            def score(doc_id):
+                length = self._docs[doc_id][1]
+                norm = K1 * (1 - B + B * length / avg_length)
+                total = 0.0
+                for expansions in groups:
+                    best = 0.0
+                    for term in expansions:
+                        tf = self._postings[term].get(doc_id)
+                        if tf:
+                            best = max(best, idf[term] * tf * (K1 + 1) / (tf + norm))
+                    total += best
+                return total
+
+            scored = ((score(doc_id), doc_id) for doc_id in candidates)
+            top = heapq.nlargest(limit, scored, key=lambda item: item[0])
+            return [(doc_id, value, self._docs[doc_id][2]) for value, doc_id in top]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'documents': len(self._docs),
+                'terms': len(self._terms),
+                'age_seconds': round(time.monotonic() - self.built_at, 1) if self.built_at else None,
+            }
+
+    # ------------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------------
+
+    def _term_frequencies(self, fields):
+        tf = {}
+        for field, text in fields.items():
+            weight = self.weights.get(field, 1.0)
+            for term in tokenize(text):
+                tf[term] = tf.get(term, 0.0) + weight
+        return tf
+
+    def _remove(self, doc_id):
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        terms, length, _ = doc
+        self._total_length -= length
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                i = bisect_left(self._terms, term)
+                if i < len(self._terms) and self._terms[i] == term:
+                    del self._terms[i]
+
+    def _expand(self, prefix):
+        """Vocabulary terms starting with `prefix` (bounded for latency)"""
+        expansions = []
+        i = bisect_left(self._terms, prefix)
+        while i < len(self._terms) and len(expansions) < self.max_expansions:
+            term = self._terms[i]
+            if not term.startswith(prefix):
+                break
+            expansions.append(term)
+            i += 1
+        return expansions
+
+    def _doc_set(self, terms):
+        if len(terms) == 1:
+            return self._postings[terms[0]].keys()
+        docs = set()
+        for term in terms:
+            docs.update(self._postings[term])
+        return docs
@@ -0,0 +1,141 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - SINGLE-FLIGHT REQUEST COALESCING
+# Purpose: When many identical reads arrive together (a shared playlist or
+#          artist page), run the work once and hand every concurrent caller
+#          the same result instead of repeating the same queries per request
+# ============================================================================
+
+import threading
+from functools import wraps
+
+from flask import Response, request
+
+
+class _Call:
+    __slots__ = ('done', 'value', 'error', 'tags', 'waiters')
+
+    def __init__(self, tags):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.tags = tags
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    In-flight calls keyed by request identity.
+
+    The first caller for a key runs the function; callers arriving while it
+    runs wait for its result (or exception) instead. Nothing is kept once
+    the call returns - this is not a cache. Writes `forget()` the tags they
+    affect, so a read that starts after a write commits never joins a call
+    that began before it. A follower waits at most `timeout` seconds, then
+    runs the function itself.
+    """
+
+    def __init__(self, timeout=30.0):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._calls = {}        # key -> _Call
+        self._tags = {}         # tag -> set of keys
+        self._stats = {'calls': 0, 'shared': 0, 'timeouts': 0, 'forgotten': 0}
+
+    def do(self, key, fn, tags=()):
+        """Return (fn() or the in-flight result for `key`, whether it was shared)"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call(tags)
+                for tag in tags:
+                    self._tags.setdefault(tag, set()).add(key)
+                leader = True
+                self._stats['calls'] += 1
+            else:
+                call.waiters += 1
+                leader = False
+
+        if not leader:
+            if not call.done.wait(self.timeout):
+                with self._lock:
+                    self._stats['timeouts'] += 1
+                return fn(), False
+            with self._lock:
+                self._stats['shared'] += 1
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+        try:
+            call.value = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    self._detach(key)
+            call.done.set()
+        return call.value, False
+
+    def forget(self, *tags):
+        """Let new callers for keys carrying `tags` start a fresh call"""
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._detach(key)
+                    self._stats['forgotten'] += 1
+
+    def _detach(self, key):
+        call = self._calls.pop(key)
+        for tag in call.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._calls),
+                        waiting=sum(call.waiters for call in self._calls.values()))
+
+
+def coalesced(flight, *tags, vary=None):
+    """
+    Share one execution of a GET view between identical concurrent requests.
+
+    The key is the request path plus its sorted query string, as in
+    @cached, plus `vary()` when given (requests that must not share a result,
+    e.g. primary vs replica reads); tags may use the view's URL parameters. The leader's response
+    body is copied to every follower, which gets its own Response (its
+    after_request hooks still run) marked X-Coalesced: 1. Streamed responses
+    cannot be copied, so followers of a streamed call run the view themselves.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            key = (request.path, tuple(sorted(request.args.items(multi=True))),
+                   vary() if vary is not None else None)
+            leader = {}
+
+            def run():
+                result = view(**kwargs)
+                leader['result'] = result
+                response = result[0] if isinstance(result, tuple) else result
+                status = result[1] if isinstance(result, tuple) and len(result) > 1 else response.status_code
+                if not isinstance(response, Response) or response.is_streamed:
+                    return None
+                return response.get_data(), status, response.mimetype
+
+            shared, was_shared = flight.do(key, run, [tag.format(**kwargs) for tag in tags])
+            if not was_shared:
+                return leader['result']
+            if shared is None:
+                return view(**kwargs)
+            body, status, mimetype = shared
+            response = Response(body, status=status, mimetype=mimetype)
+            response.headers['X-Coalesced'] = '1'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,7 @@
+# Unit tests for the backend's pure logic; none of them need MySQL.
+# Run from backend/: python -m pytest -q tests
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
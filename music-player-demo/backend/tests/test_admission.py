@@ -0,0 +1,43 @@
+import pytest
+
+from admission import AdmissionControl, Overloaded, parse_limits
+
+
+def test_parse_limits():
+    assert parse_limits('playlists=16, catalog=8,,default=32') == {
+        'playlists': 16, 'catalog': 8, 'default': 32}
+    assert parse_limits('') == {}
+    assert parse_limits(None) == {}
+
+
+def test_full_class_is_shed_after_the_queue_timeout():
+    admission = AdmissionControl({'search': 1}, queue_timeout=0.01, retry_after=2)
+    assert admission.admit('search') == 'search'
+    with pytest.raises(Overloaded) as shed:
+        admission.admit('search')
+    assert shed.value.retry_after == 2
+    admission.release('search')
+    assert admission.admit('search') == 'search'
+    stats = admission.stats()
+    assert stats['admitted'] == 2 and stats['shed_full'] == 1 and stats['search_active'] == 1
+
+
+def test_unlisted_classes_share_default_or_run_unlimited():
+    limited = AdmissionControl({'default': 1}, queue_timeout=0.01)
+    assert limited.admit('playlists') == 'default'
+    with pytest.raises(Overloaded):
+        limited.admit('catalog')
+
+    unlimited = AdmissionControl({'search': 1})
+    assert unlimited.admit('playlists') is None
+
+
+def test_saturated_pool_sheds_before_taking_a_slot():
+    waiters = [0]
+    admission = AdmissionControl({'default': 5}, pool_waiters=lambda: waiters[0], max_pool_waiters=3)
+    assert admission.admit('x') == 'default'
+    waiters[0] = 3
+    with pytest.raises(Overloaded) as shed:
+        admission.admit('x')
+    assert shed.value.reason == 'database pool saturated'
+    assert admission.stats()['default_active'] == 1
@@ -0,0 +1,42 @@
+from cache import ResponseCache
+
+
+def test_hit_miss_and_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('cache.time.monotonic', lambda: now[0])
+    cache = ResponseCache(ttl=10)
+    assert cache.get('a') is None
+    cache.set('a', 'value', 5)
+    assert cache.get('a') == 'value'
+    now[0] += 10
+    assert cache.get('a') is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['expirations'], stats['entries']) == (1, 2, 1, 0)
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = ResponseCache(max_entries=2, max_bytes=100)
+    cache.set('a', 1, 10)
+    cache.set('b', 2, 10)
+    cache.get('a')
+    cache.set('c', 3, 10)
+    assert cache.get('b') is None and cache.get('a') == 1
+
+    cache.set('big', 4, 95)
+    assert cache.stats()['bytes'] == 95 and cache.get('big') == 4
+    cache.set('huge', 5, 101)
+    assert cache.get('huge') is None
+
+
+def test_invalidate_by_tag():
+    cache = ResponseCache()
+    cache.set('songs?page=1', 1, 1, tags=['songs'])
+    cache.set('song:3', 2, 1, tags=['songs', 'artist:7'])
+    cache.set('artists', 3, 1, tags=['artists'])
+    cache.invalidate('artist:7')
+    assert cache.get('song:3') is None and cache.get('songs?page=1') == 1
+    cache.invalidate('songs')
+    assert cache.get('songs?page=1') is None and cache.get('artists') == 3
+    assert cache.stats()['invalidations'] == 2
+    cache.clear()
+    assert cache.stats()['entries'] == 0 and cache.stats()['bytes'] == 0
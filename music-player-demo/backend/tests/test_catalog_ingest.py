@@ -0,0 +1,180 @@
+import io
+
+import pytest
+
+from catalog_ingest import (
+    CatalogIngester, IngestError, MAX_INT, clean_record, feed_format, parse_duration,
+    parse_year, read_records, _tsv_field,
+)
+
+
+def test_parse_duration():
+    assert parse_duration(245) == 245
+    assert parse_duration('245') == 245
+    assert parse_duration('4:05') == 245
+    assert parse_duration('1:02:03') == 3723
+    for bad in ('', '4:5x', '1:2:3:4', '-5', True, -1, MAX_INT + 1, '99999999999'):
+        with pytest.raises(ValueError):
+            parse_duration(bad)
+
+
+def test_parse_year():
+    assert parse_year(1999) == 1999
+    assert parse_year(' 2001 ') == 2001
+    assert parse_year('') is None
+    assert parse_year(None) is None
+    for bad in ('19x9', True, 0, 10000, 2 ** 40, 1999.5):
+        with pytest.raises(ValueError):
+            parse_year(bad)
+
+
+def test_clean_record():
+    record = {'artist': ' Aurora ', 'title': 'Runaway', 'duration': '4:08',
+              'genre': '', 'release_year': '2015', 'bio': 'Norwegian singer'}
+    assert clean_record(record, 1) == ('Aurora', 'Runaway', 248, None, 2015, 'Norwegian singer')
+
+
+@pytest.mark.parametrize('record, message', [
+    ({'title': 'T', 'duration': 1}, 'artist is required'),
+    ({'artist': 'A', 'title': 'T'}, 'duration is required'),
+    ({'artist': 'A', 'title': 'T', 'duration': '99999999999'}, 'invalid duration'),
+    ({'artist': 'A', 'title': 'T', 'duration': 1, 'release_year': 2 ** 40}, 'invalid release_year'),
+    ({'artist': 'A', 'title': 'T', 'duration': 1, 'bio': {'text': 'x'}}, 'bio must be text'),
+    ({'artist': 'A' * 256, 'title': 'T', 'duration': 1}, 'artist is longer than 255'),
+    (['not', 'an', 'object'], 'expected an object'),
+])
+def test_clean_record_rejects(record, message):
+    with pytest.raises(IngestError) as error:
+        clean_record(record, 7)
+    assert str(error.value).startswith('record 7: ')
+    assert message in str(error.value)
+
+
+def test_read_records_and_format():
+    assert feed_format('feed.ndjson') == 'jsonl'
+    assert feed_format('feed.CSV') == 'csv'
+    assert feed_format('feed', default='jsonl') == 'jsonl'
+    rows = list(read_records(io.StringIO('{"title": "a"}\n\nnot json\n'), 'jsonl'))
+    assert rows[0] == {'title': 'a'}
+    assert isinstance(rows[1], ValueError)
+    with pytest.raises(IngestError):
+        clean_record(rows[1], 2)
+
+
+def test_tsv_field_escapes_for_load_data():
+    assert _tsv_field(None) == '\\N'
+    assert _tsv_field('a\tb\nc\\') == 'a\\tb\\nc\\\\'
+
+
+# ----------------------------------------------------------------------------
+# Chunking and resume, against an in-memory stand-in for the three tables
+# ----------------------------------------------------------------------------
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+        self.rowcount = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=()):
+        if 'FROM Ingest_Checkpoints' in sql:
+            saved = self.db.checkpoint
+            self.rows = [dict(saved)] if saved else []
+        elif 'INTO Ingest_Checkpoints' in sql:
+            self.db.pending['checkpoint'] = {'records_done': params[1], 'completed_at': params[4] or None}
+        elif 'FROM Artists' in sql:
+            self.rows = [{'artist_id': self.db.artists[name], 'name': name}
+                         for name in params if name in self.db.artists]
+
+    def executemany(self, sql, rows):
+        if 'INTO Artists' in sql:
+            new = [name for name, _ in rows if name not in self.db.artists]
+            for name in new:
+                self.db.artists[name] = len(self.db.artists) + 1
+            self.rowcount = len(new)
+        else:
+            if self.db.fail_on_chunk == self.db.chunks:
+                raise RuntimeError('connection lost')
+            self.db.pending.setdefault('songs', []).extend(rows)
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeDB:
+    """Songs, Artists and Ingest_Checkpoints; writes apply on commit"""
+
+    def __init__(self, fail_on_chunk=None):
+        self.artists = {}
+        self.songs = []
+        self.checkpoint = None
+        self.pending = {}
+        self.chunks = 0
+        self.fail_on_chunk = fail_on_chunk
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.songs.extend(self.pending.get('songs', []))
+        if 'checkpoint' in self.pending:
+            self.checkpoint = self.pending['checkpoint']
+        self.pending = {}
+        self.chunks += 1
+
+    def rollback(self):
+        self.pending = {}
+
+
+def feed(count, bad=()):
+    for n in range(1, count + 1):
+        if n in bad:
+            yield {'artist': 'A', 'title': f'Song {n}', 'duration': 'x'}
+        else:
+            yield {'artist': f'Artist {n % 3}', 'title': f'Song {n}', 'duration': 200}
+
+
+def test_rejected_records_are_counted_and_the_rest_load():
+    db = FakeDB()
+    stats = CatalogIngester(db, chunk_size=4, source='feed').run(feed(10, bad={3, 7}))
+    assert stats['records'] == 10 and stats['rejected'] == 2 and stats['songs'] == 8
+    assert len(stats['errors']) == 2 and stats['errors'][0].startswith('record 3:')
+    assert stats['artists_created'] == 3
+    assert db.checkpoint['records_done'] == 10 and db.checkpoint['completed_at']
+
+
+def test_interrupted_feed_resumes_after_the_last_committed_chunk():
+    db = FakeDB(fail_on_chunk=1)
+    with pytest.raises(RuntimeError):
+        CatalogIngester(db, chunk_size=4, source='feed').run(feed(10))
+    # Only the first chunk committed, together with its checkpoint
+    assert db.checkpoint == {'records_done': 4, 'completed_at': None}
+    assert [song[1] for song in db.songs] == ['Song 1', 'Song 2', 'Song 3', 'Song 4']
+
+    db.fail_on_chunk = None
+    stats = CatalogIngester(db, chunk_size=4, source='feed').run(feed(10))
+    assert stats['skipped'] == 4 and stats['records'] == 6 and stats['songs'] == 6
+    assert [song[1] for song in db.songs] == [f'Song {n}' for n in range(1, 11)]
+    assert db.checkpoint['records_done'] == 10
+
+
+def test_completed_feed_rerun_loads_nothing():
+    db = FakeDB()
+    CatalogIngester(db, chunk_size=4, source='feed').run(feed(5))
+    stats = CatalogIngester(db, chunk_size=4, source='feed').run(feed(5))
+    assert stats['skipped'] == 5 and stats['records'] == 0 and stats['songs'] == 0
+    assert len(db.songs) == 5
+
+
+def test_skip_invalid_false_stops_at_the_first_bad_record():
+    with pytest.raises(IngestError):
+        CatalogIngester(FakeDB(), skip_invalid=False).run(feed(3, bad={2}))
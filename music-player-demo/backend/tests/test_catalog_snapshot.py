@@ -0,0 +1,107 @@
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from catalog_snapshot import CatalogSnapshot, SnapshotStore, write_snapshot
+from projections import ARTIST_ROW
+
+ARTISTS = [
+    (2, 'Aurora', 'Norwegian singer', datetime(2024, 1, 2, 3, 4, 5)),
+    (1, 'Midnight Engine', None, datetime(2023, 5, 6, 7, 8, 9)),
+]
+SONGS = [
+    (11, 1, 'Neon Nights', 245, 2019),
+    (10, 2, 'Runaway', 248, None),
+    (12, 9, 'Orphan', 100, 2000),            # unknown artist: skipped
+    (13, 2, 'Runaway', None, 2015),
+]
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'catalog.snapshot')
+    written = write_snapshot(path, ARTISTS, SONGS, generation=123)
+    assert (written['songs'], written['artists'], written['generation']) == (3, 2, 123)
+
+    snapshot = CatalogSnapshot(path)
+    assert snapshot.generation == 123
+    assert snapshot.songs() == [
+        (11, 'Neon Nights', 'Midnight Engine', 245, 2019),
+        (10, 'Runaway', 'Aurora', 248, None),
+        (13, 'Runaway', 'Aurora', None, 2015),
+    ]
+    assert snapshot.songs(1, 2) == [(10, 'Runaway', 'Aurora', 248, None)]
+    assert snapshot.songs(5) == []
+    assert snapshot.song_row(13) == 2 and snapshot.song_row(12) is None
+    assert snapshot.title_at(snapshot.song_row(10)) == 'Runaway'
+    # Titles are interned once
+    assert snapshot.string_count == 5
+    assert snapshot.artists() == [
+        {'artist_id': 2, 'name': 'Aurora', 'bio': 'Norwegian singer', 'created_at': datetime(2024, 1, 2, 3, 4, 5)},
+        {'artist_id': 1, 'name': 'Midnight Engine', 'bio': None, 'created_at': datetime(2023, 5, 6, 7, 8, 9)},
+    ]
+    # /api/artists has the same shape whether the snapshot or MySQL serves it
+    assert all(list(artist) == ARTIST_ROW.columns for artist in snapshot.artists())
+
+
+def test_store_maps_a_replaced_file(tmp_path):
+    path = str(tmp_path / 'catalog.snapshot')
+    store = SnapshotStore(path, check_interval=0)
+    assert store.current() is None
+    write_snapshot(path, ARTISTS, SONGS[:1])
+    assert store.current().song_count == 1
+    write_snapshot(path, ARTISTS, SONGS)
+    assert store.current().song_count == 3
+    assert store.stats()['loads'] == 2
+
+
+def test_mark_stale_reaches_other_workers_through_the_marker(tmp_path):
+    path = str(tmp_path / 'catalog.snapshot')
+    write_snapshot(path, ARTISTS, SONGS)
+    worker_a = SnapshotStore(path, check_interval=0)
+    worker_b = SnapshotStore(path, check_interval=0)
+    assert worker_a.current() is not None and worker_b.current() is not None
+
+    worker_a.mark_stale()
+    assert worker_a.current() is None and worker_a.stale
+    assert worker_b.current() is None and worker_b.stale
+
+    # A snapshot generated after the write is served again
+    write_snapshot(path, ARTISTS, SONGS)
+    assert worker_b.current() is not None
+
+
+class FailingPool:
+    def __init__(self):
+        self.attempts = 0
+        self.release = threading.Event()
+
+    @contextmanager
+    def connection(self):
+        self.attempts += 1
+        self.release.wait(5)
+        raise RuntimeError('database down')
+        yield
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.001)
+
+
+def test_one_rebuild_at_a_time_with_backoff_after_a_failure(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'catalog.snapshot'), retry_min=60, retry_max=600)
+    pool = FailingPool()
+    errors = []
+    assert store.rebuild_async(pool, log=errors.append)
+    assert not any(store.rebuild_async(pool, log=errors.append) for _ in range(20))
+    pool.release.set()
+    wait_for(lambda: not store.stats()['rebuilding'])
+
+    assert pool.attempts == 1 and len(errors) == 1
+    assert store.stats()['rebuild_failures'] == 1
+    # Backing off: no new attempt before retry_min
+    assert not store.rebuild_async(pool, log=errors.append)
+    assert store._retry_delay == 120
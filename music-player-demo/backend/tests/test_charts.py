@@ -0,0 +1,84 @@
+from datetime import date, timedelta
+
+import pytest
+
+from charts import ChartStore
+
+WEEK_1 = date(2024, 1, 6)
+WEEK_2 = WEEK_1 + timedelta(weeks=1)
+WEEK_3 = WEEK_2 + timedelta(weeks=1)
+
+
+def store_with(*weeks):
+    store = ChartStore()
+    store.commit(store.plan(list(weeks)))
+    return store
+
+
+def entries(store, on_date=None):
+    return [(e['song_id'], e['last_week'], e['weeks_on_chart']) for e in store.chart(on_date)['entries']]
+
+
+def test_plan_derives_last_week_and_weeks_on_chart():
+    store = store_with((WEEK_2, [2, 1, 3]), (WEEK_1, [1, 2]))
+    assert entries(store, WEEK_1) == [(1, None, 1), (2, None, 1)]
+    assert entries(store) == [(2, 2, 2), (1, 1, 2), (3, None, 1)]
+    assert store.latest_date() == WEEK_2
+
+
+def test_a_new_week_builds_on_the_stored_weeks():
+    store = store_with((WEEK_1, [1, 2]), (WEEK_2, [2, 1]))
+    store.commit(store.plan([(WEEK_3, [3, 1])]))
+    assert entries(store) == [(3, None, 1), (1, 2, 3)]
+    assert store.history(1)['weeks_on_chart'] == 3
+    assert store.history(1)['peak'] == 1
+    assert store.history(2)['weeks_on_chart'] == 2
+
+
+def test_replacing_the_latest_week_rederives_it():
+    store = store_with((WEEK_1, [1, 2]), (WEEK_2, [2, 1]))
+    store.commit(store.plan([(WEEK_2, [3, 2])]))
+    assert entries(store) == [(3, None, 1), (2, 2, 2)]
+    assert store.history(1)['weeks_on_chart'] == 1
+    assert store.stats()['weeks'] == 2
+
+
+@pytest.mark.parametrize('weeks, message', [
+    ([(WEEK_1, [1])], 'older than the latest'),
+    ([(WEEK_3, [])], '1 to 10 songs'),
+    ([(WEEK_3, list(range(1, 12)))], '1 to 10 songs'),
+    ([(WEEK_3, [1, 1])], 'Duplicate songs'),
+    ([(WEEK_3, [1]), (WEEK_3, [2])], 'given twice'),
+])
+def test_plan_rejects(weeks, message):
+    store = store_with((WEEK_2, [1, 2]))
+    with pytest.raises(ValueError, match=message):
+        store.plan(weeks)
+
+
+def test_chart_on_a_date_uses_the_week_in_effect():
+    store = store_with((WEEK_1, [1]), (WEEK_2, [2]))
+    assert store.chart(WEEK_1 - timedelta(days=1)) is None
+    assert store.chart(WEEK_2 - timedelta(days=1))['chart_date'] == WEEK_1.isoformat()
+    assert ChartStore().chart() is None
+
+
+def test_movers():
+    store = store_with((WEEK_1, [1, 2, 3]), (WEEK_2, [3, 1, 4]))
+    movers = store.movers()
+    assert [(e['song_id'], e['change']) for e in movers['gainers']] == [(3, 2)]
+    assert [(e['song_id'], e['change']) for e in movers['losers']] == [(1, -1)]
+    assert [e['song_id'] for e in movers['new_entries']] == [4]
+
+
+def test_load_reads_stored_rows():
+    store = ChartStore()
+    store.load([
+        {'song_id': 1, 'rank': 1, 'last_week': None, 'weeks_on_chart': 1, 'chart_date': WEEK_1,
+         'title': 'Neon Nights', 'artist': 'Midnight Engine'},
+        {'song_id': 1, 'rank': 1, 'last_week': 1, 'weeks_on_chart': 2, 'chart_date': WEEK_2,
+         'title': 'Neon Nights', 'artist': 'Midnight Engine'},
+    ])
+    assert store.loaded
+    assert store.chart()['entries'][0]['title'] == 'Neon Nights'
+    assert entries(store) == [(1, 1, 2)]
@@ -0,0 +1,70 @@
+from datetime import datetime
+
+from flask import Flask, jsonify
+
+from conditional import conditional, make_etag
+
+VERSIONS = {1: ((1, 3), datetime(2024, 5, 1, 12, 0, 0))}
+CALLS = []
+
+app = Flask(__name__)
+
+
+@app.route('/playlist/<int:playlist_id>')
+@conditional(lambda playlist_id: VERSIONS.get(playlist_id))
+def playlist(playlist_id):
+    CALLS.append(playlist_id)
+    if playlist_id not in VERSIONS:
+        return jsonify({'error': 'Playlist not found'}), 404
+    return jsonify({'playlist_id': playlist_id})
+
+
+def test_matching_etag_skips_the_view():
+    client = app.test_client()
+    CALLS.clear()
+    first = client.get('/playlist/1')
+    assert first.status_code == 200 and first.headers['Cache-Control'] == 'no-cache'
+    etag = first.headers['ETag']
+
+    again = client.get('/playlist/1', headers={'If-None-Match': etag})
+    assert again.status_code == 304 and again.data == b''
+    # A compressed response carried the same tag as weak
+    weak = client.get('/playlist/1', headers={'If-None-Match': f'W/{etag}'})
+    assert weak.status_code == 304
+    assert CALLS == [1]
+
+
+def test_a_version_bump_changes_the_etag():
+    client = app.test_client()
+    etag = client.get('/playlist/1').headers['ETag']
+    VERSIONS[1] = ((1, 4), VERSIONS[1][1])
+    try:
+        response = client.get('/playlist/1', headers={'If-None-Match': etag})
+        assert response.status_code == 200 and response.headers['ETag'] != etag
+    finally:
+        VERSIONS[1] = ((1, 3), VERSIONS[1][1])
+
+
+def test_query_string_variants_have_their_own_etag():
+    client = app.test_client()
+    plain = client.get('/playlist/1').headers['ETag']
+    assert client.get('/playlist/1?include=songs').headers['ETag'] != plain
+
+
+def test_if_modified_since():
+    client = app.test_client()
+    last_modified = client.get('/playlist/1').headers['Last-Modified']
+    assert last_modified == 'Wed, 01 May 2024 12:00:00 GMT'
+    assert client.get('/playlist/1', headers={'If-Modified-Since': last_modified}).status_code == 304
+    older = 'Wed, 01 May 2024 11:59:59 GMT'
+    assert client.get('/playlist/1', headers={'If-Modified-Since': older}).status_code == 200
+
+
+def test_missing_resource_falls_through_to_the_view():
+    response = app.test_client().get('/playlist/2')
+    assert response.status_code == 404 and 'ETag' not in response.headers
+
+
+def test_make_etag_is_stable():
+    assert make_etag('/playlist/1', [], 1, 3) == make_etag('/playlist/1', [], 1, 3)
+    assert make_etag('/playlist/1', [], 1, 3) != make_etag('/playlist/1', [], 1, 4)
@@ -0,0 +1,116 @@
+import threading
+
+import pytest
+
+from db_pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.alive = True
+        self.closed = False
+        self.rollbacks = 0
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise ConnectionError('gone away')
+
+    def rollback(self):
+        if not self.alive:
+            raise ConnectionError('gone away')
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**options):
+    opened = []
+
+    def connect():
+        opened.append(FakeConnection(len(opened) + 1))
+        return opened[-1]
+
+    return ConnectionPool(connect, **options), opened
+
+
+def test_connections_are_reused_and_rolled_back_on_return():
+    pool, opened = make_pool(size=2)
+    conn = pool.acquire()
+    pool.release(conn)
+    assert pool.acquire() is conn
+    assert conn.rollbacks == 1 and len(opened) == 1
+    stats = pool.stats()
+    assert stats['checkouts'] == 2 and stats['created'] == 1 and stats['in_use'] == 1
+
+
+def test_overflow_connections_are_closed_on_return():
+    pool, opened = make_pool(size=1, max_overflow=1)
+    first, second = pool.acquire(), pool.acquire()
+    pool.release(first)
+    pool.release(second)
+    assert not first.closed and second.closed
+    assert pool.stats()['open'] == 1
+
+
+def test_exhausted_pool_times_out():
+    pool, _ = make_pool(size=1, max_overflow=0, timeout=0.01)
+    pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    stats = pool.stats()
+    assert stats['timeouts'] == 1 and stats['waiting'] == 0
+
+
+def test_waiter_gets_the_returned_connection():
+    pool, _ = make_pool(size=1, max_overflow=0, timeout=5)
+    conn = pool.acquire()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+    waiter.start()
+    while pool.waiting == 0:
+        pass
+    pool.release(conn)
+    waiter.join(5)
+    assert got == [conn] and pool.stats()['waits'] == 1
+
+
+def test_dead_connections_are_replaced():
+    pool, opened = make_pool(size=2)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.alive = False
+    fresh = pool.acquire()
+    assert fresh is not conn and conn.closed
+    assert pool.stats()['ping_failures'] == 1
+
+    # A connection whose rollback fails on return is discarded
+    fresh.alive = False
+    pool.release(fresh)
+    assert fresh.closed and pool.stats()['open'] == 0
+
+
+def test_expired_connections_are_recycled():
+    pool, opened = make_pool(recycle=0)
+    conn = pool.acquire()
+    pool.release(conn)
+    assert conn.closed and pool.stats()['recycled'] == 1
+    assert pool.acquire() is not conn
+
+
+def test_connection_context_discards_a_connection_that_died_in_use():
+    pool, _ = make_pool()
+    with pytest.raises(RuntimeError):
+        with pool.connection() as conn:
+            conn.alive = False
+            raise RuntimeError('query failed')
+    assert conn.closed and pool.stats()['open'] == 0
+
+
+def test_forked_child_starts_from_an_empty_pool(monkeypatch):
+    pool, opened = make_pool()
+    pool.release(pool.acquire())
+    monkeypatch.setattr('db_pool.os.getpid', lambda: -1)
+    conn = pool.acquire()
+    assert conn is opened[1] and not opened[0].closed
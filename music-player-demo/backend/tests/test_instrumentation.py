@@ -0,0 +1,80 @@
+import pytest
+
+import instrumentation
+from instrumentation import (
+    QueryBudgetExceeded, begin_request, budget_violations, compact_sql, configure_query_budget,
+    record_query, redact, request_stats, statement_label,
+)
+
+
+def test_compact_sql_folds_whitespace_outside_literals():
+    sql = """
+        SELECT title
+        FROM Songs
+        WHERE title = 'two  spaces'   AND genre = "tab\there"
+    """
+    assert compact_sql(sql) == """SELECT title FROM Songs WHERE title = 'two  spaces' AND genre = "tab\there\""""
+    assert compact_sql("SELECT 'it''s  here'") == "SELECT 'it''s  here'"
+    # One cached string object per statement text
+    assert compact_sql(sql) is compact_sql(sql)
+
+
+def test_statement_label_collapses_variable_lists():
+    assert statement_label('SELECT * FROM Songs WHERE song_id IN (%s, %s, %s)') == \
+        'SELECT * FROM Songs WHERE song_id IN (%s...)'
+    assert statement_label('INSERT INTO Plays VALUES (%s...), (%s...)') == \
+        'INSERT INTO Plays VALUES (%s...)...'
+    assert len(statement_label('SELECT ' + 'x, ' * 200)) == 200
+
+
+def test_redact_never_shows_values():
+    assert redact(None) == '[]'
+    assert redact(('secret@example.com', 3, None)) == '[str(18), int, NULL]'
+    assert redact({'email': 'secret@example.com'}) == '{email: str(18)}'
+
+
+@pytest.fixture
+def budget():
+    yield configure_query_budget
+    configure_query_budget(0)
+    begin_request()
+
+
+def test_budget_warns_about_totals_and_repeats(budget):
+    budget(3, repeat_limit=2)
+    begin_request()
+    for song_id in range(4):
+        record_query('SELECT * FROM Songs WHERE song_id = %s', (song_id,), 0.001, 1)
+    assert request_stats()[0] == 4
+    problems = budget_violations()
+    assert problems[0] == '4 queries (budget 3)'
+    assert problems[1].startswith('4x SELECT * FROM Songs') and 'N+1' in problems[1]
+
+
+def test_budget_raise_mode_fails_once_at_the_offending_statement(budget):
+    budget(2, repeat_limit=0, mode='raise')
+    begin_request()
+    record_query('SELECT 1', None, 0.001, 1)
+    record_query('SELECT 2', None, 0.001, 1)
+    with pytest.raises(QueryBudgetExceeded):
+        record_query('SELECT 3', None, 0.001, 1)
+    # Error handling may still query
+    record_query('SELECT 4', None, 0.001, 1)
+
+
+def test_budget_mode_is_validated(budget):
+    with pytest.raises(ValueError):
+        budget(5, mode='explode')
+
+
+def test_slow_queries_are_logged_with_redacted_params(caplog):
+    propagate = instrumentation.log.propagate
+    instrumentation.log.propagate = True
+    try:
+        with caplog.at_level('WARNING', logger='music_player'):
+            record_query('SELECT * FROM Users WHERE email = %s', ('a@b.c',), 10.0, 1)
+    finally:
+        instrumentation.log.propagate = propagate
+    record = caplog.records[-1]
+    assert 'Slow query' in record.getMessage()
+    assert record.fields == {'params': '[str(5)]', 'rows': 1}
@@ -0,0 +1,104 @@
+import json
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date as werkzeug_http_date
+
+from json_provider import FastJSONProvider, http_date, rows_as_columns
+
+ROW = {
+    'song_id': 7,
+    'title': 'Neon Nights',
+    'created_at': datetime(2024, 2, 29, 23, 59, 58),
+    'chart_date': date(2024, 3, 4),
+    'score': Decimal('12.50'),
+    'token': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'lyrics': None,
+}
+
+
+def providers(datetime_format='http'):
+    app = Flask(__name__)
+    return FastJSONProvider(app, datetime_format=datetime_format), DefaultJSONProvider(app)
+
+
+@pytest.mark.parametrize('value', [
+    datetime(2024, 2, 29, 23, 59, 58),
+    datetime(1999, 12, 31, 0, 0, 0),
+    datetime(2024, 6, 1, 1, 30, tzinfo=timezone(timedelta(hours=2))),
+    datetime(2024, 6, 1, 22, 30, tzinfo=timezone(timedelta(hours=-5))),
+    date(2024, 3, 4),
+    date(1, 1, 1),
+])
+def test_http_date_matches_werkzeug(value):
+    assert http_date(value) == werkzeug_http_date(value)
+
+
+def test_dumps_matches_flask_on_mysql_column_types():
+    fast, default = providers()
+    assert json.loads(fast.dumps(ROW)) == json.loads(default.dumps(ROW))
+    assert json.loads(fast.dumps_bytes([ROW])) == json.loads(default.dumps([ROW]))
+
+
+def test_non_string_keys_and_unknown_types():
+    fast, default = providers()
+    assert json.loads(fast.dumps({1: 'a'})) == json.loads(default.dumps({1: 'a'}))
+    with pytest.raises(TypeError):
+        fast.dumps({'value': object()})
+
+
+def test_fallback_without_orjson_matches_flask():
+    fast, default = providers()
+    fast.available = False
+    assert fast.dumps(ROW) == default.dumps(ROW)
+    assert json.loads(fast.dumps_bytes(ROW)) == json.loads(default.dumps(ROW))
+    assert fast.loads('{"a": [1, 2]}') == {'a': [1, 2]}
+
+
+def test_stdlib_keyword_arguments_go_through_flask():
+    fast, default = providers()
+    assert fast.dumps(ROW, indent=2) == default.dumps(ROW, indent=2)
+
+
+def test_iso_datetime_format():
+    pytest.importorskip('orjson')
+    fast, _ = providers('iso')
+    encoded = json.loads(fast.dumps(ROW))
+    assert encoded['created_at'] == '2024-02-29T23:59:58+00:00'
+    assert encoded['chart_date'] == '2024-03-04'
+    assert encoded['score'] == '12.50'
+
+
+def test_rejects_unknown_datetime_format():
+    with pytest.raises(ValueError):
+        FastJSONProvider(Flask(__name__), datetime_format='unix')
+
+
+def test_response_is_compact_json_bytes():
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    with app.app_context():
+        response = app.json.response({'songs': [ROW]})
+    assert response.mimetype == 'application/json'
+    assert response.get_data().endswith(b'\n')
+    assert json.loads(response.get_data()) == json.loads(DefaultJSONProvider(app).dumps({'songs': [ROW]}))
+
+
+class FakeCursor:
+    description = [('song_id', 3), ('title', 253)]
+
+    def fetchall(self):
+        return ((1, 'Runaway'), (2, 'Neon Nights'))
+
+
+def test_rows_as_columns():
+    columns, rows = rows_as_columns(FakeCursor())
+    assert columns == ['song_id', 'title']
+    assert rows == ((1, 'Runaway'), (2, 'Neon Nights'))
+    fast, _ = providers()
+    assert json.loads(fast.dumps({'columns': columns, 'rows': rows})) == {
+        'columns': ['song_id', 'title'], 'rows': [[1, 'Runaway'], [2, 'Neon Nights']]}
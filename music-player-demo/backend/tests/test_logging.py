@@ -0,0 +1,63 @@
+import io
+import logging
+
+import pytest
+
+import instrumentation
+from instrumentation import configure_logging, log, start_log_listener, stop_log_listener
+
+
+@pytest.fixture
+def stream():
+    saved = (log.handlers[:], log.level, log.propagate, instrumentation._log_handler,
+             instrumentation._log_listener, instrumentation._log_listener_pid)
+    stream = io.StringIO()
+    configure_logging('INFO', stream)
+    instrumentation._log_listener = instrumentation._log_listener_pid = None
+    yield stream
+    instrumentation.stop_log_listener()
+    (log.handlers[:], level, log.propagate, instrumentation._log_handler,
+     instrumentation._log_listener, instrumentation._log_listener_pid) = saved
+    log.setLevel(level)
+
+
+def test_records_are_written_synchronously_until_the_listener_starts(stream):
+    log.info('imported', extra={'fields': {'workers': 4}})
+    assert stream.getvalue().rstrip().endswith('INFO music_player imported workers=4')
+    log.debug('hidden')
+    assert 'hidden' not in stream.getvalue()
+
+
+def test_listener_starts_once_per_process_and_stop_flushes(stream):
+    listener = start_log_listener()
+    assert start_log_listener() is listener
+    assert isinstance(log.handlers[0], logging.handlers.QueueHandler)
+    log.warning('queued')
+
+    stop_log_listener()
+    assert 'WARNING music_player queued' in stream.getvalue()
+    assert log.handlers == [instrumentation._log_handler]
+    log.warning('after stop')
+    assert stream.getvalue().rstrip().endswith('after stop')
+
+
+def test_a_forked_worker_starts_its_own_listener(stream, monkeypatch):
+    parent = start_log_listener()
+    # The worker inherits the module state but not the writer thread
+    monkeypatch.setattr(instrumentation.os, 'getpid', lambda: -1)
+    worker = start_log_listener()
+    assert worker is not parent
+    log.warning('from the worker')
+    stop_log_listener()
+    assert 'from the worker' in stream.getvalue()
+    parent.stop()
+
+
+def test_exit_hook_leaves_another_processes_listener_alone(stream, monkeypatch):
+    listener = start_log_listener()
+    monkeypatch.setattr(instrumentation.os, 'getpid', lambda: -1)
+    stop_log_listener()
+    assert instrumentation._log_listener is listener
+    monkeypatch.undo()
+    stop_log_listener()
+    assert instrumentation._log_listener is None
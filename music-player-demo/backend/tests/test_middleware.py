@@ -0,0 +1,127 @@
+import gzip
+
+import pytest
+
+from middleware import CompressionMiddleware, OriginPolicy, PreflightMiddleware, brotli, negotiate
+
+
+@pytest.mark.parametrize('header, brotli_available, expected', [
+    ('gzip, deflate, br', True, 'br'),
+    ('gzip, deflate, br', False, 'gzip'),
+    ('gzip;q=1.0, br;q=0.5', True, 'gzip'),
+    ('br;q=0, gzip', True, 'gzip'),
+    ('GZIP', False, 'gzip'),
+    ('*', True, 'br'),
+    ('*;q=0.5, gzip;q=0', False, None),
+    ('identity', True, None),
+    ('gzip;q=abc', True, None),
+    ('', True, None),
+])
+def test_negotiate(header, brotli_available, expected):
+    assert negotiate(header, brotli_available) == expected
+
+
+def test_origin_policy_matches_from_the_start():
+    policy = OriginPolicy([r'https?://localhost(:\d+)?$', r'https://[a-z0-9-]+\.example\.com$'])
+    assert policy.allows('http://localhost:5173')
+    assert policy.allows('https://app.example.com')
+    assert not policy.allows('https://evil.com/?https://app.example.com')
+    assert not policy.allows('https://app.example.com.evil.com')
+    assert not OriginPolicy([]).allows('http://localhost')
+    policy.allows('http://localhost:5173')
+    assert policy.stats()['hits'] == 1
+
+
+def call(app, environ):
+    """Run a WSGI app; (status, headers dict, body bytes)"""
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = status
+        started['headers'] = dict(headers)
+
+    body = b''.join(app(dict({'REQUEST_METHOD': 'GET'}, **environ), start_response))
+    return started['status'], started['headers'], body
+
+
+def json_app(body, headers=()):
+    def app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'application/json'),
+                                  ('Content-Length', str(len(body))), *headers])
+        return [body]
+    return app
+
+
+def test_preflight_is_answered_before_the_app():
+    policy = OriginPolicy([r'http://localhost:5173$'])
+    middleware = PreflightMiddleware(json_app(b'{}'), policy, max_age=600)
+    status, headers, body = call(middleware, {
+        'REQUEST_METHOD': 'OPTIONS', 'HTTP_ORIGIN': 'http://localhost:5173',
+        'HTTP_ACCESS_CONTROL_REQUEST_METHOD': 'POST'})
+    assert status == '204 No Content' and body == b''
+    assert headers['Access-Control-Allow-Origin'] == 'http://localhost:5173'
+    assert headers['Access-Control-Max-Age'] == '600'
+
+    status, headers, _ = call(middleware, {
+        'REQUEST_METHOD': 'OPTIONS', 'HTTP_ORIGIN': 'https://evil.com',
+        'HTTP_ACCESS_CONTROL_REQUEST_METHOD': 'POST'})
+    assert status == '204 No Content' and 'Access-Control-Allow-Origin' not in headers
+
+    # A plain OPTIONS (no preflight header) still reaches the app
+    status, _, body = call(middleware, {'REQUEST_METHOD': 'OPTIONS', 'HTTP_ORIGIN': 'http://localhost:5173'})
+    assert status == '200 OK' and body == b'{}'
+
+
+def test_large_json_is_gzipped_with_a_weak_etag():
+    data = b'{"songs": [' + b'{"title": "Neon Nights"},' * 200 + b'{}]}'
+    middleware = CompressionMiddleware(json_app(data, [('ETag', '"abc"'), ('Vary', 'Origin')]), min_size=1024)
+    status, headers, body = call(middleware, {'HTTP_ACCEPT_ENCODING': 'gzip'})
+    assert headers['Content-Encoding'] == 'gzip'
+    assert headers['ETag'] == 'W/"abc"'
+    assert headers['Vary'] == 'Origin, Accept-Encoding'
+    assert int(headers['Content-Length']) == len(body) < len(data)
+    assert gzip.decompress(body) == data
+    assert middleware.stats()['compressed'] == 1
+
+
+@pytest.mark.parametrize('environ, headers', [
+    ({'HTTP_ACCEPT_ENCODING': 'identity'}, ()),
+    ({'HTTP_ACCEPT_ENCODING': 'gzip', 'REQUEST_METHOD': 'HEAD'}, ()),
+    ({'HTTP_ACCEPT_ENCODING': 'gzip'}, [('Cache-Control', 'no-transform')]),
+    ({'HTTP_ACCEPT_ENCODING': 'gzip'}, [('Content-Encoding', 'br')]),
+])
+def test_responses_that_pass_through_untouched(environ, headers):
+    data = b'x' * 4096
+    middleware = CompressionMiddleware(json_app(data, headers), min_size=1024)
+    _, response_headers, body = call(middleware, environ)
+    assert body == data
+    assert response_headers.get('Content-Encoding') in (None, 'br')
+
+
+def test_small_bodies_are_sent_as_they_are():
+    middleware = CompressionMiddleware(json_app(b'{"ok": true}'), min_size=1024)
+    _, headers, body = call(middleware, {'HTTP_ACCEPT_ENCODING': 'gzip'})
+    assert body == b'{"ok": true}' and 'Content-Encoding' not in headers
+
+
+def test_streamed_body_is_compressed_chunk_by_chunk():
+    chunks = [b'{"song_id": %d}\n' % n for n in range(50)]
+
+    def app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'application/x-ndjson')])
+        return iter(chunks)
+
+    middleware = CompressionMiddleware(app)
+    _, headers, body = call(middleware, {'HTTP_ACCEPT_ENCODING': 'gzip'})
+    assert headers['Content-Encoding'] == 'gzip' and 'Content-Length' not in headers
+    assert gzip.decompress(body) == b''.join(chunks)
+    assert middleware.stats()['streamed'] == 1
+
+
+@pytest.mark.skipif(brotli is None, reason='brotli is not installed')
+def test_brotli_is_preferred_when_available():
+    data = b'{"title": "Midnight Engine"}' * 100
+    middleware = CompressionMiddleware(json_app(data))
+    _, headers, body = call(middleware, {'HTTP_ACCEPT_ENCODING': 'gzip, br'})
+    assert headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(body) == data
@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+from playlist_order import GAP, MAX_KEY, MIN_KEY, key_between, plan_keys, spaced_keys
+
+
+def test_key_between():
+    assert key_between(None, None) == GAP
+    assert key_between(None, 1024) == 0
+    assert key_between(1024, None) == 2048
+    assert key_between(1024, 2048) == 1536
+    assert key_between(5, 7) == 6
+    assert key_between(5, 6) is None
+    assert key_between(MAX_KEY - 10, None) is None
+    assert key_between(None, MIN_KEY + 10) is None
+
+
+def test_spaced_keys():
+    assert spaced_keys(3) == [GAP, 2 * GAP, 3 * GAP]
+    assert spaced_keys(0) == []
+
+
+def check_plan(current, order):
+    keys, changed = plan_keys(current, order)
+    assert list(keys) == order
+    ranked = [keys[song_id] for song_id in order]
+    assert ranked == sorted(ranked) and len(set(ranked)) == len(ranked)
+    assert all(MIN_KEY < key < MAX_KEY for key in ranked)
+    assert changed == {song_id: key for song_id, key in keys.items() if current.get(song_id) != key}
+    return keys, changed
+
+
+def test_moving_one_song_writes_one_row():
+    order = [1, 2, 3, 4, 5]
+    current = dict(zip(order, spaced_keys(5)))
+    keys, changed = check_plan(current, [1, 4, 2, 3, 5])
+    assert list(changed) == [4]
+    assert current[1] < keys[4] < current[2]
+
+
+def test_adding_at_either_end_and_in_the_middle():
+    current = {1: 1024, 2: 2048}
+    _, changed = check_plan(current, [9, 1, 2])
+    assert changed == {9: 0}
+    _, changed = check_plan(current, [1, 2, 9])
+    assert changed == {9: 3072}
+    _, changed = check_plan(current, [1, 7, 8, 2])
+    assert sorted(changed) == [7, 8]
+
+
+def test_no_room_respaces_the_whole_playlist():
+    current = {1: 10, 2: 11}
+    keys, changed = check_plan(current, [1, 3, 2])
+    assert keys == dict(zip([1, 3, 2], spaced_keys(3)))
+    assert set(changed) == {1, 2, 3}
+
+
+def test_random_edits_keep_a_valid_order():
+    rng = random.Random(11)
+    current = {}
+    for _ in range(300):
+        order = list(current)
+        order.sort(key=current.get)
+        action = rng.random()
+        if action < 0.4 or not order:
+            order.insert(rng.randint(0, len(order)), rng.randint(1000, 10 ** 6))
+            order = list(dict.fromkeys(order))
+        elif action < 0.8:
+            song_id = order.pop(rng.randrange(len(order)))
+            order.insert(rng.randint(0, len(order)), song_id)
+        else:
+            order.pop(rng.randrange(len(order)))
+        keys, _ = check_plan({song_id: current[song_id] for song_id in order if song_id in current}, order)
+        current = keys
+
+
+@pytest.mark.parametrize('order', [[], [1], [3, 2, 1]])
+def test_small_orders(order):
+    check_plan({}, order)
@@ -0,0 +1,188 @@
+import time
+from contextlib import contextmanager
+
+import pymysql
+import pytest
+
+from plays import DAY, HOUR, PlayBuffer, PlayCounts, RollingCounter
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        self.conn.statements.append((sql, params))
+
+    def executemany(self, sql, rows):
+        error = self.conn.error(rows) if self.conn.error is not None else None
+        if error is not None:
+            raise error
+        self.conn.inserted.extend(rows)
+
+    def fetchone(self):
+        return {'last_id': self.conn.last_id}
+
+    def fetchall(self):
+        return self.conn.results.pop(0) if self.conn.results else []
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Just enough of a pymysql connection for PlayBuffer and PlayCounts"""
+
+    def __init__(self, last_id=0, results=(), error=None):
+        self.last_id = last_id
+        self.results = list(results)
+        self.error = error          # rows -> exception to raise, or None
+        self.statements = []
+        self.inserted = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    @contextmanager
+    def connection(self):
+        yield self.conn
+
+
+# ----------------------------------------------------------------------------
+# RollingCounter
+# ----------------------------------------------------------------------------
+
+def test_rolling_counter_drops_slots_leaving_the_window():
+    counter = RollingCounter(window=HOUR, bucket=60)
+    counter.add(7, slot=100)
+    counter.add(7, slot=110, count=2)
+    counter.add(8, slot=110)
+    counter.expire(110 * 60)
+    assert counter.totals == {7: 3, 8: 1}
+
+    # Slot 100 leaves the hour window once the head reaches slot 160
+    counter.expire(160 * 60)
+    assert counter.totals == {7: 2, 8: 1}
+    counter.expire(170 * 60)
+    assert counter.totals == {}
+
+
+def test_rolling_counter_ignores_plays_older_than_the_window():
+    counter = RollingCounter(window=DAY, bucket=HOUR)
+    counter.expire(1000 * HOUR)
+    counter.add(7, slot=1000 - 24)
+    counter.add(7, slot=1000 - 23)
+    assert counter.totals == {7: 1}
+
+
+# ----------------------------------------------------------------------------
+# PlayCounts
+# ----------------------------------------------------------------------------
+
+def play(play_id, song_id, played_at):
+    return {'play_id': play_id, 'song_id': song_id, 'played_at': played_at}
+
+
+def test_poll_remembers_skipped_ids_and_counts_them_once_filled():
+    now = time.time()
+    conn = FakeConnection(last_id=10)
+    counts = PlayCounts(FakePool(conn))
+    counts.load()
+    assert counts.loaded
+
+    conn.results = [[play(11, 1, now), play(14, 2, now)]]
+    assert counts.poll() == 2
+    assert counts.stats()['last_play_id'] == 14
+    assert sorted(counts._gaps) == [12, 13]
+
+    # The next poll asks for the gaps as well as newer rows
+    conn.results = [[play(12, 1, now)]]
+    counts.poll()
+    sql, params = conn.statements[-1]
+    assert 'play_id IN (%s, %s)' in sql
+    assert params == [14, 12, 13]
+    assert sorted(counts._gaps) == [13]
+    assert counts.stats()['gaps_filled'] == 1
+    assert counts.counts(1) == {'hour': 2, 'day': 2, 'week': 2}
+    assert counts.counts(2)['hour'] == 1
+
+
+def test_gaps_expire_after_the_retry_window(monkeypatch):
+    conn = FakeConnection(last_id=0)
+    counts = PlayCounts(FakePool(conn))
+    counts.load()
+    conn.results = [[play(3, 1, time.time())]]
+    counts.poll()
+    assert sorted(counts._gaps) == [1, 2]
+
+    monkeypatch.setattr('plays.GAP_RETRY_SECONDS', -1)
+    counts.poll()
+    assert counts._gaps == {}
+    assert counts.stats()['gaps_expired'] == 2
+
+
+def test_trending_ranks_by_window_count():
+    now = time.time()
+    # load() reads one aggregate per bucket size (both empty here)
+    conn = FakeConnection(last_id=0, results=[[], [], [
+        play(1, 5, now), play(2, 5, now), play(3, 6, now), play(4, 7, now - 2 * HOUR)]])
+    counts = PlayCounts(FakePool(conn))
+    counts.load()
+    counts.poll()
+    assert counts.trending('hour', 2) == [(5, 2), (6, 1)]
+    assert dict(counts.trending('day', 10)) == {5: 2, 6: 1, 7: 1}
+
+
+# ----------------------------------------------------------------------------
+# PlayBuffer
+# ----------------------------------------------------------------------------
+
+BAD = (1, 2, 0.0, -1)
+
+
+def rejects_bad_rows(rows):
+    if BAD in rows:
+        return pymysql.err.DataError(1264, 'Out of range value')
+    return None
+
+
+def test_flush_isolates_and_drops_a_rejected_event():
+    conn = FakeConnection(error=rejects_bad_rows)
+    events = [(1, song_id, 1000.0, 30) for song_id in range(1, 8)]
+    buffer = PlayBuffer(FakePool(conn), log=lambda message: None)
+    buffer.append(events[:3] + [BAD] + events[3:])
+    assert buffer.flush() == 7
+    assert conn.inserted == events
+    stats = buffer.stats()
+    assert stats['rejected'] == 1 and stats['rows_written'] == 7 and stats['pending'] == 0
+
+
+def test_flush_requeues_events_when_mysql_is_unreachable():
+    conn = FakeConnection(error=lambda rows: pymysql.err.OperationalError(2003, 'down'))
+    buffer = PlayBuffer(FakePool(conn))
+    buffer.append([(1, 1, 1000.0, 30), (1, 2, 1001.0, 30)])
+    with pytest.raises(pymysql.err.OperationalError):
+        buffer.flush()
+    stats = buffer.stats()
+    assert stats['pending'] == 2 and stats['failures'] == 1 and stats['rejected'] == 0
+
+    conn.error = None
+    assert buffer.flush() == 2
+
+
+def test_full_ring_drops_the_oldest_events():
+    buffer = PlayBuffer(FakePool(FakeConnection()), capacity=3, flush_size=100)
+    buffer.append([(1, song_id, 1000.0, 30) for song_id in range(5)])
+    assert buffer.stats()['dropped'] == 2
+    assert [event[1] for event in buffer._events] == [2, 3, 4]
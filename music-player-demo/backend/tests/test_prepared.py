@@ -0,0 +1,101 @@
+import pytest
+
+pytest.importorskip('mysql.connector')
+
+import prepared  # noqa: E402
+from prepared import PreparedStatements  # noqa: E402
+
+CONFIG = {'host': 'db', 'port': 3306, 'user': 'app', 'password': 'secret', 'database': 'music_player_db'}
+
+
+class FakePreparedCursor:
+    """Re-prepares whenever handed a different statement object, like the driver"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._executed = None
+
+    def execute(self, sql, params=()):
+        if self.conn.fail:
+            raise RuntimeError('server gone')
+        if sql is not self._executed:
+            self.conn.prepares.append(sql)
+            self._executed = sql
+        self.conn.executes.append(tuple(params))
+
+    def fetchall(self):
+        return [dict(row) for row in self.conn.rows]
+
+
+class FakeConnection:
+    def __init__(self, **config):
+        self.config = config
+        self.prepares = []
+        self.executes = []
+        self.rows = [{'version': 3}]
+        self.fail = False
+
+    def cursor(self, prepared=False, dictionary=False):
+        assert prepared and dictionary
+        return FakePreparedCursor(self)
+
+    def ping(self, reconnect=False):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def statements(monkeypatch):
+    connections = []
+
+    def connect(**config):
+        connections.append(FakeConnection(**config))
+        return connections[-1]
+
+    monkeypatch.setattr(prepared.mysql.connector, 'connect', connect)
+    statements = PreparedStatements(CONFIG, size=1)
+    statements.connections = connections
+    return statements
+
+
+def test_each_statement_is_prepared_once_per_connection(statements):
+    sql = """
+        SELECT version
+        FROM Playlists
+        WHERE playlist_id = %s
+    """
+    for playlist_id in range(3):
+        assert statements.fetchone(sql, (playlist_id,)) == {'version': 3}
+    # An equal string built separately is still the same statement
+    assert statements.fetchone(' '.join(sql.split()), (9,)) == {'version': 3}
+    statements.fetchall('SELECT name FROM Artists WHERE artist_id = %s', (1,))
+
+    conn, = statements.connections
+    assert conn.config['autocommit'] is True
+    assert conn.prepares == ['SELECT version FROM Playlists WHERE playlist_id = %s',
+                             'SELECT name FROM Artists WHERE artist_id = %s']
+    assert conn.executes == [(0,), (1,), (2,), (9,), (1,)]
+
+
+def test_fetchone_returns_none_without_rows(statements):
+    statements.fetchall('SELECT 1')
+    statements.connections[0].rows = []
+    assert statements.fetchone('SELECT version FROM Playlists WHERE playlist_id = %s', (5,)) is None
+
+
+def test_a_failed_statement_is_prepared_again(statements):
+    sql = 'SELECT version FROM Playlists WHERE playlist_id = %s'
+    statements.fetchone(sql, (1,))
+    conn = statements.connections[0]
+    conn.fail = True
+    with pytest.raises(RuntimeError):
+        statements.fetchone(sql, (1,))
+    conn.fail = False
+    statements.fetchone(sql, (1,))
+    assert len(conn.prepares) == 2
+    assert statements.stats()['created'] == 1
@@ -0,0 +1,48 @@
+from projections import SONG_ROW, Projection, format_duration, format_durations
+
+
+def mysql_duration(seconds):
+    """The SQL the projection replaced: CONCAT(FLOOR(d / 60), ':', LPAD(d % 60, 2, '0'))"""
+    if seconds is None:
+        return None
+    return f"{seconds // 60}:{str(seconds % 60).rjust(2, '0')[:2]}"
+
+
+EDGES = [None, 0, 1, 9, 10, 59, 60, 61, 599, 600, 3599, 3600, 3661, 7199, 7200, 7201, 86399, 2 ** 31 - 1]
+
+
+def test_durations_match_the_old_sql_format():
+    for seconds in EDGES + list(range(0, 7300, 7)):
+        assert format_duration(seconds) == mysql_duration(seconds), seconds
+    assert format_durations(EDGES) == [mysql_duration(seconds) for seconds in EDGES]
+
+
+def test_known_formats():
+    assert format_durations([None, 0, 59, 245, 3600, 7322]) == [None, '0:00', '0:59', '4:05', '60:00', '122:02']
+    assert format_duration('245') == '4:05'
+
+
+def test_shape_formats_dict_rows_in_place():
+    rows = [{'song_id': 1, 'duration': 245}, {'song_id': 2, 'duration': None}]
+    assert SONG_ROW.shape(rows) is rows
+    assert rows == [{'song_id': 1, 'duration': '4:05'}, {'song_id': 2, 'duration': None}]
+    assert SONG_ROW.shape([]) == []
+    assert SONG_ROW.shape_one(None) is None
+    assert SONG_ROW.shape_one({'duration': 3600}) == {'duration': '60:00'}
+
+
+def test_shape_tuples_matches_shape():
+    columns = ['song_id', 'title', 'artist', 'duration', 'release_year']
+    rows = [(1, 'Runaway', 'Aurora', 248, 2015), (2, 'Neon Nights', 'Midnight Engine', 0, None)]
+    shaped = SONG_ROW.shape_tuples(columns, rows)
+    assert shaped == [[1, 'Runaway', 'Aurora', '4:08', 2015], [2, 'Neon Nights', 'Midnight Engine', '0:00', None]]
+    assert rows[0][3] == 248
+    assert shaped == [list(row.values()) for row in SONG_ROW.shape([dict(zip(columns, row)) for row in rows])]
+    # A result without the derived column is left as it is
+    assert SONG_ROW.shape_tuples(['song_id'], [(1,)]) == [[1]]
+
+
+def test_select_list():
+    projection = Projection(['S.song_id', 'S.duration'], {'duration': format_durations})
+    assert projection.sql == 'S.song_id,\n                S.duration'
+    assert SONG_ROW.columns[:3] == ['S.song_id', 'S.title', 'A.name as artist']
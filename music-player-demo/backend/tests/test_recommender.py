@@ -0,0 +1,129 @@
+import math
+import random
+from collections import defaultdict
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('scipy')
+
+from recommender import CooccurrenceModel, Recommender  # noqa: E402
+
+SHRINK = 5.0
+
+# (basket, song_id): playlists are even baskets, favorites odd
+PAIRS = [(2, 10), (2, 20), (2, 30), (4, 10), (4, 20), (6, 20), (6, 40), (3, 10), (3, 30), (3, 50)]
+
+
+def brute_force(pairs, shrink=SHRINK):
+    """{song: {neighbour: score}} straight from the definition"""
+    songs_by_basket = defaultdict(set)
+    for basket, song_id in pairs:
+        songs_by_basket[basket].add(song_id)
+    counts = defaultdict(int)
+    shared = defaultdict(lambda: defaultdict(int))
+    for songs in songs_by_basket.values():
+        for song_id in songs:
+            counts[song_id] += 1
+            for other in songs - {song_id}:
+                shared[song_id][other] += 1
+    return {song_id: {other: together / (math.sqrt(counts[song_id] * counts[other]) + shrink)
+                      for other, together in neighbours.items()}
+            for song_id, neighbours in shared.items()}
+
+
+def as_dict(results):
+    return {song_id: score for song_id, score in results}
+
+
+def serving(pairs, top_k=50, block_size=2048):
+    recommender = Recommender(top_k=top_k, shrink=SHRINK)
+    recommender._swap(CooccurrenceModel.build(pairs, top_k, SHRINK, block_size=block_size), None)
+    return recommender
+
+
+def test_build_lays_out_sorted_csr_rows():
+    model = CooccurrenceModel.build(PAIRS, top_k=50, shrink=SHRINK)
+    assert model.song_ids.tolist() == [10, 20, 30, 40, 50]
+    assert model.counts.tolist() == [3, 3, 2, 1, 1]
+    assert model.indptr[0] == 0 and model.indptr[-1] == len(model.neighbours)
+    row = model.row(10)
+    lo, hi = model.indptr[row], model.indptr[row + 1]
+    neighbours = model.song_ids[model.neighbours[lo:hi]].tolist()
+    assert sorted(neighbours) == [20, 30, 50]
+    assert model.row(99) is None
+
+
+def test_top_k_keeps_the_best_neighbours():
+    expected = brute_force(PAIRS)[10]
+    model = CooccurrenceModel.build(PAIRS, top_k=1, shrink=SHRINK)
+    row = model.row(10)
+    assert model.indptr[row + 1] - model.indptr[row] == 1
+    best = model.song_ids[model.neighbours[model.indptr[row]]]
+    assert best == max(expected, key=expected.get)
+
+
+def test_similar_matches_brute_force():
+    expected = brute_force(PAIRS)
+    recommender = serving(PAIRS)
+    for song_id, neighbours in expected.items():
+        assert as_dict(recommender.similar(song_id)) == pytest.approx(neighbours, abs=1e-6)
+    assert recommender.similar(99) == []
+
+
+def test_vectorised_gather_over_many_seeds_matches_per_seed_sums():
+    rng = random.Random(3)
+    pairs = [(basket, rng.randint(1, 60)) for basket in range(200) for _ in range(rng.randint(1, 8))]
+    expected = brute_force(pairs)
+    # Small blocks exercise the blocked product as well
+    recommender = serving(pairs, block_size=7)
+    seeds = [5, 17, 17, 33, 999, 42]
+
+    totals = defaultdict(float)
+    for seed in dict.fromkeys(seeds):
+        for other, score in expected.get(seed, {}).items():
+            totals[other] += score
+    for seed in seeds:
+        totals.pop(seed, None)
+
+    got = as_dict(recommender.recommend(seeds, limit=1000))
+    assert got == pytest.approx(dict(totals), abs=1e-5)
+
+
+def test_recommend_orders_best_first_and_respects_the_limit():
+    recommender = serving(PAIRS)
+    results = recommender.recommend([10], limit=2)
+    assert len(results) == 2
+    assert results[0][1] >= results[1][1]
+    assert recommender.recommend([]) == []
+    assert Recommender().recommend([10]) is None
+
+
+def test_favorite_deltas_are_merged_before_ranking():
+    recommender = serving(PAIRS)
+    # User 1 (basket 3: songs 10, 30, 50) adds song 40
+    recommender.record_favorite(1, 40, True)
+    assert recommender.pending_users() == {1}
+    assert recommender.apply({1: [10, 30, 50, 40]}) == 1
+    expected = brute_force(PAIRS + [(3, 40)])
+    for song_id in (10, 40, 20):
+        assert as_dict(recommender.similar(song_id)) == pytest.approx(expected[song_id], abs=1e-6)
+
+    # Removing it again restores the original scores
+    recommender.record_favorite(1, 40, False)
+    recommender.apply({1: [10, 30, 50]})
+    assert as_dict(recommender.similar(40)) == pytest.approx(brute_force(PAIRS)[40], abs=1e-6)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / 'model.npz')
+    model = CooccurrenceModel.build(PAIRS, top_k=3, shrink=SHRINK)
+    model.save(path)
+    loaded = CooccurrenceModel.load(path)
+    for name in ('song_ids', 'counts', 'indptr', 'neighbours', 'together'):
+        assert np.array_equal(getattr(loaded, name), getattr(model, name))
+    assert (loaded.top_k, loaded.shrink) == (3, SHRINK)
+
+    recommender = Recommender(path=path)
+    assert recommender.reload() is True
+    assert recommender.reload() is False
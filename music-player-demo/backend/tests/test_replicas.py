@@ -0,0 +1,112 @@
+from contextlib import contextmanager
+
+from replicas import ReplicaRouter, parse_hosts, replication_lag
+
+
+class FakeCursor:
+    def __init__(self, row, description=None, fail_first=False):
+        self.row = row
+        self.description = description
+        self.fail_first = fail_first
+        self.executed = []
+
+    def execute(self, sql):
+        self.executed.append(sql)
+        if self.fail_first and len(self.executed) == 1:
+            raise RuntimeError('You have an error in your SQL syntax')
+
+    def fetchone(self):
+        return self.row
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+
+class FakePool:
+    def __init__(self, lag=0.0):
+        self.lag = lag
+
+    @contextmanager
+    def connection(self):
+        if isinstance(self.lag, Exception):
+            raise self.lag
+        yield FakeConnection(FakeCursor({'Seconds_Behind_Source': self.lag}))
+
+    def stats(self):
+        return {}
+
+
+def make_router(**lags):
+    primary = FakePool()
+    replicas = {name: FakePool(lag) for name, lag in lags.items()}
+    router = ReplicaRouter(primary, replicas.items(), max_lag=5, check_interval=1, log=lambda message: None)
+    return router, primary, replicas
+
+
+def test_parse_hosts():
+    assert parse_hosts('db-r1:3307, db-r2,,') == [('db-r1', 3307), ('db-r2', 3306)]
+    assert parse_hosts('db-r1', default_port=3310) == [('db-r1', 3310)]
+    assert parse_hosts('') == [] and parse_hosts(None) == []
+
+
+def test_replication_lag_reads_either_column_name():
+    assert replication_lag(FakeConnection(FakeCursor({'Seconds_Behind_Master': 3}))) == 3.0
+    assert replication_lag(FakeConnection(FakeCursor({'Seconds_Behind_Source': None}))) is None
+    assert replication_lag(FakeConnection(FakeCursor(None))) is None
+
+    tuples = FakeCursor((7, 'Yes'), description=[('Seconds_Behind_Master',), ('Replica_IO_Running',)],
+                        fail_first=True)
+    assert replication_lag(FakeConnection(tuples)) == 7.0
+    assert tuples.executed == ['SHOW REPLICA STATUS', 'SHOW SLAVE STATUS']
+
+
+def test_unchecked_replicas_are_not_used():
+    router, primary, _ = make_router(r1=0.0)
+    assert router.read_pool() is primary
+    assert router.stats()['fallbacks'] == 1
+
+
+def test_reads_round_robin_over_healthy_replicas():
+    router, primary, replicas = make_router(r1=0.5, r2=1.0, r3=60.0)
+    router.check()
+    picked = {router.read_pool() for _ in range(4)}
+    assert picked == {replicas['r1'], replicas['r2']}
+    stats = router.stats()
+    assert stats['replica_reads'] == 4 and stats['primary_reads'] == 0
+    assert [replica['healthy'] for replica in stats['replicas']] == [True, True, False]
+
+
+def test_lagging_or_broken_replicas_fall_back_to_the_primary():
+    router, primary, replicas = make_router(r1=0.0)
+    router.check()
+    assert router.read_pool() is replicas['r1']
+
+    replicas['r1'].lag = ConnectionError('gone away')
+    router.check()
+    assert router.read_pool() is primary
+    assert router.replicas[0].error == 'gone away'
+
+    replicas['r1'].lag = None
+    router.check()
+    assert router.replicas[0].error == 'replication not running'
+    assert router.read_pool() is primary
+
+
+def test_stale_lag_readings_do_not_count():
+    router, primary, replicas = make_router(r1=0.0)
+    router.check()
+    replica = router.replicas[0]
+    assert router.healthy(replica, now=replica.checked_at + router.stale_after)
+    assert not router.healthy(replica, now=replica.checked_at + router.stale_after + 0.1)
+
+    replica.checked_at -= router.stale_after + 1
+    assert router.read_pool() is primary
+    assert not router.stats()['replicas'][0]['healthy']
@@ -0,0 +1,59 @@
+from search_index import SearchIndex, tokenize
+
+SONGS = [
+    (1, {'title': 'Neon Nights', 'artist': 'Midnight Engine', 'lyrics': 'city lights'}, {'title': 'Neon Nights'}),
+    (2, {'title': 'Midnight River', 'artist': 'Paper Kites', 'lyrics': 'neon glow'}, {'title': 'Midnight River'}),
+    (3, {'title': 'Electric Dreams', 'artist': 'Neon Horizon', 'lyrics': None}, {'title': 'Electric Dreams'}),
+]
+
+
+def build():
+    index = SearchIndex({'title': 3.0, 'artist': 2.0, 'lyrics': 1.0})
+    index.load(SONGS)
+    return index
+
+
+def ids(results):
+    return [doc_id for doc_id, _, _ in results]
+
+
+def test_tokenize():
+    assert tokenize("Don't Stop Me-Now") == ['don', 't', 'stop', 'me', 'now']
+    assert tokenize(None) == []
+
+
+def test_field_weights_rank_title_matches_first():
+    index = build()
+    assert ids(index.search('neon')) == [1, 3, 2]
+    assert index.search('neon')[0][2] == {'title': 'Neon Nights'}
+
+
+def test_every_term_must_match():
+    index = build()
+    assert ids(index.search('midnight river')) == [2]
+    assert index.search('midnight unknown') == []
+    assert index.search('  ') == []
+
+
+def test_last_term_matches_as_a_prefix():
+    index = build()
+    assert ids(index.search('elec')) == [3]
+    assert index.search('elec', prefix=False) == []
+    assert sorted(ids(index.search('neon mid'))) == [1, 2]
+
+
+def test_incremental_add_and_remove():
+    index = build()
+    index.add(4, {'title': 'Neon Lights'}, {'title': 'Neon Lights'})
+    assert 4 in ids(index.search('neon lig'))
+    index.add(4, {'title': 'Velvet Storm'}, {'title': 'Velvet Storm'})
+    assert 4 not in ids(index.search('neon'))
+    assert index.get(4) == {'title': 'Velvet Storm'}
+    index.remove(4)
+    assert index.search('velvet') == []
+    assert index.get(4) is None
+    assert index.stats()['documents'] == 3
+
+
+def test_limit():
+    assert len(build().search('neon', limit=2)) == 2
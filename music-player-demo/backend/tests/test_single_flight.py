@@ -0,0 +1,131 @@
+import threading
+import time
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def run_concurrently(flight, key, fn, callers, tags=()):
+    """Start `callers` threads on flight.do(key, fn) once the first is running"""
+    results = []
+    errors = []
+
+    def call():
+        try:
+            results.append(flight.do(key, fn, tags))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.001)
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    runs = []
+
+    def work():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+        return 'value'
+
+    leader, results, _ = run_concurrently(flight, 'k', work, 1)
+    assert started.wait(5)
+    followers, follower_results, _ = run_concurrently(flight, 'k', work, 4)
+    wait_for(lambda: flight.stats()['waiting'] == 4)
+    release.set()
+    for thread in leader + followers:
+        thread.join(5)
+
+    assert len(runs) == 1
+    assert results == [('value', False)]
+    assert follower_results == [('value', True)] * 4
+    stats = flight.stats()
+    assert stats['calls'] == 1 and stats['shared'] == 4 and stats['in_flight'] == 0
+
+
+def test_nothing_is_kept_after_the_call_returns():
+    flight = SingleFlight()
+    calls = iter(range(10))
+    assert flight.do('k', lambda: next(calls)) == (0, False)
+    assert flight.do('k', lambda: next(calls)) == (1, False)
+
+
+def test_followers_receive_the_leaders_exception():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise RuntimeError('boom')
+
+    leader, _, leader_errors = run_concurrently(flight, 'k', fail, 1)
+    assert started.wait(5)
+    followers, _, follower_errors = run_concurrently(flight, 'k', fail, 2)
+    wait_for(lambda: flight.stats()['waiting'] == 2)
+    release.set()
+    for thread in leader + followers:
+        thread.join(5)
+
+    assert [str(e) for e in leader_errors + follower_errors] == ['boom'] * 3
+
+
+def test_forget_starts_a_fresh_call_for_later_callers():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return 'old'
+
+    leader, results, _ = run_concurrently(flight, 'k', slow, 1, tags=['playlist:1'])
+    assert started.wait(5)
+    flight.forget('playlist:1')
+    # A read starting after the write must not join the call that began before it
+    assert flight.do('k', lambda: 'new', ['playlist:1']) == ('new', False)
+    release.set()
+    leader[0].join(5)
+    assert results == [('old', False)]
+    assert flight.stats()['forgotten'] == 1
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_follower_runs_the_function_itself_after_the_timeout():
+    flight = SingleFlight(timeout=0.05)
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return 'leader'
+
+    leader, _, _ = run_concurrently(flight, 'k', slow, 1)
+    assert started.wait(5)
+    assert flight.do('k', lambda: 'own') == ('own', False)
+    release.set()
+    leader[0].join(5)
+    assert flight.stats()['timeouts'] == 1
+
+
+@pytest.mark.parametrize('key', [('a', 1), ('a', 2)])
+def test_distinct_keys_do_not_share(key):
+    flight = SingleFlight()
+    assert flight.do(key, lambda: key) == (key, False)
@@ -0,0 +1,35 @@
+from typeahead import PrefixIndex, completion_keys
+
+
+def test_completion_keys_cover_every_word():
+    assert completion_keys('Taylor  Swift') == ['taylor swift', 'swift']
+    assert completion_keys('The Rolling Stones') == ['the rolling stones', 'rolling stones', 'stones']
+
+
+def build():
+    index = PrefixIndex()
+    index.build([(1, 'Taylor Swift'), (2, 'Tame Impala'), (3, 'The Weeknd'), (4, ''), (5, 'Swedish House Mafia')])
+    return index
+
+
+def test_complete_matches_any_word_prefix_once():
+    index = build()
+    assert index.complete('ta') == [(2, 'Tame Impala'), (1, 'Taylor Swift')]
+    assert index.complete('SW') == [(5, 'Swedish House Mafia'), (1, 'Taylor Swift')]
+    assert index.complete('taylor sw') == [(1, 'Taylor Swift')]
+    assert index.complete('t', k=2) == [(2, 'Tame Impala'), (1, 'Taylor Swift')]
+    assert index.complete('  ') == []
+    assert len(index) == 4
+
+
+def test_add_rename_and_remove():
+    index = build()
+    index.add(6, 'Tate McRae')
+    assert (6, 'Tate McRae') in index.complete('tat')
+    index.update(6, 'Olivia Rodrigo')
+    assert index.complete('tat') == []
+    assert index.complete('rod') == [(6, 'Olivia Rodrigo')]
+    index.remove(1)
+    assert index.complete('swift') == []
+    stats = index.stats()
+    assert stats['entries'] == 4 and stats['keys'] == 9
@@ -0,0 +1,123 @@
+# ============================================================================
+# MUSIC PLAYER BACKEND - PREFIX TYPEAHEAD INDEX
+# Purpose: Compact sorted-array index for keystroke-driven completions of
+#          usernames and artist names (bisect instead of LIKE table scans)
+# ============================================================================
+
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+def completion_keys(name):
+    """
+    Keys a name is reachable under: the whole name plus every later word,
+    so 'Taylor Swift' completes for both 'tay' and 'swi'.
+    """
+    folded = ' '.join(str(name).casefold().split())
+    keys = [folded]
+    start = folded.find(' ')
+    while start != -1:
+        keys.append(folded[start + 1:])
+        start = folded.find(' ', start + 1)
+    return keys
+
+
+class PrefixIndex:
+    """
+    Sorted parallel arrays of (key, id) for prefix completion.
+
+    A lookup is one bisect plus a scan over at most `k` matching entries.
+    Keys live in a plain sorted list and ids in an array('q'), which keeps the
+    footprint to roughly one small str object per key.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys = []
+        self._ids = array('q')
+        self._names = {}          # id -> display name
+
+    def build(self, entries):
+        """Replace the index with an iterable of (id, name) pairs"""
+        names = {}
+        pairs = []
+        for item_id, name in entries:
+            if not name:
+                continue
+            names[item_id] = name
+            pairs.extend((key, item_id) for key in completion_keys(name))
+        pairs.sort()
+        keys = [key for key, _ in pairs]
+        ids = array('q', (item_id for _, item_id in pairs))
+        with self._lock:
+            self._keys = keys
+            self._ids = ids
+            self._names = names
+
+    def add(self, item_id, name):
+        """Insert or rename a single entry"""
+        with self._lock:
+            self._remove(item_id)
+            if not name:
+                return
+            self._names[item_id] = name
+            for key in completion_keys(name):
+                i = bisect_right(self._keys, key)
+                self._keys.insert(i, key)
+                self._ids.insert(i, item_id)
+
+    update = add
+
+    def remove(self, item_id):
+        with self._lock:
+            self._remove(item_id)
+
+    def complete(self, prefix, k=10):
+        """Up to `k` (id, name) pairs whose name (or a word in it) starts with `prefix`"""
+        prefix = ' '.join(str(prefix).casefold().split())
+        if not prefix:
+            return []
+        results = []
+        seen = set()
+        with self._lock:
+            i = bisect_left(self._keys, prefix)
+            keys = self._keys
+            while i < len(keys) and len(results) < k and keys[i].startswith(prefix):
+                item_id = self._ids[i]
+                if item_id not in seen:
+                    seen.add(item_id)
+                    results.append((item_id, self._names[item_id]))
+                i += 1
+        return results
+
+    def memory_bytes(self):
+        """Approximate footprint of the index structures in bytes"""
+        with self._lock:
+            total = sys.getsizeof(self._keys) + sum(sys.getsizeof(key) for key in self._keys)
+            total += self._ids.buffer_info()[1] * self._ids.itemsize
+            total += sys.getsizeof(self._names)
+            return total
+
+    def stats(self):
+        with self._lock:
+            entries = len(self._names)
+            keys = len(self._keys)
+        return {'entries': entries, 'keys': keys, 'memory_bytes': self.memory_bytes()}
+
+    def __len__(self):
+        return len(self._names)
+
+    def _remove(self, item_id):
+        name = self._names.pop(item_id, None)
+        if name is None:
+            return
+        for key in completion_keys(name):
+            i = bisect_left(self._keys, key)
+            while i < len(self._keys) and self._keys[i] == key:
+                if self._ids[i] == item_id:
+                    del self._keys[i]
+                    del self._ids[i]
+                    break
+                i += 1
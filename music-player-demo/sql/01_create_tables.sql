@@ -104,7 +104,7 @@ CREATE TABLE Playlist_Songs (
     playlist_song_id INT AUTO_INCREMENT PRIMARY KEY,
     playlist_id INT NOT NULL COMMENT 'Foreign key to Playlists table',
     song_id INT NOT NULL COMMENT 'Foreign key to Songs table',
-    track_order INT NOT NULL COMMENT 'Position of song in playlist (1-based index)',
+    track_order INT NOT NULL COMMENT 'Sort key within the playlist (sparse, spaced 1024 apart)',
     added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT 'Timestamp when song was added to playlist',
     
     FOREIGN KEY (playlist_id) REFERENCES Playlists(playlist_id) ON DELETE CASCADE,
@@ -127,7 +127,7 @@ COMMENT='Junction table for many-to-many relationship between Playlists and Song
 CREATE TABLE Billboard_Top_Songs (
     chart_entry_id INT AUTO_INCREMENT PRIMARY KEY,
     song_id INT NOT NULL COMMENT 'Foreign key to Songs table',
-    rank INT NOT NULL COMMENT 'Current chart position (1-10)',
+    `rank` INT NOT NULL COMMENT 'Current chart position (1-10)',
     last_week INT COMMENT 'Previous week chart position (NULL if new entry)',
     weeks_on_chart INT DEFAULT 1 COMMENT 'Number of weeks song has been on chart',
     chart_date DATE NOT NULL COMMENT 'Date of this chart entry',
@@ -135,11 +135,11 @@ CREATE TABLE Billboard_Top_Songs (
     
     FOREIGN KEY (song_id) REFERENCES Songs(song_id) ON DELETE CASCADE,
     UNIQUE KEY unique_song_chart (song_id, chart_date),
-    INDEX idx_rank (rank),
+    INDEX idx_rank (`rank`),
     INDEX idx_chart_date (chart_date),
     INDEX idx_song_id (song_id),
     
-    CHECK (rank BETWEEN 1 AND 10),
+    CHECK (`rank` BETWEEN 1 AND 10),
     CHECK (last_week IS NULL OR last_week BETWEEN 1 AND 100)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
 COMMENT='Stores Billboard Hot 100 Top 10 chart positions and statistics';
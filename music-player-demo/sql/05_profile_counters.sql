@@ -0,0 +1,71 @@
+-- ============================================================================
+-- MUSIC PLAYER DATABASE - MAINTAINED PROFILE COUNTERS
+-- Database: music_player_db
+-- Purpose: Store profile statistics as counters maintained by the playlist
+--          write routes, so profile reads are single-row lookups instead of
+--          COUNT / COUNT(DISTINCT) aggregates over Playlist_Songs
+-- ============================================================================
+
+USE music_player_db;
+
+-- ============================================================================
+-- COUNTER COLUMNS
+-- Users.playlist_count  - number of playlists owned by the user
+-- Users.total_songs     - distinct songs across all of the user's playlists
+-- Playlists.song_count  - number of songs in the playlist
+-- ============================================================================
+ALTER TABLE Users
+    ADD COLUMN playlist_count INT NOT NULL DEFAULT 0 COMMENT 'Maintained count of playlists owned by the user',
+    ADD COLUMN total_songs INT NOT NULL DEFAULT 0 COMMENT 'Maintained count of distinct songs across the user''s playlists';
+
+ALTER TABLE Playlists
+    ADD COLUMN song_count INT NOT NULL DEFAULT 0 COMMENT 'Maintained count of songs in the playlist';
+
+-- ============================================================================
+-- TABLE: USER_SONG_REFS
+-- Description: How many of a user's playlists contain each song. Lets the
+--              write routes know when a song enters or leaves the user's
+--              distinct song set without COUNT(DISTINCT) over all playlists
+-- Primary Key: (user_id, song_id)
+-- ============================================================================
+CREATE TABLE User_Song_Refs (
+    user_id INT NOT NULL COMMENT 'Foreign key to Users table',
+    song_id INT NOT NULL COMMENT 'Foreign key to Songs table',
+    playlist_refs INT NOT NULL DEFAULT 0 COMMENT 'Number of the user''s playlists containing the song',
+
+    PRIMARY KEY (user_id, song_id),
+    FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE,
+    FOREIGN KEY (song_id) REFERENCES Songs(song_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+COMMENT='Per-user song reference counts backing Users.total_songs';
+
+-- ============================================================================
+-- BACKFILL (the state `flask reconcile-profile-stats` repairs back to)
+-- ============================================================================
+INSERT INTO User_Song_Refs (user_id, song_id, playlist_refs)
+SELECT P.user_id, PS.song_id, COUNT(*)
+FROM Playlist_Songs PS
+INNER JOIN Playlists P ON PS.playlist_id = P.playlist_id
+GROUP BY P.user_id, PS.song_id;
+
+UPDATE Playlists P
+LEFT JOIN (
+    SELECT playlist_id, COUNT(*) AS song_count
+    FROM Playlist_Songs
+    GROUP BY playlist_id
+) X ON P.playlist_id = X.playlist_id
+SET P.song_count = COALESCE(X.song_count, 0);
+
+UPDATE Users U
+LEFT JOIN (
+    SELECT user_id, COUNT(*) AS playlist_count
+    FROM Playlists
+    GROUP BY user_id
+) PC ON U.user_id = PC.user_id
+LEFT JOIN (
+    SELECT user_id, COUNT(*) AS total_songs
+    FROM User_Song_Refs
+    GROUP BY user_id
+) TS ON U.user_id = TS.user_id
+SET U.playlist_count = COALESCE(PC.playlist_count, 0),
+    U.total_songs = COALESCE(TS.total_songs, 0);
@@ -0,0 +1,30 @@
+-- ============================================================================
+-- MUSIC PLAYER DATABASE - COVERING INDEXES FOR SONG LISTINGS
+-- Database: music_player_db
+-- Purpose: The song listings select raw Songs columns (duration is formatted
+--          by backend/projections.py), so these indexes hold every Songs
+--          column they read and MySQL answers them without row lookups
+-- ============================================================================
+
+USE music_player_db;
+
+-- ============================================================================
+-- SONGS
+-- idx_title_listing  - catalog listing, keyset pages on (title, song_id):
+--                      GET /api/songs
+-- idx_artist_listing - an artist's songs ordered by title:
+--                      GET /api/artist/<id>
+-- song_id sits right after title in idx_title_listing so the keyset WHERE and
+-- ORDER BY (title, song_id) read the index in order; InnoDB only appends its
+-- implicit song_id suffix after the last listed column, which would leave the
+-- pages to a range scan plus filesort. Both indexes extend the single-column
+-- indexes they replace, so existing lookups keep working and the artist_id
+-- foreign key stays indexed.
+-- ============================================================================
+ALTER TABLE Songs
+    ADD INDEX idx_title_listing (title, song_id, artist_id, duration, release_year),
+    ADD INDEX idx_artist_listing (artist_id, title, duration, release_year);
+
+ALTER TABLE Songs
+    DROP INDEX idx_title,
+    DROP INDEX idx_artist_id;
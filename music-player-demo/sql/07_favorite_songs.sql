@@ -0,0 +1,39 @@
+-- ============================================================================
+-- MUSIC PLAYER DATABASE - FAVORITE SONGS
+-- Database: music_player_db
+-- Purpose: Table behind the /api/favorites routes. The favorite toggle relies
+--          on the (user_id, song_id) primary key: a duplicate key error on
+--          INSERT is how it knows the song was already a favorite, and the
+--          write-behind buffer's batched INSERT IGNORE depends on it too
+-- ============================================================================
+
+USE music_player_db;
+
+-- ============================================================================
+-- TABLE: FAVORITE_SONGS
+-- Description: Songs a user has favorited
+-- Primary Key: (user_id, song_id)
+-- Index: idx_user_favorited serves GET /api/favorites/songs/<user_id>
+--        (newest first) without a filesort
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS Favorite_Songs (
+    user_id INT NOT NULL COMMENT 'Foreign key to Users table',
+    song_id INT NOT NULL COMMENT 'Foreign key to Songs table',
+    favorited_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT 'When the song was favorited',
+
+    PRIMARY KEY (user_id, song_id),
+    FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE,
+    FOREIGN KEY (song_id) REFERENCES Songs(song_id) ON DELETE CASCADE,
+    INDEX idx_user_favorited (user_id, favorited_at),
+    INDEX idx_song_id (song_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+COMMENT='User favorite songs';
+
+-- Databases created before this file may already have Favorite_Songs without
+-- a key on (user_id, song_id). Remove duplicate rows, then add it:
+--
+-- DELETE F1 FROM Favorite_Songs F1
+-- INNER JOIN Favorite_Songs F2
+--     ON F1.user_id = F2.user_id AND F1.song_id = F2.song_id
+--    AND F1.favorited_at > F2.favorited_at;
+-- ALTER TABLE Favorite_Songs ADD PRIMARY KEY (user_id, song_id);
@@ -0,0 +1,31 @@
+-- ============================================================================
+-- MUSIC PLAYER DATABASE - SPARSE PLAYLIST ORDER KEYS
+-- Database: music_player_db
+-- Purpose: Playlist_Songs.track_order used to be a dense 1..n position, so
+--          moving one song renumbered every song between its old and new
+--          place. The backend now keeps the keys 1024 apart
+--          (backend/playlist_order.py) and gives a moved or added song a key
+--          between its neighbours - one row written per change. This
+--          respaces existing playlists once, keeping their current order.
+--          Afterwards `flask rebalance-playlists` can respace crowded
+--          playlists off-peak; the API also respaces one inline when needed.
+-- Requires: MySQL 8.0 (window functions)
+-- ============================================================================
+
+USE music_player_db;
+
+UPDATE Playlist_Songs PS
+INNER JOIN (
+    SELECT
+        playlist_song_id,
+        ROW_NUMBER() OVER (
+            PARTITION BY playlist_id
+            ORDER BY track_order, playlist_song_id
+        ) * 1024 AS spaced_order
+    FROM Playlist_Songs
+) R ON PS.playlist_song_id = R.playlist_song_id
+SET PS.track_order = R.spaced_order;
+
+-- GET /api/playlist/<id> reads a playlist's songs in order straight off
+-- idx_track_order (playlist_id, track_order); playlist_song_id, the implicit
+-- suffix of the index, breaks ties the same way the backend does.
@@ -0,0 +1,28 @@
+-- ============================================================================
+-- MUSIC PLAYER DATABASE - CATALOG INGEST CHECKPOINTS
+-- Database: music_player_db
+-- Purpose: Progress of bulk catalog feeds loaded by `flask ingest-catalog`
+--          and POST /api/catalog/ingest (backend/catalog_ingest.py). Each
+--          chunk of songs commits in the same transaction as its checkpoint
+--          row, so a feed that stops part way resumes after the last
+--          committed record without loading any song twice
+-- ============================================================================
+
+USE music_player_db;
+
+-- ============================================================================
+-- TABLE: INGEST_CHECKPOINTS
+-- Description: One row per named feed (source)
+-- Primary Key: source
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS Ingest_Checkpoints (
+    source VARCHAR(255) NOT NULL COMMENT 'Feed name given to the ingest command',
+    records_done BIGINT NOT NULL DEFAULT 0 COMMENT 'Feed records committed (loaded or rejected)',
+    songs_inserted BIGINT NOT NULL DEFAULT 0 COMMENT 'Songs written by this feed',
+    artists_created BIGINT NOT NULL DEFAULT 0 COMMENT 'Artists first created by this feed',
+    completed_at TIMESTAMP NULL DEFAULT NULL COMMENT 'When the whole feed was loaded',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT 'Last committed chunk',
+
+    PRIMARY KEY (source)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+COMMENT='Resume points for bulk catalog ingestion';
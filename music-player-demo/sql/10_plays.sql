@@ -0,0 +1,32 @@
+-- ============================================================================
+-- MUSIC PLAYER DATABASE - PLAY EVENTS
+-- Database: music_player_db
+-- Purpose: Listening history written by POST /api/plays. The backend buffers
+--          events in memory and appends them here in multi-row INSERTs
+--          (backend/plays.py); every worker then reads new rows past the
+--          highest play_id it has seen into in-memory rolling counters, so
+--          play counts and GET /api/trending never scan this table
+-- ============================================================================
+
+USE music_player_db;
+
+-- ============================================================================
+-- TABLE: PLAYS
+-- Description: One row per song play
+-- Primary Key: play_id (append order; the counters tail it by range)
+-- Foreign Keys: none - an append-only history that skips a parent lookup per
+--        row, and keeps plays of songs or users deleted later
+-- Index: idx_played_at serves the one-off week load of a starting worker,
+--        idx_user_played a user's listening history (newest first)
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS Plays (
+    play_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NULL COMMENT 'Listener (NULL when not signed in)',
+    song_id INT NOT NULL COMMENT 'Song played',
+    played_at TIMESTAMP(3) NOT NULL COMMENT 'When playback started',
+    seconds_played INT NULL COMMENT 'How long it played, when the client reports it',
+
+    INDEX idx_played_at (played_at),
+    INDEX idx_user_played (user_id, played_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+COMMENT='Song play events';
@@ -0,0 +1,42 @@
+-- ============================================================================
+-- MUSIC PLAYER DATABASE - ROW VERSIONS
+-- Database: music_player_db
+-- Purpose: ETags used to be built from updated_at, a TIMESTAMP with
+--          one-second resolution: two playlist reorders in the same second
+--          produced the same ETag and a client revalidating in between got
+--          a 304 with the old order. Each row now carries a version counter
+--          that every UPDATE increments, and the backend builds its ETags
+--          from those (updated_at still feeds Last-Modified)
+-- ============================================================================
+
+USE music_player_db;
+
+-- ============================================================================
+-- VERSION COLUMNS
+-- Playlists.version - bumped by every playlist write (the backend's
+--                     touch_playlist sets version = version + 1 when the
+--                     playlist's songs change)
+-- Songs.version / Artists.version - bumped by any edit, including edits made
+--                     outside the API; a song's ETag includes its artist's
+--                     version since song responses carry the artist name
+-- ============================================================================
+ALTER TABLE Playlists
+    ADD COLUMN version INT UNSIGNED NOT NULL DEFAULT 0 COMMENT 'Incremented by every update of the playlist or its songs';
+
+ALTER TABLE Songs
+    ADD COLUMN version INT UNSIGNED NOT NULL DEFAULT 0 COMMENT 'Incremented by every update of the song';
+
+ALTER TABLE Artists
+    ADD COLUMN version INT UNSIGNED NOT NULL DEFAULT 0 COMMENT 'Incremented by every update of the artist';
+
+-- ============================================================================
+-- TRIGGERS: a row's version moves on every UPDATE, whoever issues it
+-- ============================================================================
+CREATE TRIGGER trg_playlists_version BEFORE UPDATE ON Playlists
+FOR EACH ROW SET NEW.version = OLD.version + 1;
+
+CREATE TRIGGER trg_songs_version BEFORE UPDATE ON Songs
+FOR EACH ROW SET NEW.version = OLD.version + 1;
+
+CREATE TRIGGER trg_artists_version BEFORE UPDATE ON Artists
+FOR EACH ROW SET NEW.version = OLD.version + 1;
@@ -0,0 +1,20 @@
+-- ============================================================================
+-- MUSIC PLAYER DATABASE - SONG LYRICS
+-- Database: music_player_db
+-- Purpose: GET /api/song/<id> has always returned Songs.lyrics, and the song
+--          search index matches on it, but 01_create_tables.sql never
+--          created the column - only databases where it was added by hand
+--          had it. This adds it where it is missing (a no-op elsewhere)
+-- ============================================================================
+
+USE music_player_db;
+
+SET @add_lyrics = IF(
+    (SELECT COUNT(*) FROM information_schema.COLUMNS
+     WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Songs' AND COLUMN_NAME = 'lyrics') = 0,
+    'ALTER TABLE Songs ADD COLUMN lyrics TEXT NULL COMMENT ''Song lyrics (optional)'' AFTER release_year',
+    'DO 0'
+);
+PREPARE add_lyrics FROM @add_lyrics;
+EXECUTE add_lyrics;
+DEALLOCATE PREPARE add_lyrics;
@@ -1,7 +1,7 @@
 import React, { useMemo, useState, useRef, useCallback, useEffect } from "react";
 import { Plus, Search, Music, Play, Pause, SkipForward, SkipBack, ListPlus, Headphones, Shuffle, Repeat, Volume2, Users, Library, User, Lock, Link2, Trash2, SettingsIcon, Check } from "lucide-react";
 import Cropper from "react-easy-crop";
-import { loadAppData, deletePlaylist, fetchPlaylistSongs, createPlaylist, addSongToPlaylist, fetchUserPlaylists, searchUsers, fetchUserProfile, fetchUserPublicPlaylists, updateUserProfile, fetchBillboardTop10 } from "./services/api";
+import { loadAppData, deletePlaylist, fetchPlaylistSongs, createPlaylist, addSongToPlaylist, fetchUserPlaylists, searchUsers, fetchUserProfile, fetchUserPublicPlaylists, updateUserProfile, fetchBillboardTop10, recordPlay } from "./services/api";
 
 const DEMO_PLAYLISTS = [];
 
@@ -92,6 +92,13 @@ export default function MusicPlayerMock({ currentUserId, loginEmail, onLogout })
       });
   }, [currentUserId]);
 
+  // Record a play each time a track starts
+  useEffect(() => {
+    if (currentTrack?.song_id) {
+      recordPlay(currentUserId, currentTrack.song_id);
+    }
+  }, [currentTrack]);
+
   // Prevent body scroll when modals are open
   useEffect(() => {
     if (selectedPlaylist || showProfile || showCropModal || showCreatePlaylist || showAdModal || showFriendsModal) {
@@ -6,6 +6,17 @@
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:5000/api';
 
+// ============================================================================
+// REQUESTS
+// ============================================================================
+
+// Send cookies on cross-origin calls too: after a write the backend pins this
+// client's reads to the primary database for a few seconds (db_primary_until
+// cookie), so the next GET sees the change even while read replicas lag
+function apiFetch(url, options = {}) {
+  return fetch(url, { credentials: 'include', ...options });
+}
+
 // ============================================================================
 // ERROR HANDLING
 // ============================================================================
@@ -24,7 +35,7 @@ async function handleResponse(response) {
 
 export async function checkAPIHealth() {
   try {
-    const response = await fetch(`${API_URL}/health`);
+    const response = await apiFetch(`${API_URL}/health`);
     return handleResponse(response);
   } catch (error) {
     console.error('Health check failed:', error);
@@ -42,7 +53,7 @@ export async function checkAPIHealth() {
  */
 export async function fetchArtists() {
   try {
-    const response = await fetch(`${API_URL}/artists`);
+    const response = await apiFetch(`${API_URL}/artists`);
     return handleResponse(response);
   } catch (error) {
     console.error('Error fetching artists:', error);
@@ -57,7 +68,7 @@ export async function fetchArtists() {
  */
 export async function fetchArtist(artistId) {
   try {
-    const response = await fetch(`${API_URL}/artists/${artistId}`);
+    const response = await apiFetch(`${API_URL}/artists/${artistId}`);
     return handleResponse(response);
   } catch (error) {
     console.error(`Error fetching artist ${artistId}:`, error);
@@ -75,7 +86,7 @@ export async function fetchArtist(artistId) {
  */
 export async function fetchSongs() {
   try {
-    const response = await fetch(`${API_URL}/songs`);
+    const response = await apiFetch(`${API_URL}/songs`);
     return handleResponse(response);
   } catch (error) {
     console.error('Error fetching songs:', error);
@@ -90,7 +101,7 @@ export async function fetchSongs() {
  */
 export async function fetchSong(songId) {
   try {
-    const response = await fetch(`${API_URL}/songs/${songId}`);
+    const response = await apiFetch(`${API_URL}/songs/${songId}`);
     return handleResponse(response);
   } catch (error) {
     console.error(`Error fetching song ${songId}:`, error);
@@ -105,7 +116,7 @@ export async function fetchSong(songId) {
  */
 export async function fetchSongsByArtist(artistId) {
   try {
-    const response = await fetch(`${API_URL}/songs/by-artist/${artistId}`);
+    const response = await apiFetch(`${API_URL}/songs/by-artist/${artistId}`);
     return handleResponse(response);
   } catch (error) {
     console.error(`Error fetching songs by artist ${artistId}:`, error);
@@ -124,7 +135,7 @@ export async function fetchSongsByArtist(artistId) {
  */
 export async function fetchUser(userId) {
   try {
-    const response = await fetch(`${API_URL}/users/${userId}`);
+    const response = await apiFetch(`${API_URL}/users/${userId}`);
     return handleResponse(response);
   } catch (error) {
     console.error(`Error fetching user ${userId}:`, error);
@@ -140,7 +151,7 @@ export async function fetchUser(userId) {
  */
 export async function loginUser(email, password) {
   try {
-    const response = await fetch(`${API_URL}/auth/login`, {
+    const response = await apiFetch(`${API_URL}/auth/login`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify({ email, password })
@@ -161,7 +172,7 @@ export async function loginUser(email, password) {
  */
 export async function signupUser(email, password, username = '') {
   try {
-    const response = await fetch(`${API_URL}/auth/signup`, {
+    const response = await apiFetch(`${API_URL}/auth/signup`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify({ email, password, username })
@@ -184,7 +195,7 @@ export async function searchUsers(query) {
       return { users: [] };
     }
     
-    const response = await fetch(`${API_URL}/users/search?q=${encodeURIComponent(query)}`);
+    const response = await apiFetch(`${API_URL}/users/search?q=${encodeURIComponent(query)}`);
     return handleResponse(response);
   } catch (error) {
     console.error('Error during user search:', error);
@@ -200,7 +211,7 @@ export async function searchUsers(query) {
 export async function fetchUserProfile(userId) {
   try {
     // Use the simpler /users/{id} endpoint which should already exist
-    const response = await fetch(`${API_URL}/users/${userId}`);
+    const response = await apiFetch(`${API_URL}/users/${userId}`);
     const data = await handleResponse(response);
     
     // Remove email from public profile view
@@ -222,7 +233,7 @@ export async function fetchUserProfile(userId) {
 export async function fetchUserPublicPlaylists(userId) {
   try {
     // Use the regular playlists endpoint - it should work for viewing other users' playlists
-    const response = await fetch(`${API_URL}/playlists/${userId}`);
+    const response = await apiFetch(`${API_URL}/playlists/${userId}`);
     const playlists = await handleResponse(response);
     
     // Transform to match expected structure
@@ -244,28 +255,26 @@ export async function fetchUserPublicPlaylists(userId) {
 
 /**
  * Get public playlists of a user with their songs
+ * Uses a single request; the backend nests songs with ?include=songs
  * @param {number} userId - ID of user
  * @returns {Promise<Array>} Array of playlist objects with songs
  */
 export async function fetchUserPublicPlaylistsWithSongs(userId) {
   try {
-    const playlistsData = await fetchUserPublicPlaylists(userId);
-    const playlists = playlistsData.playlists;
-    
-    // Fetch songs for each playlist
-    const playlistsWithSongs = await Promise.all(
-      playlists.map(async (playlist) => {
-        try {
-          const songs = await fetchPlaylistSongs(playlist.id);
-          return { ...playlist, songs };
-        } catch (error) {
-          console.error(`Error fetching songs for playlist ${playlist.id}:`, error);
-          return { ...playlist, songs: [] };
-        }
-      })
-    );
+    const response = await apiFetch(`${API_URL}/users/${userId}/playlists?include=songs`);
+    const data = await handleResponse(response);
     
-    return { playlists: playlistsWithSongs };
+    return {
+      playlists: data.playlists.map(playlist => ({
+        id: playlist.id,
+        name: playlist.name,
+        count: playlist.count || 0,
+        color: playlist.color || '#a855f7',
+        image: playlist.image || null,
+        description: playlist.description || '',
+        songs: playlist.songs || []
+      }))
+    };
   } catch (error) {
     console.error(`Error fetching public playlists with songs for user ${userId}:`, error);
     throw error;
@@ -283,7 +292,7 @@ export async function fetchUserPublicPlaylistsWithSongs(userId) {
  */
 export async function fetchUserPlaylists(userId) {
   try {
-    const response = await fetch(`${API_URL}/playlists/${userId}`);
+    const response = await apiFetch(`${API_URL}/playlists/${userId}`);
     const playlists = await handleResponse(response);
     
     // Transform backend data to match frontend expectations
@@ -308,7 +317,7 @@ export async function fetchUserPlaylists(userId) {
  */
 export async function fetchPlaylistSongs(playlistId) {
   try {
-    const response = await fetch(`${API_URL}/playlists/${playlistId}/songs`);
+    const response = await apiFetch(`${API_URL}/playlists/${playlistId}/songs`);
     return handleResponse(response);
   } catch (error) {
     console.error(`Error fetching songs for playlist ${playlistId}:`, error);
@@ -328,7 +337,7 @@ export async function fetchPlaylistSongs(playlistId) {
 export async function createPlaylist(userId, name, description = '', colorHex = '#a855f7', imageUrl = '') {
   console.log('API: Creating playlist with image:', imageUrl ? `${imageUrl.substring(0, 50)}...` : 'No image');
   
-  const response = await fetch(`${API_URL}/playlists`, {
+  const response = await apiFetch(`${API_URL}/playlists`, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify({
@@ -360,7 +369,7 @@ export async function createPlaylist(userId, name, description = '', colorHex =
  */
 export async function addSongToPlaylist(playlistId, songId, trackOrder = 999) {
   try {
-    const response = await fetch(`${API_URL}/playlists/${playlistId}/songs`, {
+    const response = await apiFetch(`${API_URL}/playlists/${playlistId}/songs`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify({
@@ -382,7 +391,7 @@ export async function addSongToPlaylist(playlistId, songId, trackOrder = 999) {
  */
 export async function deletePlaylist(playlistId) {
   try {
-    const response = await fetch(`${API_URL}/playlists/${playlistId}`, {
+    const response = await apiFetch(`${API_URL}/playlists/${playlistId}`, {
       method: 'DELETE'
     });
     return handleResponse(response);
@@ -407,7 +416,7 @@ export async function searchMusic(query) {
       return { songs: [], artists: [] };
     }
     
-    const response = await fetch(`${API_URL}/search?q=${encodeURIComponent(query)}`);
+    const response = await apiFetch(`${API_URL}/search?q=${encodeURIComponent(query)}`);
     return handleResponse(response);
   } catch (error) {
     console.error('Error during search:', error);
@@ -425,7 +434,7 @@ export async function searchMusic(query) {
  */
 export async function fetchBillboardTop10() {
   try {
-    const response = await fetch(`${API_URL}/billboard/top10`);
+    const response = await apiFetch(`${API_URL}/billboard/top10`);
     return handleResponse(response);
   } catch (error) {
     console.error('Error fetching Billboard Top 10:', error);
@@ -433,6 +442,50 @@ export async function fetchBillboardTop10() {
   }
 }
 
+// ============================================================================
+// PLAYS
+// ============================================================================
+
+/**
+ * Record that a song started playing (fire and forget - never throws)
+ * @param {number} userId - Listening user ID (optional)
+ * @param {number} songId - ID of song played
+ * @returns {Promise<void>}
+ */
+export async function recordPlay(userId, songId) {
+  try {
+    await apiFetch(`${API_URL}/plays`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      // keepalive lets the request finish if the page is closed right after
+      keepalive: true,
+      body: JSON.stringify({
+        user_id: userId || null,
+        song_id: songId,
+        played_at: Date.now()
+      })
+    });
+  } catch (error) {
+    console.error('Error recording play:', error);
+  }
+}
+
+/**
+ * Fetch the most played songs
+ * @param {string} window - 'hour', 'day' or 'week'
+ * @param {number} limit - Number of songs (optional)
+ * @returns {Promise<Object>} Object with window and songs (each with a plays count)
+ */
+export async function fetchTrending(window = 'day', limit = 20) {
+  try {
+    const response = await apiFetch(`${API_URL}/trending?window=${window}&limit=${limit}`);
+    return handleResponse(response);
+  } catch (error) {
+    console.error('Error fetching trending songs:', error);
+    throw error;
+  }
+}
+
 // ============================================================================
 // BATCH OPERATIONS (Helper Functions)
 // ============================================================================
@@ -495,7 +548,7 @@ export async function createPlaylistWithSongs(userId, name, songIds, colorHex) {
  * @returns {Promise<Object>} Updated user object
  */
 export async function updateUserProfile(userId, profileData) {
-  const response = await fetch(`${API_URL}/users/${userId}/profile`, {
+  const response = await apiFetch(`${API_URL}/users/${userId}/profile`, {
     method: 'PUT',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify(profileData)